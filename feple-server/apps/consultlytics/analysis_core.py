@@ -0,0 +1,267 @@
+"""
+apps/consultlytics/analysis_core.py
+
+상담 분석의 CPU 작업(점수 계산, 대화 압축, 행 직렬화, 프롬프트 생성, LLM 응답 파싱)만 모은 모듈입니다.
+Django·DB·LLM 클라이언트에 의존하지 않고 순수 값(dict, str)만 주고받으므로
+services.analyze_consultation뿐 아니라 pipeline.py의 프로세스 풀 워커에서도 그대로 실행됩니다.
+
+<사용 예시>
+  row_dict = model_to_dict(row)
+  prepared = prepare_prompt(row_dict, token_budget=4000)   # {"prompt": ..., "scores": {...}, "compression": {...}}
+  result, missing = parse_response(response.content)
+"""
+
+import os
+import json
+import logging
+import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from langchain.prompts import PromptTemplate
+
+from .metrics import estimate_tokens
+from .transcript import CompressedTranscript, compress_transcript
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_KEYS = ["상담자 강점", "상담자 단점", "개선점", "평가점수", "코칭 멘트"]
+
+# 프롬프트 예산이 작아도 대화에 최소한 남길 토큰 수
+MIN_TRANSCRIPT_TOKENS = 200
+
+
+def score_emotion(star: int) -> int:
+    """Return 100/80/60/40/20 based on 5→1 star."""
+    return max(20, (6-star)*20)
+
+def score_efficiency(silence: int, csr: int, cust: int) -> int:
+    penalty = (silence/500) + abs(csr-cust)*2
+    return max(0, 100 - min(100, int(penalty)))
+
+def score_manual(alt: int, apology: float, pos: float, eupho: float, empathy: float) -> float:
+    criteria = [alt>0, apology>0, pos>0.1, eupho>0.05, empathy>0.1]
+    return sum(criteria)/len(criteria)
+
+
+def load_guidelines(path: Optional[str]) -> str:
+    """평가 기준표·예시 답안 파일 내용을 읽습니다. (경로가 없거나 읽지 못하면 빈 문자열)"""
+    if not path:
+        return ""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError as e:
+        logger.warning(f"평가 기준표 파일을 읽지 못해 기본 지시문만 사용합니다 ({path}): {str(e)}")
+        return ""
+
+
+# 지시문 뒤에 붙는 평가 기준표 (프로세스 풀 워커에서도 같은 값이 되도록 Django 설정 대신 환경 변수로 읽음)
+ANALYSIS_GUIDELINES = load_guidelines(os.getenv("ANALYSIS_GUIDELINES_PATH"))
+
+# 모든 호출에 똑같이 들어가는 지시문 (프롬프트 앞부분에 두어 제공자 측 컨텍스트 캐시로 재사용)
+ANALYSIS_PREFIX = """
+당신은 콜센터 전문 평가 AI입니다. 이어지는 상담 데이터(JSON)와 계산된 중간 점수를 참고하여 분석해주세요.
+
+다음 5가지 항목에 대해 분석해주세요:
+1. 평가점수 (100점 만점, 숫자만)
+2. 상담자 강점(상담사가 잘한 점을 근거와 함께 설명)
+3. 상담자 단점(상담사가 못한 점을 근거와 함께 설명)
+4. 개선점(상담 품질 향상을 위해 실질적으로 도움이 될 만한 개선점을 근거와 함께 설명)
+5. 코칭 멘트 (실제 상담자에게 전달할 수 있는 구체적이고 실질적인 코칭 메시지, 따뜻하면서도 실질적인 코칭 멘트)
+
+각 항목은 한 줄로 작성해주세요.
+"""
+if ANALYSIS_GUIDELINES:
+    ANALYSIS_PREFIX += f"\n[평가 기준]\n{ANALYSIS_GUIDELINES}\n"
+
+# 호출마다 달라지는 부분
+ANALYSIS_SUFFIX = """
+[상담 데이터(JSON)]
+{row}
+
+[중간 스코어]
+- 상담사 감정 점수: {agent_emotion_score}
+- 고객 감정 점수: {customer_emotion_score}
+- 효율성 점수: {efficiency_score}
+- 매뉴얼 준수율: {manual_ratio}
+- 최종 점수: {final_score}
+"""
+
+ANALYSIS_PROMPT = PromptTemplate(
+    input_variables=["row", "agent_emotion_score", "customer_emotion_score",
+                    "efficiency_score", "manual_ratio", "final_score"],
+    # 기준표의 중괄호가 템플릿 변수로 해석되지 않도록 이스케이프
+    template=ANALYSIS_PREFIX.replace("{", "{{").replace("}", "}}") + ANALYSIS_SUFFIX
+)
+
+
+def _value(row: Mapping[str, Any], name: str, default: Any) -> Any:
+    """행 딕셔너리에서 값을 읽습니다. (키가 없거나 NULL이면 기본값)"""
+    value = row.get(name)
+    return default if value is None else value
+
+
+def compute_scores(row: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    상담 행(model_to_dict 결과)에서 중간 점수와 최종 점수를 계산합니다.
+
+    Returns:
+        agent_emotion, customer_emotion, efficiency, manual_compliance, final_score
+    """
+    # 감정 점수 계산 (1★부터 처음 표시된 별점, 없으면 3★)
+    agent_star = next((s for s in range(1, 6) if _value(row, f"emo_{s}_star_score", 0) > 0), 3)
+    cust_star = next((s for s in range(1, 6) if _value(row, f"고객_emo_{s}_star_score", 0) > 0), 3)
+
+    agent_emotion = score_emotion(agent_star)
+    cust_emotion = score_emotion(cust_star)
+
+    # 효율성 점수
+    eff = score_efficiency(
+        _value(row, "silence", 0),
+        _value(row, "csr_speech_count", 0),
+        _value(row, "customer_speech_count", 0)
+    )
+
+    # 메뉴얼 준수율 (불만 고객일 때만 평가)
+    if cust_star <= 2:
+        manual_ratio = score_manual(
+            _value(row, "alternative_solution_count", 0),
+            _value(row, "apology_ratio", 0.0),
+            _value(row, "positive_word_ratio", 0.0),
+            _value(row, "euphonious_word_ratio", 0.0),
+            _value(row, "empathy_expression_ratio", 0.0)
+        )
+    else:
+        manual_ratio = 1.0
+
+    # 최종 점수 계산
+    profanity_penalty = -20 if _value(row, "Profane", False) else 0
+    final_score = int((agent_emotion + cust_emotion + eff + manual_ratio*100)/4 + profanity_penalty)
+    final_score = max(0, min(100, final_score))
+
+    return {
+        "agent_emotion": agent_emotion,
+        "customer_emotion": cust_emotion,
+        "efficiency": eff,
+        "manual_compliance": manual_ratio,
+        "final_score": final_score
+    }
+
+
+def serialize_row(row: Mapping[str, Any]) -> str:
+    """상담 행을 프롬프트에 넣을 JSON 문자열로 변환합니다."""
+    row_dict = {
+        key: value.isoformat() if isinstance(value, datetime.datetime) else value
+        for key, value in row.items()
+    }
+    return json.dumps(row_dict, ensure_ascii=False)
+
+
+def build_prompt(row_json: str, scores: Mapping[str, Any]) -> str:
+    """직렬화된 행과 중간 점수로 분석 프롬프트를 만듭니다. (항상 ANALYSIS_PREFIX로 시작)"""
+    return ANALYSIS_PROMPT.format(
+        row=row_json,
+        agent_emotion_score=scores["agent_emotion"],
+        customer_emotion_score=scores["customer_emotion"],
+        efficiency_score=scores["efficiency"],
+        manual_ratio=round(scores["manual_compliance"], 2),
+        final_score=scores["final_score"]
+    )
+
+
+def compress_row(row: Mapping[str, Any], scores: Mapping[str, Any],
+                 token_budget: int = 0) -> Tuple[Dict[str, Any], CompressedTranscript]:
+    """
+    consulting_content를 압축한 행 복사본과 압축 결과를 반환합니다.
+    token_budget은 프롬프트 전체 기준이며, 대화를 뺀 나머지 프롬프트 크기를 제외한 만큼을 대화에 배정합니다.
+    """
+    transcript_budget = 0
+    if token_budget:
+        base = estimate_tokens(build_prompt(serialize_row({**row, "consulting_content": ""}), scores))
+        transcript_budget = max(MIN_TRANSCRIPT_TOKENS, token_budget - base)
+
+    content = row.get("consulting_content")
+    compressed = compress_transcript(content, top_nouns=row.get("top_nouns"), token_budget=transcript_budget)
+    if not content:
+        return dict(row), compressed
+    return {**row, "consulting_content": compressed.text}, compressed
+
+
+def prepare_prompt(row: Mapping[str, Any], token_budget: int = 0) -> Dict[str, Any]:
+    """점수 계산 → 대화 압축 → 직렬화 → 프롬프트 생성을 한 번에 수행합니다. (프로세스 풀 작업 단위)"""
+    scores = compute_scores(row)
+    compact_row, compressed = compress_row(row, scores, token_budget)
+    return {
+        "scores": scores,
+        "prompt": build_prompt(serialize_row(compact_row), scores),
+        "compression": compressed.stats(),
+    }
+
+
+def parse_response(response_content: str) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """
+    LLM 응답을 파싱하여 구조화된 결과를 반환합니다.
+    누락된 항목은 기본값으로 채우고, 누락된 항목 이름 목록을 함께 반환합니다.
+
+    Returns:
+        (파싱 결과 또는 None, 누락 항목 목록)
+    """
+    try:
+        lines = response_content.strip().split('\n')
+        result = {}
+
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            if line.startswith('1.') or line.startswith('평가점수'):
+                # 점수 추출
+                score_text = line.split('.', 1)[1].strip() if '.' in line else line.split(':', 1)[1].strip()
+                try:
+                    result['평가점수'] = int(''.join(filter(str.isdigit, score_text)))
+                except (ValueError, IndexError):
+                    result['평가점수'] = 0
+
+            elif line.startswith('2.') or line.startswith('상담자 강점'):
+                result['상담자 강점'] = extract_content(line)
+
+            elif line.startswith('3.') or line.startswith('상담자 단점'):
+                result['상담자 단점'] = extract_content(line)
+
+            elif line.startswith('4.') or line.startswith('개선점'):
+                result['개선점'] = extract_content(line)
+
+            elif line.startswith('5.') or line.startswith('코칭 멘트'):
+                result['코칭 멘트'] = extract_content(line)
+
+        # 필수 키 확인
+        missing_keys = [k for k in REQUIRED_KEYS if k not in result]
+        if missing_keys:
+            logger.warning(f"필수 키가 누락되었습니다: {missing_keys}")
+
+            # 누락된 키에 대해 기본값 설정
+            for key in missing_keys:
+                if key == "평가점수":
+                    result[key] = 0
+                else:
+                    result[key] = "분석 결과 없음"
+
+        return result, missing_keys
+
+    except Exception as e:
+        logger.error(f"LLM 응답 파싱 중 오류: {str(e)}")
+        return None, []
+
+
+def extract_content(line: str) -> str:
+    """라인에서 내용을 추출합니다."""
+    try:
+        if ':' in line:
+            return line.split(':', 1)[1].strip()
+        elif '.' in line:
+            return line.split('.', 1)[1].strip()
+        else:
+            return line.strip()
+    except (IndexError, AttributeError):
+        return "내용 추출 실패"
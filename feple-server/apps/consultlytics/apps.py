@@ -4,3 +4,21 @@ from django.apps import AppConfig
 class ConsultlyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.consultlytics'
+
+    def ready(self):
+        # ORM이 새 DB 연결을 열 때마다 기록 (CONN_MAX_AGE 연결 재사용 확인용)
+        from django.db.backends.signals import connection_created
+        from .db import record_django_connection
+
+        connection_created.connect(record_django_connection, dispatch_uid="consultlytics_db_connections")
+
+        # 새 Consulting과 callytics File을 유사 통화 인덱스에 추가
+        # (File은 callytics 앱이 INSTALLED_APPS에 있을 때만, 없으면 build_similarity_index로만 반영)
+        from django.apps import apps
+        from django.db.models.signals import post_save
+        from .models import Consulting
+        from .similarity_store import CALLYTICS_APP, on_consulting_saved, on_file_saved
+
+        post_save.connect(on_consulting_saved, sender=Consulting, dispatch_uid="consultlytics_similarity_consulting")
+        if apps.is_installed(CALLYTICS_APP):
+            post_save.connect(on_file_saved, sender="callytics.File", dispatch_uid="consultlytics_similarity_file")
@@ -0,0 +1,161 @@
+"""
+apps/consultlytics/bulk_ingest.py
+
+feple_analysis.analysis_results 대량 적재 유틸리티입니다. (SQLAlchemy, Django 비의존)
+결과 한 건마다 INSERT ... ON DUPLICATE KEY UPDATE를 실행하는 대신
+
+- multi  : batch_size건을 VALUES (...), (...), ... 다중 행 upsert 한 문장으로 실행
+- staging: 임시 스테이징 테이블에 다중 행 INSERT로 모두 적재한 뒤,
+           INSERT ... SELECT ... ON DUPLICATE KEY UPDATE 한 번으로 본 테이블에 병합
+
+하여 Python ↔ DB 왕복 횟수를 배치 수만큼으로 줄입니다.
+(batch_size × 행 크기가 MySQL max_allowed_packet을 넘지 않도록 설정하세요.)
+
+<사용 예시>
+  from apps.consultlytics.bulk_ingest import bulk_load
+  stats = bulk_load(engine, rows, batch_size=1000, mode="staging")
+  print(stats.rows_per_sec)
+"""
+
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from .result_stream import iter_batches
+
+ANALYSIS_TABLE = "analysis_results"
+STAGING_TABLE = "analysis_results_staging"
+ANALYSIS_COLUMNS = (
+    "call_id", "evaluation_score", "strengths", "weaknesses", "improvements", "coaching_message",
+)
+LOAD_MODES = ("multi", "staging")
+
+# 스테이징 테이블: 세션 전용 임시 테이블, call_id 중복은 마지막 값으로 덮어씀
+_STAGING_DDL = f"""
+    CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} (
+        call_id VARCHAR(20) NOT NULL PRIMARY KEY,
+        evaluation_score INT NOT NULL,
+        strengths TEXT NOT NULL,
+        weaknesses TEXT NOT NULL,
+        improvements TEXT NOT NULL,
+        coaching_message TEXT NOT NULL
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+
+@dataclass
+class BulkLoadStats:
+    """적재 결과 통계"""
+    rows: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return round(self.rows / self.seconds, 1) if self.seconds > 0 else 0.0
+
+
+def analysis_row(call_id: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """파싱된 분석 결과를 analysis_results 행(ANALYSIS_COLUMNS)으로 변환합니다."""
+    return {
+        "call_id": call_id,
+        "evaluation_score": analysis.get("평가점수"),
+        "strengths": analysis.get("상담자 강점"),
+        "weaknesses": analysis.get("상담자 단점"),
+        "improvements": analysis.get("개선점"),
+        "coaching_message": analysis.get("코칭 멘트"),
+    }
+
+
+def _update_clause(columns: Sequence[str]) -> str:
+    return ",\n        ".join(f"{col} = VALUES({col})" for col in columns if col != "call_id")
+
+
+@lru_cache(maxsize=32)
+def build_multi_upsert(table: str, columns: Sequence[str], row_count: int):
+    """
+    row_count행짜리 다중 행 upsert 문을 만듭니다.
+    바인드 파라미터 이름은 <컬럼>_<행 번호> 형식입니다. (배치 크기별로 캐시)
+    """
+    values = ",\n        ".join(
+        "(" + ", ".join(f":{col}_{i}" for col in columns) + ")" for i in range(row_count)
+    )
+    return text(f"""
+    INSERT INTO {table} ({", ".join(columns)})
+    VALUES
+        {values}
+    ON DUPLICATE KEY UPDATE
+        {_update_clause(columns)}
+    """)
+
+
+def _flatten(rows: Sequence[Dict[str, Any]], columns: Sequence[str]) -> Dict[str, Any]:
+    return {f"{col}_{i}": row.get(col) for i, row in enumerate(rows) for col in columns}
+
+
+def upsert_rows(conn: Connection, rows: Sequence[Dict[str, Any]],
+                table: str = ANALYSIS_TABLE, columns: Sequence[str] = ANALYSIS_COLUMNS) -> int:
+    """rows를 다중 행 upsert 한 문장으로 실행합니다."""
+    if not rows:
+        return 0
+    conn.execute(build_multi_upsert(table, tuple(columns), len(rows)), _flatten(rows, columns))
+    return len(rows)
+
+
+def merge_staging(conn: Connection, columns: Sequence[str] = ANALYSIS_COLUMNS) -> None:
+    """스테이징 테이블 전체를 본 테이블에 집합 단위로 병합합니다."""
+    column_list = ", ".join(columns)
+    conn.execute(text(f"""
+    INSERT INTO {ANALYSIS_TABLE} ({column_list})
+    SELECT {column_list} FROM {STAGING_TABLE}
+    ON DUPLICATE KEY UPDATE
+        {_update_clause(columns)}
+    """))
+
+
+def bulk_load(engine: Engine, rows: Iterable[Dict[str, Any]],
+              batch_size: int = 1000, mode: str = "multi") -> BulkLoadStats:
+    """
+    분석 결과 행을 analysis_results에 대량 적재합니다.
+
+    Args:
+        engine: feple_analysis DB 엔진
+        rows: ANALYSIS_COLUMNS 키를 가진 행 딕셔너리 이터러블 (스트리밍 가능)
+        batch_size: 다중 행 INSERT 한 문장에 담을 행 수
+        mode: "multi"(배치별 upsert, 배치마다 커밋) 또는 "staging"(스테이징 후 한 번에 병합)
+
+    Returns:
+        BulkLoadStats
+    """
+    if mode not in LOAD_MODES:
+        raise ValueError(f"지원하지 않는 적재 방식입니다: {mode}")
+
+    stats = BulkLoadStats()
+    started = time.perf_counter()
+
+    if mode == "multi":
+        for batch in iter_batches(rows, batch_size):
+            with engine.begin() as conn:
+                stats.rows += upsert_rows(conn, batch)
+            stats.batches += 1
+    else:
+        # 임시 테이블은 세션 단위이므로 적재와 병합을 같은 연결에서 수행
+        with engine.connect() as conn:
+            conn.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {STAGING_TABLE}"))
+            conn.execute(text(_STAGING_DDL))
+            conn.commit()
+            for batch in iter_batches(rows, batch_size):
+                stats.rows += upsert_rows(conn, batch, table=STAGING_TABLE)
+                stats.batches += 1
+                conn.commit()
+            with conn.begin():
+                merge_staging(conn)
+            conn.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {STAGING_TABLE}"))
+            conn.commit()
+
+    stats.seconds = time.perf_counter() - started
+    return stats
@@ -0,0 +1,171 @@
+"""
+apps/consultlytics/checkpoint.py
+
+배치 분석 실행 매니페스트(체크포인트)입니다.
+행(call_id)별 상태를 로컬 SQLite 파일에 건마다 기록하므로, 실행이 중단되어도
+다시 실행하면 완료된 행은 건너뛰고 실패한 행만 최대 시도 횟수까지 재시도합니다.
+
+상태 전이
+  pending ──claim()──▶ in_flight ──mark_done()──▶ done
+                           │
+                           └──mark_failed()──▶ failed ──(attempts < max_attempts)──▶ 재시도 대상
+
+중단 시점에 in_flight였던 행은 다음 실행 시작 시 failed로 바꿉니다.
+(claim()에서 시도 횟수가 이미 늘었으므로 매번 프로세스를 죽이는 행도 max_attempts에서 멈춥니다.)
+
+<설정 안내>
+- settings.py (또는 .env)
+    RUN_MANIFEST_PATH   = "checkpoints/run_analysis.db"
+    RUN_MAX_ATTEMPTS    = 3
+
+<사용 예시>
+  manifest = RunManifest("checkpoints/run_analysis.db")
+  manifest.register(call_ids)
+  for call_id in manifest.pending_ids(max_attempts=3):
+      manifest.claim(call_id)
+      ...
+      manifest.mark_done(call_id, result)
+"""
+
+import os
+import json
+import sqlite3
+import datetime
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+# 처리 중 실행이 중단된 행에 남기는 오류 메시지
+INTERRUPTED_ERROR = "처리 중 실행이 중단됨"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS run_rows (
+    call_id     TEXT PRIMARY KEY,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    result_json TEXT,
+    error       TEXT,
+    updated_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS run_rows_status_idx ON run_rows (status, attempts);
+"""
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat()
+
+
+class RunManifest:
+    """SQLite(WAL) 기반 행 단위 실행 매니페스트. 여러 스레드에서 공유할 수 있습니다."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL + synchronous=NORMAL: 건마다 커밋해도 fsync 비용이 작고 전원 장애 외에는 유실 없음
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _execute(self, sql: str, params: Iterable[Any] = ()) -> None:
+        with self._lock:
+            self._conn.execute(sql, tuple(params))
+
+    def _fetchall(self, sql: str, params: Iterable[Any] = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def register(self, call_ids: Iterable[str]) -> int:
+        """
+        처리 대상 행을 pending으로 등록합니다. (이미 등록된 행은 상태 유지)
+        이전 실행에서 in_flight로 남은 행은 failed로 바꾸어 시도 횟수 제한을 적용받게 합니다.
+
+        Returns:
+            새로 등록된 행 수
+        """
+        now = _now()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO run_rows (call_id, status, updated_at) VALUES (?, ?, ?)",
+                ((call_id, PENDING, now) for call_id in call_ids),
+            )
+            inserted = self._conn.total_changes - before
+            self._conn.execute(
+                "UPDATE run_rows SET status = ?, error = ?, updated_at = ? WHERE status = ?",
+                (FAILED, INTERRUPTED_ERROR, now, IN_FLIGHT),
+            )
+            self._conn.execute("COMMIT")
+        return inserted
+
+    def pending_ids(self, max_attempts: int = 3) -> List[str]:
+        """이번 실행에서 처리할 행(pending, 또는 시도 횟수가 남은 failed)의 call_id 목록"""
+        rows = self._fetchall(
+            "SELECT call_id FROM run_rows WHERE status = ? OR (status = ? AND attempts < ?) ORDER BY call_id",
+            (PENDING, FAILED, max_attempts),
+        )
+        return [row[0] for row in rows]
+
+    def claim(self, call_id: str) -> None:
+        """행을 in_flight로 표시하고 시도 횟수를 늘립니다."""
+        self._execute(
+            "UPDATE run_rows SET status = ?, attempts = attempts + 1, updated_at = ? WHERE call_id = ?",
+            (IN_FLIGHT, _now(), call_id),
+        )
+
+    def mark_done(self, call_id: str, result: Dict[str, Any]) -> None:
+        """행을 완료로 표시하고 결과를 함께 저장합니다."""
+        self._execute(
+            "UPDATE run_rows SET status = ?, result_json = ?, error = NULL, updated_at = ? WHERE call_id = ?",
+            (DONE, json.dumps(result, ensure_ascii=False, default=str), _now(), call_id),
+        )
+
+    def mark_failed(self, call_id: str, error: Optional[str] = None,
+                    result: Optional[Dict[str, Any]] = None) -> None:
+        """행을 실패로 표시합니다. (result가 있으면 마지막 실패 결과로 저장)"""
+        result_json = json.dumps(result, ensure_ascii=False, default=str) if result is not None else None
+        self._execute(
+            "UPDATE run_rows SET status = ?, result_json = ?, error = ?, updated_at = ? WHERE call_id = ?",
+            (FAILED, result_json, error, _now(), call_id),
+        )
+
+    def results(self, page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """저장된 결과(완료 + 마지막 실패 결과)를 call_id 순으로 page_size건씩 읽어 반환합니다."""
+        last_call_id = ""
+        while True:
+            rows = self._fetchall(
+                "SELECT call_id, result_json FROM run_rows WHERE result_json IS NOT NULL AND call_id > ? "
+                "ORDER BY call_id LIMIT ?",
+                (last_call_id, page_size),
+            )
+            if not rows:
+                return
+            for call_id, result_json in rows:
+                yield json.loads(result_json)
+            last_call_id = rows[-1][0]
+
+    def summary(self) -> Dict[str, int]:
+        """상태별 행 수"""
+        rows = self._fetchall("SELECT status, COUNT(*) FROM run_rows GROUP BY status")
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @classmethod
+    def reset(cls, path: str) -> None:
+        """매니페스트 파일(WAL 포함)을 삭제하여 처음부터 다시 실행하게 합니다."""
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
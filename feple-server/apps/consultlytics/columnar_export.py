@@ -0,0 +1,297 @@
+"""
+apps/consultlytics/columnar_export.py
+
+consulting 행과 분석 결과(feple_analysis.analysis_results)를 합쳐 오프라인 분석용 Parquet 파일로 내보냅니다.
+분석 작업이 운영 DB를 행 단위로 반복 조회하는 대신 압축된 열 형식 파일을 읽도록 하기 위한 것입니다.
+
+- 파티션: 통화 일자(call_date) × 메인 카테고리(mid_category), Hive 형식 디렉토리
+    {EXPORT_ROOT}/consulting/day=2024-06-01/mid_category=%EB%8C%80%EC%B6%9C/part-0.parquet
+  (카테고리는 URL 인코딩, 카테고리가 없으면 __HIVE_DEFAULT_PARTITION__)
+  pyarrow.dataset.dataset(root, partitioning="hive")로 일자·카테고리 조건을 파일 단위로 건너뛸 수 있습니다.
+- 파티션마다 call_id keyset 페이지로 chunk_size건씩 읽고, 같은 call_id의 분석 결과를 IN 조회로 붙여
+  row group 하나로 기록합니다. (파티션 전체를 메모리에 올리지 않음)
+- 열 타입은 모델 필드에서 정합니다. 음성 특성(Chroma_stft 등)은 features.decode_feature로 디코딩하여
+  고정 길이 float32 리스트(fixed_size_list) 열로, top_nouns는 JSON 문자열 열로 저장합니다.
+- workers > 1이면 파티션 단위로 프로세스를 나누어 병렬로 내보냅니다.
+- 파티션 파일은 임시 파일에 쓴 뒤 교체하므로 다시 실행하면 같은 파티션을 덮어씁니다.
+Parquet 기록에는 선택 패키지 pyarrow가 필요합니다.
+
+<설정 안내>
+- settings.py (또는 .env)
+    EXPORT_ROOT        = "exports"
+    EXPORT_CHUNK_SIZE  = 5000     # 한 번에 읽을 consulting 행 수 (= row group 크기)
+    EXPORT_WORKERS     = 4        # 파티션 병렬 처리 프로세스 수
+    EXPORT_COMPRESSION = "zstd"
+
+<사용 예시>
+  $ python manage.py export_columnar --start 2024-06-01 --end 2024-06-30 --workers 8
+  $ python manage.py export_columnar --exclude consulting_content,Content --skip-analysis
+
+  import pyarrow.dataset as ds
+  table = ds.dataset("exports/consulting", partitioning="hive").to_table(filter=ds.field("day") == "2024-06-01")
+"""
+
+import os
+import json
+import time
+import logging
+import datetime
+from dataclasses import dataclass
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from sqlalchemy import bindparam, text
+
+from .db import ANALYSIS, get_engine
+from .features import FEATURE_DIMS, decode_feature
+from .workers import init_django_worker, process_pool_context
+from .models import Consulting
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # 선택 의존성
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+PARTITION_FIELD = "mid_category"   # 디렉토리 이름에 들어가므로 파일 열에서는 제외
+ANALYSIS_EXPORT_COLUMNS = ("evaluation_score", "strengths", "weaknesses", "improvements", "coaching_message")
+
+ANALYSIS_LOOKUP = text("""
+    SELECT call_id, evaluation_score, strengths, weaknesses, improvements, coaching_message,
+           created_at AS analysis_created_at
+    FROM analysis_results
+    WHERE call_id IN :call_ids
+""").bindparams(bindparam("call_ids", expanding=True))
+
+
+@dataclass
+class PartitionExport:
+    """파티션 하나의 내보내기 결과"""
+    day: datetime.date
+    mid_category: Optional[str]
+    rows: int
+    path: str
+    bytes: int
+    seconds: float
+    invalid_features: int = 0
+
+
+def _arrow_type(field: models.Field) -> Any:
+    if field.name in FEATURE_DIMS:
+        return pyarrow.list_(pyarrow.float32(), FEATURE_DIMS[field.name])
+    if isinstance(field, models.BooleanField):
+        return pyarrow.bool_()
+    if isinstance(field, models.IntegerField):
+        return pyarrow.int32()
+    if isinstance(field, models.FloatField):
+        return pyarrow.float64()
+    if isinstance(field, models.DateTimeField):
+        return pyarrow.timestamp("us", tz="UTC")
+    # CharField, TextField, 그 밖의 JSONField(top_nouns)는 문자열
+    return pyarrow.string()
+
+
+def export_fields(exclude: Sequence[str] = ()) -> List[models.Field]:
+    """내보낼 consulting 필드 (파티션 열과 exclude 제외, 모델 정의 순서)"""
+    unknown = set(exclude) - {field.name for field in Consulting._meta.concrete_fields}
+    if unknown:
+        raise ValueError(f"consulting에 없는 필드입니다: {', '.join(sorted(unknown))}")
+    return [
+        field for field in Consulting._meta.concrete_fields
+        if field.name != PARTITION_FIELD and (field.name == "call_id" or field.name not in exclude)
+    ]
+
+
+def export_schema(fields: Sequence[models.Field], with_analysis: bool = True) -> Any:
+    columns = [(field.name, _arrow_type(field)) for field in fields]
+    if with_analysis:
+        columns += [
+            ("evaluation_score", pyarrow.int32()),
+            ("strengths", pyarrow.string()),
+            ("weaknesses", pyarrow.string()),
+            ("improvements", pyarrow.string()),
+            ("coaching_message", pyarrow.string()),
+            # analysis_results.created_at은 TIMESTAMP(naive, UTC)
+            ("analysis_created_at", pyarrow.timestamp("us", tz="UTC")),
+        ]
+    return pyarrow.schema(columns)
+
+
+def partition_path(root: str, day: datetime.date, mid_category: Optional[str]) -> str:
+    category = NULL_PARTITION if mid_category is None else quote(mid_category, safe="")
+    return os.path.join(root, "consulting", f"day={day.isoformat()}", f"mid_category={category}", "part-0.parquet")
+
+
+def _day_start(day: datetime.date) -> datetime.datetime:
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time()))
+
+
+def list_partitions(start: Optional[datetime.date] = None,
+                    end: Optional[datetime.date] = None) -> List[Tuple[datetime.date, Optional[str], int]]:
+    """(통화 일자, mid_category, 행 수) 목록 (start, end 포함)"""
+    # 일자 범위는 call_date 인덱스 범위로 거름
+    queryset = Consulting.objects.all()
+    if start:
+        queryset = queryset.filter(call_date__gte=_day_start(start))
+    if end:
+        queryset = queryset.filter(call_date__lt=_day_start(end) + datetime.timedelta(days=1))
+    groups = (
+        queryset.annotate(day=TruncDate("call_date"))
+        .values("day", "mid_category")
+        .annotate(rows=Count("call_id"))
+        .order_by("day", "mid_category")
+    )
+    return [(group["day"], group["mid_category"], group["rows"]) for group in groups]
+
+
+def _partition_queryset(day: datetime.date, mid_category: Optional[str]) -> Any:
+    start = _day_start(day)
+    queryset = Consulting.objects.filter(call_date__gte=start, call_date__lt=start + datetime.timedelta(days=1))
+    if mid_category is None:
+        return queryset.filter(mid_category__isnull=True)
+    return queryset.filter(mid_category=mid_category)
+
+
+def iter_partition_chunks(day: datetime.date, mid_category: Optional[str], names: Sequence[str],
+                          chunk_size: int) -> Iterator[List[Tuple[Any, ...]]]:
+    """파티션 행을 call_id 순 keyset 페이지로 chunk_size건씩 읽습니다. (names[0]은 call_id)"""
+    queryset = _partition_queryset(day, mid_category).order_by("call_id")
+    last_id = None
+    while True:
+        page = queryset if last_id is None else queryset.filter(call_id__gt=last_id)
+        rows = list(page.values_list(*names)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+        if len(rows) < chunk_size:
+            return
+
+
+def _fetch_analysis(call_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    with get_engine(ANALYSIS).connect() as conn:
+        result = conn.execute(ANALYSIS_LOOKUP, {"call_ids": call_ids}).mappings()
+        return {row["call_id"]: dict(row) for row in result}
+
+
+def _to_columns(fields: Sequence[models.Field], rows: List[Tuple[Any, ...]],
+                analysis: Optional[Dict[str, Dict[str, Any]]]) -> Tuple[Dict[str, List[Any]], int]:
+    """행 목록을 열별 리스트로 변환하고 디코딩하지 못한 음성 특성 수를 함께 반환합니다."""
+    columns: Dict[str, List[Any]] = {}
+    invalid = 0
+    for index, field in enumerate(fields):
+        values = [row[index] for row in rows]
+        if field.name in FEATURE_DIMS:
+            decoded = [decode_feature(value, FEATURE_DIMS[field.name]) if value is not None else None for value in values]
+            invalid += sum(1 for value, vector in zip(values, decoded) if value is not None and vector is None)
+            values = decoded
+        elif isinstance(field, models.JSONField):
+            values = [json.dumps(value, ensure_ascii=False) if value is not None else None for value in values]
+        columns[field.name] = values
+
+    if analysis is not None:
+        matched = [analysis.get(row[0], {}) for row in rows]
+        for name in ANALYSIS_EXPORT_COLUMNS + ("analysis_created_at",):
+            columns[name] = [result.get(name) for result in matched]
+        columns["analysis_created_at"] = [
+            value.replace(tzinfo=datetime.timezone.utc) if value is not None else None
+            for value in columns["analysis_created_at"]
+        ]
+    return columns, invalid
+
+
+def export_partition(root: str, day: datetime.date, mid_category: Optional[str],
+                     chunk_size: int = 5000, exclude: Sequence[str] = (),
+                     with_analysis: bool = True, compression: str = "zstd") -> PartitionExport:
+    """파티션 하나를 Parquet 파일로 내보냅니다. (chunk마다 row group 하나)"""
+    started = time.perf_counter()
+    fields = export_fields(exclude)
+    schema = export_schema(fields, with_analysis)
+    names = [field.attname for field in fields]
+
+    path = partition_path(root, day, mid_category)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    rows = invalid = 0
+    writer = pyarrow.parquet.ParquetWriter(tmp_path, schema, compression=compression)
+    try:
+        for chunk in iter_partition_chunks(day, mid_category, names, chunk_size):
+            analysis = _fetch_analysis([row[0] for row in chunk]) if with_analysis else None
+            columns, chunk_invalid = _to_columns(fields, chunk, analysis)
+            writer.write_table(pyarrow.Table.from_pydict(columns, schema=schema))
+            rows += len(chunk)
+            invalid += chunk_invalid
+    except BaseException:
+        writer.close()
+        os.remove(tmp_path)
+        raise
+    writer.close()
+    os.replace(tmp_path, path)
+
+    if invalid:
+        logger.warning(f"디코딩하지 못한 음성 특성 {invalid}개를 null로 기록했습니다: {day} {mid_category}")
+    return PartitionExport(day, mid_category, rows, path, os.path.getsize(path),
+                           round(time.perf_counter() - started, 3), invalid)
+
+
+def export_columnar(root: Optional[str] = None, start: Optional[datetime.date] = None,
+                    end: Optional[datetime.date] = None, chunk_size: Optional[int] = None,
+                    workers: Optional[int] = None, exclude: Sequence[str] = (),
+                    with_analysis: bool = True, compression: Optional[str] = None) -> List[PartitionExport]:
+    """
+    기간 내 모든 (일자, 카테고리) 파티션을 Parquet으로 내보냅니다.
+
+    Args:
+        root: 출력 루트 디렉토리 (기본: EXPORT_ROOT)
+        start, end: 통화 일자 범위 (포함, None이면 제한 없음)
+        chunk_size: 한 번에 읽을 행 수 (기본: EXPORT_CHUNK_SIZE)
+        workers: 병렬 프로세스 수 (기본: EXPORT_WORKERS, 1이면 현재 프로세스에서 처리)
+        exclude: 내보내지 않을 consulting 필드 (대화 원문 등)
+        with_analysis: analysis_results 열 포함 여부
+        compression: Parquet 압축 방식 (기본: EXPORT_COMPRESSION)
+
+    Returns:
+        파티션별 내보내기 결과 (일자·카테고리 순)
+    """
+    if pyarrow is None:
+        raise RuntimeError("Parquet 내보내기를 사용하려면 pyarrow 패키지를 설치하세요. (pip install pyarrow)")
+    root = root or getattr(settings, "EXPORT_ROOT", "exports")
+    chunk_size = chunk_size or getattr(settings, "EXPORT_CHUNK_SIZE", 5000)
+    workers = workers or getattr(settings, "EXPORT_WORKERS", 4)
+    compression = compression or getattr(settings, "EXPORT_COMPRESSION", "zstd")
+    export_fields(exclude)  # 잘못된 필드 이름은 작업 시작 전에 오류
+
+    partitions = list_partitions(start, end)
+    started = time.perf_counter()
+    options = dict(chunk_size=chunk_size, exclude=tuple(exclude), with_analysis=with_analysis, compression=compression)
+    results: List[PartitionExport] = []
+
+    if workers <= 1 or len(partitions) <= 1:
+        for day, category, _ in partitions:
+            results.append(export_partition(root, day, category, **options))
+    else:
+        # 큰 파티션부터 넘겨 마지막에 큰 파티션 하나만 남는 일을 줄임
+        ordered = sorted(partitions, key=lambda item: -item[2])
+        # forkserver 워커: 부모의 DB 연결·로그 리스너 스레드를 물려받지 않고 워커에서 새로 설정
+        with ProcessPoolExecutor(max_workers=workers, mp_context=process_pool_context(),
+                                 initializer=init_django_worker) as executor:
+            futures = [executor.submit(export_partition, root, day, category, **options) for day, category, _ in ordered]
+            for future in as_completed(futures):
+                results.append(future.result())
+                logger.info(f"열 형식 내보내기 진행: 파티션 {len(results)}/{len(partitions)}")
+
+    results.sort(key=lambda item: (item.day, item.mid_category or ""))
+    rows = sum(item.rows for item in results)
+    size_mb = sum(item.bytes for item in results) / 1024 / 1024
+    elapsed = time.perf_counter() - started
+    logger.info(f"열 형식 내보내기 완료: 파티션 {len(results)}개, {rows}건, {size_mb:.1f}MB ({elapsed:.1f}초)")
+    return results
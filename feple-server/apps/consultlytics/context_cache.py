@@ -0,0 +1,239 @@
+"""
+apps/consultlytics/context_cache.py
+
+분석 프롬프트의 고정 지시문(ANALYSIS_PREFIX)을 제공자 측 컨텍스트 캐시에 올려두고
+호출마다 달라지는 부분(상담 데이터·중간 점수)만 보내 입력 토큰 비용과 첫 토큰까지의 지연을 줄입니다.
+
+- PrefixCachingLLM은 llm_providers.LLMProvider 인터페이스를 가지므로
+  마감 시간·헤지(llm_calls.py), 등급 라우팅(model_router.py)을 그대로 거칩니다.
+- 프롬프트가 prefix로 시작하지 않거나, 캐시를 만들 수 없거나(최소 토큰 수 미달, 모델 미지원,
+  할당량 초과), 캐시 호출이 실패하면 전체 프롬프트를 일반 호출로 보냅니다.
+- 캐시 수명: CONTEXT_CACHE_TTL초로 만들고 만료 CONTEXT_CACHE_REFRESH_MARGIN초 전부터 TTL을 연장합니다.
+  제공자가 캐시를 먼저 지운 경우(NotFound) 다음 호출에서 다시 만듭니다.
+  생성에 실패하면 CONTEXT_CACHE_RETRY_AFTER초 동안 일반 호출만 사용합니다.
+- Gemini 캐시는 display_name(모델+prefix 해시)으로 찾아 재사용하므로 여러 워커 프로세스가
+  같은 캐시를 공유합니다.
+
+Gemini 컨텍스트 캐시는 최소 입력 토큰 수가 있어(gemini-1.5 계열 32768) 기본 지시문(약 250토큰)만으로는
+캐시가 만들어지지 않고 일반 호출로 동작합니다. ANALYSIS_GUIDELINES_PATH에 평가 기준표·예시 답안 파일을
+지정하면 ANALYSIS_PREFIX 뒤에 붙으며, 최소 크기를 넘으면 그때부터 캐시가 사용됩니다.
+(최소 크기가 작은 모델을 쓰면 CONTEXT_CACHE_MIN_TOKENS를 그 모델의 값으로 낮춥니다.)
+캐시 호출 수와 캐시로 대신한 토큰 수는 consultlytics_context_cache_* 메트릭으로 기록됩니다.
+
+<설정 안내>
+- settings.py (또는 .env)
+    CONTEXT_CACHE_ENABLED        = False
+    CONTEXT_CACHE_TTL            = 3600    # 캐시 수명(초)
+    CONTEXT_CACHE_REFRESH_MARGIN = 300     # 만료 이 시간(초) 전부터 TTL 연장
+    CONTEXT_CACHE_MIN_TOKENS     = 32768   # 제공자 최소 캐시 크기(추정 토큰, 미만이면 캐시를 만들지 않음)
+    CONTEXT_CACHE_RETRY_AFTER    = 600     # 캐시 생성 실패 후 다시 시도하기까지(초)
+    ANALYSIS_GUIDELINES_PATH     = "prompts/guidelines.md"   # 지시문 뒤에 붙일 고정 내용
+  (Gemini 캐시는 "gemini-1.5-pro-002"처럼 버전이 붙은 모델명이 필요합니다: LLM_MODEL_PRO/LLM_MODEL_FAST)
+  (google.generativeai.caching을 쓰므로 google-generativeai 0.7 이상이 필요합니다.)
+
+<사용 예시>
+  llm = PrefixCachingLLM(base_llm, GeminiContextCacheProvider(), ANALYSIS_PREFIX, model="gemini-1.5-pro-002")
+  llm.invoke(build_prompt(row_json, scores)).content   # prefix는 캐시, 나머지만 전송
+
+  # 테스트·벤치마크: fake_llm.FakeContextCacheProvider
+"""
+
+import time
+import hashlib
+import logging
+import datetime
+import threading
+from typing import Any, Optional, Tuple
+
+from django.conf import settings
+
+from .llm_calls import model_name
+from .llm_providers import GEMINI, LLMProvider, LLMResponse, provider_name
+from .metrics import CONTEXT_CACHE_TOTAL, CONTEXT_CACHE_TOKENS, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class ContextCacheProvider:
+    """
+    제공자 측 컨텍스트 캐시 인터페이스
+      - create(model, prefix, ttl) → (handle, 남은 수명(초))
+      - extend(handle, ttl)        : 수명 연장
+      - generate(handle, suffix)   → 응답 텍스트
+      - is_missing(error)          : 캐시가 만료·삭제되어 난 오류인지
+    """
+
+    def create(self, model: str, prefix: str, ttl: float) -> Tuple[Any, float]:
+        raise NotImplementedError
+
+    def extend(self, handle: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def generate(self, handle: Any, suffix: str) -> str:
+        raise NotImplementedError
+
+    def is_missing(self, error: Exception) -> bool:
+        return False
+
+
+class GeminiContextCacheProvider(ContextCacheProvider):
+    """google.generativeai CachedContent 기반 캐시 (genai.configure가 끝난 뒤 사용)"""
+
+    def __init__(self, temperature: float = 0.2, timeout: Optional[float] = None):
+        self.temperature = temperature
+        self.timeout = timeout
+
+    @staticmethod
+    def display_name(model: str, prefix: str) -> str:
+        digest = hashlib.sha1(f"{model}\n{prefix}".encode("utf-8")).hexdigest()[:16]
+        return f"consultlytics-{digest}"
+
+    @staticmethod
+    def _remaining(cache: Any) -> float:
+        expire_time = cache.expire_time
+        if expire_time.tzinfo is None:
+            expire_time = expire_time.replace(tzinfo=datetime.timezone.utc)
+        return (expire_time - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+
+    def create(self, model: str, prefix: str, ttl: float) -> Tuple[Any, float]:
+        from google.generativeai import caching
+
+        name = self.display_name(model, prefix)
+        # 다른 워커 프로세스가 만든 캐시가 있으면 재사용
+        for cache in caching.CachedContent.list():
+            if cache.display_name == name and cache.model.endswith(model) and self._remaining(cache) > 0:
+                return cache, self._remaining(cache)
+
+        cache = caching.CachedContent.create(
+            model=model,
+            display_name=name,
+            contents=[prefix],
+            ttl=datetime.timedelta(seconds=ttl),
+        )
+        return cache, ttl
+
+    def extend(self, handle: Any, ttl: float) -> None:
+        handle.update(ttl=datetime.timedelta(seconds=ttl))
+
+    def generate(self, handle: Any, suffix: str) -> str:
+        import google.generativeai as genai
+
+        model = genai.GenerativeModel.from_cached_content(
+            cached_content=handle,
+            generation_config=genai.GenerationConfig(temperature=self.temperature),
+        )
+        request_options = {"timeout": self.timeout} if self.timeout else None
+        return model.generate_content(suffix, request_options=request_options).text
+
+    def is_missing(self, error: Exception) -> bool:
+        return type(error).__name__ in ("NotFound", "PermissionDenied")
+
+
+class PrefixCachingLLM(LLMProvider):
+    """고정 prefix를 컨텍스트 캐시로 보내고 실패하면 일반 호출로 되돌아가는 LLM 래퍼 (스레드 안전)"""
+
+    def __init__(self, llm: Any, provider: ContextCacheProvider, prefix: str,
+                 model: Optional[str] = None,
+                 ttl: float = 3600,
+                 refresh_margin: float = 300,
+                 min_tokens: int = 0,
+                 retry_after: float = 600):
+        self.llm = llm
+        self.provider = provider
+        self.prefix = prefix
+        self.model = model or model_name(llm)
+        self.ttl = ttl
+        self.refresh_margin = min(refresh_margin, ttl / 2)
+        self.retry_after = retry_after
+        self.prefix_tokens = estimate_tokens(prefix)
+
+        self._handle = None
+        self._expires_at = 0.0
+        self._disabled_until = 0.0
+        self._lock = threading.Lock()
+
+        self.enabled = self.prefix_tokens >= min_tokens
+        if not self.enabled:
+            logger.info(f"고정 프롬프트가 캐시 최소 크기보다 작아 일반 호출을 사용합니다. "
+                        f"({self.model}, {self.prefix_tokens} < {min_tokens} 토큰)")
+
+    def __getattr__(self, name: str) -> Any:
+        # 그 밖의 속성은 감싼 클라이언트의 것을 사용
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def _ensure(self) -> Optional[Any]:
+        """사용할 수 있는 캐시 핸들을 반환합니다. (만료 임박 시 연장, 없으면 생성, 실패 시 None)"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._disabled_until:
+                return None
+            if self._handle is not None and self._expires_at - now > self.refresh_margin:
+                return self._handle
+
+            if self._handle is not None and self._expires_at > now:
+                try:
+                    self.provider.extend(self._handle, self.ttl)
+                    self._expires_at = now + self.ttl
+                    CONTEXT_CACHE_TOTAL.inc(model=self.model, outcome="extended")
+                    return self._handle
+                except Exception as e:
+                    logger.warning(f"컨텍스트 캐시 수명 연장 실패, 다시 생성합니다 ({self.model}): {str(e)}")
+
+            try:
+                self._handle, remaining = self.provider.create(self.model, self.prefix, self.ttl)
+                self._expires_at = now + remaining
+                CONTEXT_CACHE_TOTAL.inc(model=self.model, outcome="created")
+                logger.info(f"컨텍스트 캐시 생성: {self.model}, {self.prefix_tokens} 토큰, {remaining:.0f}초")
+                return self._handle
+            except Exception as e:
+                self._handle = None
+                self._disabled_until = now + self.retry_after
+                CONTEXT_CACHE_TOTAL.inc(model=self.model, outcome="create_error")
+                logger.warning(f"컨텍스트 캐시 생성 실패, {self.retry_after:.0f}초 동안 일반 호출 사용 "
+                               f"({self.model}): {str(e)}")
+                return None
+
+    def _invalidate(self, handle: Any) -> None:
+        with self._lock:
+            if self._handle is handle:
+                self._handle = None
+                self._expires_at = 0.0
+
+    def invoke(self, prompt: Any) -> Any:
+        prompt = str(prompt)
+        if not self.enabled or not prompt.startswith(self.prefix):
+            return self.llm.invoke(prompt)
+
+        handle = self._ensure()
+        if handle is not None:
+            try:
+                content = self.provider.generate(handle, prompt[len(self.prefix):])
+                CONTEXT_CACHE_TOTAL.inc(model=self.model, outcome="hit")
+                CONTEXT_CACHE_TOKENS.inc(self.prefix_tokens, model=self.model)
+                return LLMResponse(content=content)
+            except Exception as e:
+                if self.provider.is_missing(e):
+                    self._invalidate(handle)
+                    CONTEXT_CACHE_TOTAL.inc(model=self.model, outcome="expired")
+                logger.warning(f"컨텍스트 캐시 호출 실패, 일반 호출로 재시도 ({self.model}): {str(e)}")
+
+        CONTEXT_CACHE_TOTAL.inc(model=self.model, outcome="fallback")
+        return self.llm.invoke(prompt)
+
+
+def with_context_cache(llm: Any, model: str, prefix: str, temperature: float = 0.2) -> Any:
+    """Gemini 제공자에서 CONTEXT_CACHE_ENABLED이면 llm을 PrefixCachingLLM으로 감싸고, 아니면 그대로 반환합니다."""
+    if not getattr(settings, "CONTEXT_CACHE_ENABLED", False) or provider_name() != GEMINI:
+        return llm
+    return PrefixCachingLLM(
+        llm,
+        GeminiContextCacheProvider(temperature=temperature, timeout=getattr(settings, "LLM_TIMEOUT", 0) or None),
+        prefix,
+        model=model,
+        ttl=getattr(settings, "CONTEXT_CACHE_TTL", 3600),
+        refresh_margin=getattr(settings, "CONTEXT_CACHE_REFRESH_MARGIN", 300),
+        min_tokens=getattr(settings, "CONTEXT_CACHE_MIN_TOKENS", 32768),
+        retry_after=getattr(settings, "CONTEXT_CACHE_RETRY_AFTER", 600),
+    )
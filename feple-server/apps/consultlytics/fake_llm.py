@@ -0,0 +1,193 @@
+"""
+apps/consultlytics/fake_llm.py
+
+Gemini 할당량을 쓰지 않고 분석 파이프라인의 처리량을 측정하기 위한 로컬 가짜 LLM입니다.
+services.llm 과 같은 invoke(prompt) → response.content 인터페이스를 제공하며,
+응답 지연 분포, 오류율, 응답 형태를 설정할 수 있습니다.
+
+같은 seed와 같은 프롬프트에 대해서는 항상 같은 지연·오류·응답을 돌려주므로
+스레드 실행 순서와 관계없이 커밋 간 결과를 비교할 수 있습니다.
+
+<사용 예시>
+  from apps.consultlytics import services
+  from apps.consultlytics.fake_llm import FakeLLM
+  services.llm = FakeLLM(latency_ms=800, latency_sigma=0.4, error_rate=0.02, seed=42)
+
+  # 컨텍스트 캐시 경로 (context_cache.PrefixCachingLLM)
+  fake = FakeLLM(latency_ms=800)
+  services.llm = PrefixCachingLLM(fake, FakeContextCacheProvider(fake), ANALYSIS_PREFIX)
+"""
+
+import math
+import time
+import random
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from .metrics import estimate_tokens
+
+# 응답 형태별 기본 가중치
+DEFAULT_SHAPES = {
+    "complete": 1.0,      # 5개 항목이 모두 있는 정상 응답
+    "missing_keys": 0.0,  # 일부 항목이 빠진 응답 (파서 기본값 처리 경로)
+    "unstructured": 0.0,  # 번호/항목명이 없는 자유 형식 응답
+    "verbose": 0.0,       # 항목별 설명이 긴 응답
+}
+
+
+class FakeLLMError(RuntimeError):
+    """가짜 LLM이 설정된 오류율에 따라 발생시키는 예외"""
+
+
+class FakeCacheNotFound(LookupError):
+    """만료·삭제된 가짜 컨텍스트 캐시를 사용할 때 발생하는 예외"""
+
+
+@dataclass
+class FakeLLMResponse:
+    """langchain 응답 객체와 같은 content 속성을 가진 응답"""
+    content: str
+
+
+class FakeLLM:
+    """
+    설정 가능한 지연·오류·응답 형태를 가진 결정적(deterministic) 가짜 LLM
+      - latency_ms     : 지연 중앙값 (밀리초)
+      - latency_sigma  : lognormal 분포의 sigma (0이면 고정 지연)
+      - distribution   : "lognormal" | "uniform" | "fixed"
+      - error_rate     : 호출 실패 비율 (0.0 ~ 1.0)
+      - shapes         : 응답 형태별 가중치 (DEFAULT_SHAPES 참고)
+      - seed           : 난수 시드
+    """
+
+    def __init__(self,
+                 latency_ms: float = 800.0,
+                 latency_sigma: float = 0.4,
+                 distribution: str = "lognormal",
+                 error_rate: float = 0.0,
+                 shapes: Optional[Dict[str, float]] = None,
+                 seed: int = 0):
+        if distribution not in ("lognormal", "uniform", "fixed"):
+            raise ValueError(f"지원하지 않는 지연 분포입니다: {distribution}")
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.shapes = {name: weight for name, weight in (shapes or DEFAULT_SHAPES).items() if weight > 0}
+        if not self.shapes or set(self.shapes) - set(DEFAULT_SHAPES):
+            raise ValueError(f"응답 형태 설정이 올바르지 않습니다: {shapes}")
+        self.seed = seed
+        self.model = "fake-llm"
+
+    def _rng(self, prompt: str) -> random.Random:
+        """프롬프트별로 고정된 난수 생성기를 반환합니다."""
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+        return random.Random(f"{self.seed}:{digest}")
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """설정된 분포에서 지연 시간(초)을 추출합니다."""
+        if self.distribution == "fixed" or self.latency_sigma <= 0:
+            latency_ms = self.latency_ms
+        elif self.distribution == "uniform":
+            spread = self.latency_ms * self.latency_sigma
+            latency_ms = rng.uniform(self.latency_ms - spread, self.latency_ms + spread)
+        else:
+            latency_ms = rng.lognormvariate(math.log(self.latency_ms), self.latency_sigma)
+        return max(0.0, latency_ms) / 1000
+
+    def respond(self, prompt: str, latency_scale: float = 1.0) -> str:
+        """지연(× latency_scale) 후 설정된 형태의 응답 텍스트를 반환하거나 FakeLLMError를 발생시킵니다."""
+        rng = self._rng(prompt)
+        time.sleep(self.sample_latency(rng) * latency_scale)
+
+        if rng.random() < self.error_rate:
+            raise FakeLLMError("가짜 LLM 호출 실패 (설정된 오류율)")
+
+        shape = rng.choices(list(self.shapes), weights=list(self.shapes.values()))[0]
+        return render_response(shape, rng)
+
+    def invoke(self, prompt: str) -> FakeLLMResponse:
+        """지연 후 설정된 형태의 응답을 반환하거나 FakeLLMError를 발생시킵니다."""
+        return FakeLLMResponse(content=self.respond(str(prompt)))
+
+
+def render_response(shape: str, rng: random.Random) -> str:
+    """응답 형태에 맞는 분석 결과 텍스트를 생성합니다."""
+    score = rng.randint(50, 100)
+    lines = [
+        f"1. 평가점수: {score}",
+        "2. 상담자 강점: 고객의 요청을 정확히 파악하고 친절하게 안내했습니다.",
+        "3. 상담자 단점: 일부 절차 설명이 빠르게 진행되어 고객이 재질문했습니다.",
+        "4. 개선점: 핵심 절차를 단계별로 요약해 확인 멘트와 함께 안내하면 좋겠습니다.",
+        "5. 코칭 멘트: 지금처럼 친절함을 유지하면서 설명 속도를 조금만 늦춰보세요.",
+    ]
+
+    if shape == "missing_keys":
+        return "\n".join(lines[:rng.randint(1, 4)])
+    if shape == "unstructured":
+        return "전반적으로 무난한 상담이었으며 고객 응대 태도가 좋았습니다. 설명을 조금 더 천천히 하면 좋겠습니다."
+    if shape == "verbose":
+        filler = " 구체적으로는 상담 초반의 본인 확인, 요청 파악, 대안 제시 과정에서 이러한 특징이 반복적으로 나타났습니다." * 5
+        return "\n".join(line + filler if index else line for index, line in enumerate(lines))
+    return "\n".join(lines)
+
+
+@dataclass
+class FakeCachedContent:
+    name: str
+    model: str
+    prefix: str
+
+
+class FakeContextCacheProvider:
+    """
+    context_cache.ContextCacheProvider와 같은 인터페이스의 메모리 내 가짜 캐시
+      - llm           : 응답을 만들 FakeLLM (prefix + suffix 전체 프롬프트로 호출하므로 일반 호출과 같은 응답)
+      - min_tokens    : 이보다 짧은 prefix는 생성 실패 (제공자 최소 캐시 크기 흉내)
+      - prefix_discount: 캐시 호출 지연 배율 (prefix 처리 시간 절감 흉내, 1.0이면 일반 호출과 같음)
+    evict()로 제공자 측 만료를, fail_create로 생성 실패를 흉내냅니다.
+    """
+
+    def __init__(self, llm: FakeLLM, min_tokens: int = 0, prefix_discount: float = 1.0, fail_create: bool = False):
+        self.llm = llm
+        self.min_tokens = min_tokens
+        self.prefix_discount = prefix_discount
+        self.fail_create = fail_create
+        self.caches: Dict[str, FakeCachedContent] = {}
+        self.created = 0
+        self.extended = 0
+        self.generated = 0
+        self._lock = threading.Lock()
+
+    def create(self, model: str, prefix: str, ttl: float):
+        if self.fail_create or estimate_tokens(prefix) < self.min_tokens:
+            raise FakeLLMError("가짜 컨텍스트 캐시 생성 실패")
+        with self._lock:
+            self.created += 1
+            cache = FakeCachedContent(name=f"cachedContents/fake-{self.created}", model=model, prefix=prefix)
+            self.caches[cache.name] = cache
+        return cache, ttl
+
+    def extend(self, handle: FakeCachedContent, ttl: float) -> None:
+        with self._lock:
+            if handle.name not in self.caches:
+                raise FakeCacheNotFound(handle.name)
+            self.extended += 1
+
+    def evict(self) -> None:
+        """모든 캐시를 지웁니다. (제공자 측 만료 흉내)"""
+        with self._lock:
+            self.caches.clear()
+
+    def generate(self, handle: FakeCachedContent, suffix: str) -> str:
+        with self._lock:
+            if handle.name not in self.caches:
+                raise FakeCacheNotFound(handle.name)
+            self.generated += 1
+        # 전체 프롬프트 기준으로 응답을 정하므로 일반 호출과 같은 결과
+        return self.llm.respond(handle.prefix + suffix, latency_scale=self.prefix_discount)
+
+    def is_missing(self, error: Exception) -> bool:
+        return isinstance(error, FakeCacheNotFound)
@@ -0,0 +1,63 @@
+"""
+apps/consultlytics/features.py
+
+음성 특성 벡터(크로마·스펙트럴 대비·Tonnetz·MFCC)를 숫자 리스트로 디코딩합니다. (Django 비의존)
+특성은 JSONField에 저장되지만 행에 따라 리스트, JSON 문자열, 프레임별 2차원 리스트가 섞여 있으므로
+열 형식 내보내기(columnar_export.py)와 유사 통화 검색(similarity.py)이 같은 규칙으로 고정 길이 벡터를 만듭니다.
+
+- 1차원 리스트: 길이가 차원 수와 같으면 그대로 사용
+- 2차원 리스트(프레임 × 차원): 프레임 평균으로 요약
+- 차원 수가 맞지 않거나 숫자가 아닌 값이 있으면 None
+
+<사용 예시>
+  decode_feature('[0.1, 0.2, ...]', FEATURE_DIMS["MFCC_0_13"])   # [0.1, 0.2, ...] (14개)
+  decode_feature([[...12개], [...12개]], 12)                     # 프레임 평균 12개
+"""
+
+import json
+import math
+from typing import Any, Dict, List, Optional
+
+# Consulting 필드 이름 → 차원 수
+FEATURE_DIMS: Dict[str, int] = {
+    "Chroma_stft": 12,
+    "SpectralContrast": 7,
+    "Tonnetz": 6,
+    "MFCC_0_13": 14,
+}
+
+# callytics.File 필드 이름 → Consulting 필드 이름
+FILE_FEATURE_FIELDS: Dict[str, str] = {
+    "chroma_stft": "Chroma_stft",
+    "spec_contr": "SpectralContrast",
+    "tonnetz": "Tonnetz",
+    "mfcc": "MFCC_0_13",
+}
+
+
+def _numbers(values: List[Any]) -> Optional[List[float]]:
+    try:
+        numbers = [float(v) for v in values]
+    except (TypeError, ValueError):
+        return None
+    return numbers if all(math.isfinite(v) for v in numbers) else None
+
+
+def decode_feature(value: Any, dim: int) -> Optional[List[float]]:
+    """JSONField 값(리스트·JSON 문자열·프레임별 2차원 리스트)을 길이 dim의 실수 리스트로 변환합니다."""
+    if isinstance(value, (str, bytes)):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    if not isinstance(value, (list, tuple)) or not value:
+        return None
+
+    if all(isinstance(frame, (list, tuple)) for frame in value):
+        frames = [_numbers(frame) for frame in value]
+        if any(frame is None or len(frame) != dim for frame in frames):
+            return None
+        return [sum(column) / len(frames) for column in zip(*frames)]
+
+    numbers = _numbers(value)
+    return numbers if numbers is not None and len(numbers) == dim else None
@@ -0,0 +1,244 @@
+"""
+apps/consultlytics/llm_calls.py
+
+LLM 호출에 호출별 마감 시간(deadline)과 헤지(hedged) 요청을 적용합니다.
+
+- deadline: 호출이 LLM_TIMEOUT초 안에 끝나지 않으면 LLMDeadlineExceeded를 발생시키고
+  호출한 워커를 바로 돌려줍니다. 남은 HTTP 요청은 클라이언트 timeout(같은 값)으로 끊깁니다.
+- hedge   : 호출이 모델별로 관측한 지연 p95(LLM_HEDGE_QUANTILE)를 넘기면 같은 프롬프트로
+  한 번 더 요청하고 먼저 도착한 응답을 사용합니다. 헤지 요청 수는 전체 호출 수의
+  LLM_HEDGE_BUDGET 비율(추가 비용 상한)을 넘지 않으며, 관측 표본이 적으면 보내지 않습니다.
+
+마감 시간과 지연 측정은 호출이 스레드 풀에서 실제로 시작된 시점부터 셉니다.
+풀 크기는 LLM_CALL_THREADS와 LLM_CONCURRENCY의 2배(호출마다 헤지 1건 여유) 중 큰 값이며,
+마감 후 버려진 호출도 HTTP timeout까지 스레드를 잡고 있으므로 동시 호출 수보다 넉넉해야 합니다.
+
+모델별 호출 지연은 consultlytics_llm_call_seconds 히스토그램과
+consultlytics_llm_latency_seconds(p50/p95/p99) 게이지로 기록됩니다.
+
+<설정 안내>
+- settings.py (또는 .env)
+    LLM_TIMEOUT           = 60      # 호출별 마감 시간(초, 0이면 무제한)
+    LLM_HEDGE_ENABLED     = False   # 헤지 요청 사용 여부
+    LLM_HEDGE_QUANTILE    = 0.95    # 이 분위수 지연을 넘기면 헤지 요청
+    LLM_HEDGE_BUDGET      = 0.05    # 헤지 요청 수 상한 (전체 호출 대비 비율)
+    LLM_HEDGE_MIN_SAMPLES = 20      # 헤지 기준 지연을 계산하기 위한 최소 표본 수
+    LLM_CONCURRENCY       = 16      # 프로세스 안에서 동시에 invoke_llm을 부르는 최대 수
+    LLM_CALL_THREADS      = 0       # 호출 스레드 풀 크기 (LLM_CONCURRENCY x 2보다 작으면 그 값 사용)
+
+<사용 예시>
+  response = invoke_llm(llm, prompt)              # settings 값 사용
+  response = invoke_llm(llm, prompt, timeout=30, hedge=False)
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from django.conf import settings
+
+from .metrics import LLM_CALL_SECONDS, LLM_LATENCY_QUANTILE, LLM_HEDGE_TOTAL, LLM_DEADLINE_EXCEEDED_TOTAL
+
+logger = logging.getLogger(__name__)
+
+TRACKED_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """LLM 호출이 마감 시간 안에 끝나지 않음"""
+
+
+def model_name(llm: Any) -> str:
+    return str(getattr(llm, "model", None) or getattr(llm, "model_name", None) or type(llm).__name__)
+
+
+class LatencyTracker:
+    """모델별 최근 호출 지연을 고정 크기 창으로 보관하고 분위수를 계산합니다. (스레드 안전)"""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def count(self, model: str) -> int:
+        with self._lock:
+            return len(self._samples.get(model, ()))
+
+    def quantile(self, model: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class HedgeBudget:
+    """헤지 요청 수가 전체 호출 수의 일정 비율을 넘지 않도록 제한합니다."""
+
+    def __init__(self):
+        self.calls = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def record_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def try_spend(self, ratio: float) -> bool:
+        with self._lock:
+            if self.hedges + 1 > ratio * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_tracker = LatencyTracker()
+_budget = HedgeBudget()
+
+
+def call_pool_size() -> int:
+    """호출 스레드 풀 크기 (동시 호출 수의 2배 이상)"""
+    concurrency = max(1, int(getattr(settings, "LLM_CONCURRENCY", 16)))
+    return max(int(getattr(settings, "LLM_CALL_THREADS", 0) or 0), concurrency * 2)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=call_pool_size(), thread_name_prefix="llm-call")
+        return _executor
+
+
+class _CallStart:
+    """호출이 스레드 풀에서 실제로 시작된 시점 (time.monotonic)"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.at: Optional[float] = None
+
+    def mark(self) -> None:
+        self.at = time.monotonic()
+        self.event.set()
+
+
+def _submit(llm: Any, prompt: Any, model: str, kind: str):
+    """호출을 스레드 풀에 넣습니다. 반환한 future의 start는 호출이 실제로 시작될 때 기록됩니다."""
+    start = _CallStart()
+
+    def call():
+        started = time.perf_counter()
+        start.mark()
+        try:
+            return llm.invoke(prompt)
+        finally:
+            # 마감 후 버려진 호출도 끝나는 시점에 기록하여 실제 꼬리 지연을 반영
+            elapsed = time.perf_counter() - started
+            LLM_CALL_SECONDS.observe(elapsed, model=model, kind=kind)
+            _tracker.observe(model, elapsed)
+            for q in TRACKED_QUANTILES:
+                LLM_LATENCY_QUANTILE.set(_tracker.quantile(model, q), model=model, quantile=str(q))
+
+    future = _get_executor().submit(call)
+    future.start = start
+    return future
+
+
+def _hedge_delay(model: str) -> Optional[float]:
+    if _tracker.count(model) < getattr(settings, "LLM_HEDGE_MIN_SAMPLES", 20):
+        return None
+    return _tracker.quantile(model, getattr(settings, "LLM_HEDGE_QUANTILE", 0.95))
+
+
+def invoke_llm(llm: Any, prompt: Any,
+               timeout: Optional[float] = None,
+               hedge: Optional[bool] = None,
+               admit_hedge: Optional[Callable[[], bool]] = None) -> Any:
+    """
+    마감 시간과 헤지 요청을 적용하여 llm.invoke(prompt)를 호출합니다.
+
+    Args:
+        llm: invoke(prompt)를 가진 LLM 클라이언트
+        prompt: 프롬프트
+        timeout: 마감 시간(초, 기본값: LLM_TIMEOUT, 0이면 무제한)
+        hedge: 헤지 요청 사용 여부 (기본값: LLM_HEDGE_ENABLED)
+        admit_hedge: 헤지 요청 직전에 호출 한도를 확인하는 함수 (False면 헤지하지 않음)
+
+    Returns:
+        먼저 성공한 호출의 응답
+
+    Raises:
+        LLMDeadlineExceeded: 마감 시간 초과
+        Exception: 모든 호출이 실패한 경우 마지막 오류
+    """
+    if timeout is None:
+        timeout = getattr(settings, "LLM_TIMEOUT", 0)
+    if hedge is None:
+        hedge = getattr(settings, "LLM_HEDGE_ENABLED", False)
+
+    model = model_name(llm)
+    hedge_delay = _hedge_delay(model) if hedge else None
+
+    _budget.record_call()
+    primary = _submit(llm, prompt, model, "primary")
+    pending = {primary}
+    hedged = None
+    error = None
+
+    # 풀 대기열에서 기다린 시간은 마감 시간에 넣지 않음
+    primary.start.event.wait()
+    deadline = primary.start.at + timeout if timeout else None
+    hedge_at = primary.start.at + hedge_delay if hedge_delay is not None else None
+
+    while pending:
+        now = time.monotonic()
+        remaining = None if deadline is None else deadline - now
+        if remaining is not None and remaining <= 0:
+            break
+
+        wait_for = remaining
+        if hedge_at is not None and hedged is None:
+            # 헤지 시점까지만 기다린 뒤 아직 응답이 없으면 중복 요청
+            until_hedge = max(0.0, hedge_at - now)
+            wait_for = until_hedge if wait_for is None else min(wait_for, until_hedge)
+
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                response = future.result()
+            except Exception as e:
+                error = e
+                continue
+            if future is hedged:
+                LLM_HEDGE_TOTAL.inc(model=model, outcome="won")
+            for other in pending:
+                other.cancel()
+            return response
+
+        if not done and hedge_at is not None and hedged is None and time.monotonic() >= hedge_at:
+            hedge_at = None
+            if not _budget.try_spend(getattr(settings, "LLM_HEDGE_BUDGET", 0.05)):
+                LLM_HEDGE_TOTAL.inc(model=model, outcome="over_budget")
+            elif admit_hedge is not None and not admit_hedge():
+                LLM_HEDGE_TOTAL.inc(model=model, outcome="not_admitted")
+            else:
+                hedged = _submit(llm, prompt, model, "hedge")
+                pending.add(hedged)
+                LLM_HEDGE_TOTAL.inc(model=model, outcome="sent")
+
+    if pending:
+        for future in pending:
+            future.cancel()
+        LLM_DEADLINE_EXCEEDED_TOTAL.inc(model=model)
+        logger.warning(f"LLM 호출 마감 시간 초과 ({model}, {timeout}초)")
+        raise LLMDeadlineExceeded(f"LLM 호출이 마감 시간({timeout}초)을 넘겼습니다.")
+    raise error
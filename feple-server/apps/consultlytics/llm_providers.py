@@ -0,0 +1,380 @@
+"""
+apps/consultlytics/llm_providers.py
+
+LLM 제공자(provider) 공통 인터페이스와 구현입니다.
+분석 서비스(services.py)와 대시보드 상세 분석 뷰(views.analyze_consulting)가 같은 클라이언트를 사용하도록
+모델별로 클라이언트를 하나만 만들어 재사용합니다. (요청마다 genai.configure를 호출하지 않음)
+
+- gemini : langchain ChatGoogleGenerativeAI (GOOGLE_API_KEY, 예전 GEMINI_API_KEY도 허용)
+- offline: 네트워크 없이 동작하는 결정적 로컬 백엔드 (재생 모드)
+           LLM_OFFLINE_RESPONSES 파일(JSONL, .gz 가능, glob 패턴·쉼표 목록 가능)에 기록된 응답을
+           프롬프트 해시로 찾아 돌려주고, 기록에 없는 프롬프트는 프롬프트별로 고정된 합성 응답을 만듭니다.
+           (LLM_OFFLINE_STRICT이면 KeyError)
+           LLM_OFFLINE_LATENCY_SCALE이 0이면 지연 없이, 1이면 기록된 지연 그대로, 그 밖의 값이면 배율을
+           곱해 응답합니다. 기록에 없는 프롬프트의 지연은 기록된 지연 분포에서 프롬프트별로 고정 추출하며,
+           같은 프롬프트의 기록이 여러 개면(오류 후 재시도 등) 기록 순서대로 재생합니다.
+
+기록 모드: LLM_RECORD_PATH를 설정하면 분석 서비스·뷰의 모든 LLM 호출(프롬프트 해시, 응답, 지연, 오류)을
+JSONL 파일에 추가합니다. 경로에 {pid}를 넣으면 프로세스별 파일로 나뉘며(.gz면 gzip 압축),
+프롬프트 원문은 상담 내용이 담겨 있으므로 LLM_RECORD_PROMPTS=True일 때만 저장합니다.
+.gz 파일은 LLM_RECORD_FLUSH_EVERY건마다 압축 스트림을 Z_SYNC_FLUSH로 비우므로, 프로세스가 종료 처리 없이
+끝나도(워커 강제 종료 등) 그 시점까지의 기록은 읽을 수 있습니다. (끝이 잘린 파일도 재생 시 읽은 데까지 사용)
+운영에서 기록한 파일을 LLM_OFFLINE_RESPONSES로 지정하면 실제 응답 형태·지연 분포로 부하 테스트를
+비용 없이 재현할 수 있습니다.
+
+모든 제공자는 다음 메서드를 가집니다.
+  invoke(prompt)                  → 응답(.content)
+  await ainvoke(prompt)           → 응답(.content)
+  batch(prompts, max_concurrency) → 응답 목록 (실패한 항목은 예외 객체)
+  stream(prompt)                  → 응답 텍스트 조각 이터레이터
+
+<설정 안내>
+- settings.py (또는 .env)
+    LLM_PROVIDER          = "gemini"   # gemini | offline
+    LLM_OFFLINE_RESPONSES = ""         # offline 백엔드가 사용할 기록 응답 파일 (비우면 합성 응답만)
+    LLM_OFFLINE_STRICT    = False      # 기록에 없는 프롬프트를 오류로 처리
+    LLM_OFFLINE_LATENCY_SCALE = 0      # 재생 지연 배율 (0: 지연 없음, 1: 기록된 지연 그대로)
+    LLM_RECORD_PATH       = ""         # 기록 파일 (예: "recordings/llm-{pid}.jsonl.gz", 비우면 기록 안 함)
+    LLM_RECORD_PROMPTS    = False      # 프롬프트 원문도 기록
+    LLM_RECORD_FLUSH_EVERY = 50        # .gz 기록 파일을 이 건수마다 디스크에 반영 (일반 JSONL은 건마다)
+
+<사용 예시>
+  provider = get_provider("gemini-1.5-pro")
+  provider.invoke(prompt).content
+  provider.batch([prompt1, prompt2], max_concurrency=4)
+  for chunk in provider.stream(prompt):
+      print(chunk, end="")
+
+  # 기록 후 재생
+  LLM_RECORD_PATH=recordings/llm-{pid}.jsonl.gz python run_analysis.py
+  LLM_PROVIDER=offline LLM_OFFLINE_RESPONSES="recordings/*.jsonl.gz" LLM_OFFLINE_LATENCY_SCALE=1 python run_analysis.py
+"""
+
+import os
+import glob
+import atexit
+import gzip
+import json
+import zlib
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.conf import settings
+
+from .fake_llm import render_response
+from .metrics import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+GEMINI = "gemini"
+OFFLINE = "offline"
+
+
+class ReplayedLLMError(RuntimeError):
+    """기록 당시 실패했던 호출을 재생할 때 발생하는 예외"""
+
+
+@dataclass
+class LLMResponse:
+    """langchain 응답 객체와 같은 content 속성을 가진 응답"""
+    content: str
+
+
+def prompt_key(prompt: Any) -> str:
+    """기록 응답을 찾을 때 쓰는 프롬프트 해시"""
+    return hashlib.sha1(str(prompt).encode("utf-8")).hexdigest()
+
+
+def open_records(path: str, mode: str = "rt"):
+    """JSONL 기록 파일을 엽니다. (.gz이면 gzip 압축)"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def record_paths(pattern: str) -> List[str]:
+    """쉼표로 구분한 경로·glob 패턴을 기록 파일 목록으로 변환합니다."""
+    paths = []
+    for item in (pattern or "").split(","):
+        item = item.strip()
+        if item:
+            paths.extend(sorted(glob.glob(item)) or [item])
+    return paths
+
+
+class LLMProvider:
+    """
+    LLM 제공자 기본 클래스
+    invoke만 구현하면 ainvoke·batch·stream은 invoke를 사용하는 기본 구현이 제공됩니다.
+    """
+
+    model = "unknown"
+
+    def invoke(self, prompt: Any) -> Any:
+        raise NotImplementedError
+
+    async def ainvoke(self, prompt: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, self.invoke, prompt)
+
+    def batch(self, prompts: List[Any], max_concurrency: int = 4) -> List[Any]:
+        def call(prompt):
+            try:
+                return self.invoke(prompt)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(prompts) or 1))) as executor:
+            return list(executor.map(call, prompts))
+
+    def stream(self, prompt: Any) -> Iterator[str]:
+        yield self.invoke(prompt).content
+
+
+class GeminiProvider(LLMProvider):
+    """ChatGoogleGenerativeAI 기반 Gemini 제공자 (모델별 클라이언트 1개, HTTP 연결 재사용)"""
+
+    def __init__(self, model: str, api_key: str, temperature: float = 0.2, timeout: Optional[float] = None):
+        import google.generativeai as genai
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        # 컨텍스트 캐시(context_cache.py)가 쓰는 genai 전역 설정도 함께 초기화
+        genai.configure(api_key=api_key)
+        self.model = model
+        self.client = ChatGoogleGenerativeAI(
+            model=model,
+            temperature=temperature,
+            google_api_key=api_key,
+            convert_system_message_to_human=True,
+            timeout=timeout  # 마감 후 남은 HTTP 요청도 끊기도록
+        )
+
+    def invoke(self, prompt: Any) -> Any:
+        return self.client.invoke(prompt)
+
+    async def ainvoke(self, prompt: Any) -> Any:
+        return await self.client.ainvoke(prompt)
+
+    def batch(self, prompts: List[Any], max_concurrency: int = 4) -> List[Any]:
+        return self.client.batch(prompts, config={"max_concurrency": max_concurrency}, return_exceptions=True)
+
+    def stream(self, prompt: Any) -> Iterator[str]:
+        for chunk in self.client.stream(prompt):
+            yield chunk.content
+
+
+class OfflineProvider(LLMProvider):
+    """기록된 응답 또는 프롬프트별 합성 응답을 돌려주는 로컬 제공자 (네트워크 사용 안 함)"""
+
+    def __init__(self, responses_path: Optional[str] = None, model: str = OFFLINE, strict: bool = False,
+                 latency_scale: float = 0.0):
+        self.model = model
+        self.strict = strict
+        self.latency_scale = latency_scale
+        self.records = self.load(responses_path) if responses_path else {}
+        # 기록에 없는 프롬프트의 지연을 뽑을 기록 지연 분포
+        self.latencies = sorted(r["seconds"] for rs in self.records.values() for r in rs if "seconds" in r)
+        self.recorded = 0
+        self.synthetic = 0
+        self._cursor: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load(pattern: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        JSONL 기록 파일({"key": 프롬프트 해시, "content": 응답, "seconds": 지연, "error": 오류, ...})을
+        프롬프트 해시별 기록 목록(기록 순서)으로 읽습니다.
+        """
+        records = defaultdict(list)
+        count = 0
+        for path in record_paths(pattern):
+            with open_records(path) as f:
+                try:
+                    for line in f:
+                        if line.strip():
+                            record = json.loads(line)
+                            records[record["key"]].append(record)
+                            count += 1
+                except (EOFError, json.JSONDecodeError) as e:
+                    # 기록 중 강제 종료된 파일: 마지막으로 반영된 줄까지만 사용
+                    logger.warning(f"LLM 호출 기록 파일 끝이 잘려 읽은 데까지 사용합니다 ({path}): {str(e)}")
+        logger.info(f"오프라인 LLM 기록 {count}건 로드 (프롬프트 {len(records)}개): {pattern}")
+        return dict(records)
+
+    def _next_record(self, key: str) -> Optional[Dict[str, Any]]:
+        records = self.records.get(key)
+        with self._lock:
+            if records:
+                # 같은 프롬프트를 여러 번 호출하면 기록 순서대로 재생하고, 다 쓰면 마지막 성공 기록을 반복
+                index = self._cursor[key]
+                self._cursor[key] += 1
+                self.recorded += 1
+                if index < len(records):
+                    return records[index]
+                return next((r for r in reversed(records) if not r.get("error")), records[-1])
+            if self.strict:
+                raise KeyError(f"기록되지 않은 프롬프트입니다: {key}")
+            self.synthetic += 1
+            return None
+
+    def _latency(self, key: str, record: Optional[Dict[str, Any]]) -> float:
+        if not self.latency_scale:
+            return 0.0
+        if record is not None and "seconds" in record:
+            return record["seconds"] * self.latency_scale
+        if self.latencies:
+            return random.Random(key).choice(self.latencies) * self.latency_scale
+        return 0.0
+
+    def invoke(self, prompt: Any) -> LLMResponse:
+        key = prompt_key(prompt)
+        record = self._next_record(key)
+        delay = self._latency(key, record)
+        if delay > 0:
+            time.sleep(delay)
+
+        if record is None:
+            return LLMResponse(content=render_response("complete", random.Random(key)))
+        if record.get("error"):
+            raise ReplayedLLMError(f"기록된 LLM 호출 실패 재생: {record['error']}")
+        return LLMResponse(content=record["content"])
+
+    async def ainvoke(self, prompt: Any) -> LLMResponse:
+        if self.latency_scale:
+            return await super().ainvoke(prompt)
+        return self.invoke(prompt)
+
+
+class RecordWriter:
+    """LLM 호출 기록을 JSONL 파일에 한 줄씩 추가합니다. (스레드 안전, 경로별 1개)"""
+
+    def __init__(self, path: str, flush_every: int = 50):
+        self.path = path.replace("{pid}", str(os.getpid()))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open_records(self.path, "at")
+        # gzip은 줄마다 flush하면 압축률이 떨어지므로 flush_every건마다 압축 스트림을 비움
+        # (atexit가 실행되지 않고 끝나도 마지막 flush까지의 기록은 읽을 수 있음)
+        self._compressed = self.path.endswith(".gz")
+        self.flush_every = max(1, flush_every)
+        self._pending = 0
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+        logger.info(f"LLM 호출 기록 시작: {self.path}")
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._pending += 1
+            if not self._compressed or self._pending >= self.flush_every:
+                self._flush()
+
+    def _flush(self) -> None:
+        self._file.flush()
+        if self._compressed:
+            # 지금까지의 압축 데이터를 블록 경계까지 내보냄 (gzip 스트림은 닫지 않음)
+            self._file.buffer.flush(zlib.Z_SYNC_FLUSH)
+        self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class RecordingProvider(LLMProvider):
+    """감싼 제공자의 호출마다 프롬프트 해시·응답·지연·오류를 기록하는 제공자"""
+
+    def __init__(self, provider: Any, writer: RecordWriter, record_prompts: bool = False):
+        self.provider = provider
+        self.writer = writer
+        self.record_prompts = record_prompts
+        self.model = getattr(provider, "model", "unknown")
+
+    def invoke(self, prompt: Any) -> Any:
+        record = {"key": prompt_key(prompt), "model": self.model, "prompt_tokens": estimate_tokens(str(prompt))}
+        if self.record_prompts:
+            record["prompt"] = str(prompt)
+
+        started = time.perf_counter()
+        try:
+            response = self.provider.invoke(prompt)
+        except Exception as e:
+            record.update(seconds=round(time.perf_counter() - started, 4), error=f"{type(e).__name__}: {e}")
+            self._write(record)
+            raise
+        record.update(seconds=round(time.perf_counter() - started, 4), content=response.content)
+        self._write(record)
+        return response
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        # 기록 실패가 분석을 막지 않도록 경고만 남김
+        try:
+            self.writer.write(record)
+        except Exception as e:
+            logger.warning(f"LLM 호출 기록 실패 ({self.writer.path}): {str(e)}")
+
+
+def google_api_key() -> Optional[str]:
+    """Gemini API 키 (GOOGLE_API_KEY, 없으면 예전 이름 GEMINI_API_KEY)"""
+    return os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
+
+
+def provider_name() -> str:
+    return getattr(settings, "LLM_PROVIDER", GEMINI)
+
+
+_providers: Dict[Any, LLMProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(model: str) -> LLMProvider:
+    """LLM_PROVIDER 설정에 맞는 model 제공자를 반환합니다. (모델별 1개, 스레드 안전)"""
+    name = provider_name()
+    with _providers_lock:
+        provider = _providers.get((name, model))
+        if provider is not None:
+            return provider
+
+        if name == GEMINI:
+            provider = GeminiProvider(
+                model,
+                api_key=google_api_key(),
+                timeout=getattr(settings, "LLM_TIMEOUT", 0) or None,
+            )
+        elif name == OFFLINE:
+            provider = OfflineProvider(
+                getattr(settings, "LLM_OFFLINE_RESPONSES", "") or None,
+                model=f"{OFFLINE}:{model}",
+                strict=getattr(settings, "LLM_OFFLINE_STRICT", False),
+                latency_scale=getattr(settings, "LLM_OFFLINE_LATENCY_SCALE", 0.0),
+            )
+        else:
+            raise ValueError(f"지원하지 않는 LLM 제공자입니다: {name}")
+
+        _providers[(name, model)] = provider
+        return provider
+
+
+_writers: Dict[str, RecordWriter] = {}
+
+
+def with_recording(llm: Any) -> Any:
+    """LLM_RECORD_PATH가 설정되어 있으면 llm을 RecordingProvider로 감싸고, 아니면 그대로 반환합니다."""
+    path = getattr(settings, "LLM_RECORD_PATH", "")
+    if not path:
+        return llm
+    with _providers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = _writers[path] = RecordWriter(path, flush_every=getattr(settings, "LLM_RECORD_FLUSH_EVERY", 50))
+    return RecordingProvider(llm, writer, record_prompts=getattr(settings, "LLM_RECORD_PROMPTS", False))
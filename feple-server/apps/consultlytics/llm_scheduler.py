@@ -0,0 +1,212 @@
+"""
+apps/consultlytics/llm_scheduler.py
+
+LLM 호출 앞단의 우선순위 스케줄러입니다.
+대시보드 요청(interactive)과 재분석(reanalysis), 야간 배치(backfill)가 같은 Gemini 할당량을
+나눠 쓰므로, 호출마다 우선순위 클래스를 지정하고 다음 두 가지로 순서를 정합니다.
+
+- 프로세스 안: 클래스별 대기열을 두고 가중치 비율로 토큰을 배분합니다. (stride 스케줄링)
+  interactive=8, reanalysis=3, backfill=1이면 세 클래스가 모두 대기 중일 때 8:3:1로 호출하며,
+  낮은 클래스도 굶지 않습니다. 대기열이 비어 있던 클래스는 현재 순번에서 바로 시작합니다.
+- 프로세스 사이: rate_limit.py의 공유 토큰 버킷에서 클래스별로 남겨둘 토큰 수(reserve)를 달리합니다.
+  배치 프로세스는 버킷에 reserve개가 남을 때까지만 가져가므로, 배치가 한도를 꽉 채워도
+  웹 프로세스의 interactive 요청은 남겨둔 토큰으로 바로 호출됩니다.
+  같은 프로세스 안에서도 차례인 클래스가 reserve 때문에만 막혀 있으면(토큰 획득 실패),
+  reserve가 더 작은 다음 클래스가 남겨둔 토큰으로 먼저 호출합니다.
+
+호출 한도(ANALYSIS_RATE_LIMIT_PER_MIN)가 0이면 대기 없이 통과하며 대기열 메트릭만 기록합니다.
+
+<설정 안내>
+- settings.py (또는 .env)
+    LLM_PRIORITY_WEIGHTS    = "interactive=8,reanalysis=3,backfill=1"
+    LLM_PRIORITY_RESERVE    = "interactive=0,reanalysis=1,backfill=2"   # 클래스별로 남겨둘 토큰 수
+    LLM_INTERACTIVE_TIMEOUT = 30    # interactive 요청의 최대 대기 시간(초, 0이면 무제한)
+
+<사용 예시>
+  scheduler = get_llm_scheduler()
+  if scheduler.acquire(BACKFILL):
+      response = llm.invoke(prompt)
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from .metrics import LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT_SECONDS, LLM_SCHEDULED_TOTAL
+from .rate_limit import TokenBucket, get_analysis_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+REANALYSIS = "reanalysis"
+BACKFILL = "backfill"
+PRIORITY_CLASSES = (INTERACTIVE, REANALYSIS, BACKFILL)
+
+DEFAULT_WEIGHTS = {INTERACTIVE: 8, REANALYSIS: 3, BACKFILL: 1}
+DEFAULT_RESERVE = {INTERACTIVE: 0, REANALYSIS: 1, BACKFILL: 2}
+
+
+def parse_class_map(value: str, default: Dict[str, float]) -> Dict[str, float]:
+    """"interactive=8,backfill=1" 형식 설정을 클래스별 값으로 변환합니다. (빠진 클래스는 기본값)"""
+    result = dict(default)
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        name, _, number = item.partition("=")
+        name = name.strip()
+        if name not in PRIORITY_CLASSES:
+            raise ValueError(f"알 수 없는 우선순위 클래스입니다: {name}")
+        result[name] = float(number)
+    return result
+
+
+class LLMScheduler:
+    """우선순위 클래스별 가중치 공정 배분 스케줄러 (스레드 안전)"""
+
+    def __init__(self, limiter: Optional[TokenBucket] = None,
+                 weights: Optional[Dict[str, float]] = None,
+                 reserve: Optional[Dict[str, float]] = None):
+        self.limiter = limiter
+        self.weights = weights or dict(DEFAULT_WEIGHTS)
+        self.reserve = reserve or dict(DEFAULT_RESERVE)
+        for cls in PRIORITY_CLASSES:
+            if self.weights.get(cls, 0) <= 0:
+                raise ValueError(f"{cls} 클래스의 가중치는 0보다 커야 합니다.")
+
+        self._cond = threading.Condition()
+        self._waiting = {cls: deque() for cls in PRIORITY_CLASSES}
+        self._pass = {cls: 0.0 for cls in PRIORITY_CLASSES}
+        self._vtime = 0.0
+        # 클래스 대기열 맨 앞 요청이 토큰 획득에 실패한 상태인지
+        self._blocked = {cls: False for cls in PRIORITY_CLASSES}
+
+    def _class_order(self) -> List[str]:
+        # 대기 중인 클래스를 차례 순으로 (pass 값이 작은 순, 같으면 우선순위가 높은 클래스)
+        active = [cls for cls in PRIORITY_CLASSES if self._waiting[cls]]
+        return sorted(active, key=lambda cls: (self._pass[cls], PRIORITY_CLASSES.index(cls)))
+
+    def _next_class(self) -> Optional[str]:
+        order = self._class_order()
+        return order[0] if order else None
+
+    def _may_try(self, priority: str) -> bool:
+        """
+        priority 클래스가 지금 토큰을 요청해도 되는지 판단합니다.
+        차례인 클래스가 아니어도, 앞선 클래스가 모두 토큰 획득에 실패했고 reserve가 더 크면
+        (reserve 때문에만 막혀 있을 수 있으므로) 시도합니다. 앞선 클래스의 reserve가 같거나 작으면
+        그 클래스가 얻지 못한 토큰은 이 클래스도 얻을 수 없으므로 차례를 기다립니다.
+        """
+        reserve = self.reserve.get(priority, 0)
+        for cls in self._class_order():
+            if cls == priority:
+                return True
+            if not (self._blocked[cls] and self.reserve.get(cls, 0) > reserve):
+                return False
+        return False
+
+    def _leave(self, priority: str, ticket: object) -> None:
+        self._waiting[priority].remove(ticket)
+        self._blocked[priority] = False  # 다음 요청은 아직 시도 전
+        LLM_QUEUE_DEPTH.set(len(self._waiting[priority]), priority=priority)
+        self._cond.notify_all()
+
+    def try_acquire(self, priority: str) -> float:
+        """
+        대기열을 거치지 않고 바로 토큰을 요청합니다. (Celery 태스크처럼 대기 대신 재예약하는 호출용)
+        토큰을 얻으면 0, 아니면 기다려야 할 시간(초)을 반환합니다.
+        """
+        if self.limiter is None:
+            return 0.0
+        return self.limiter.try_acquire(reserve=self.reserve.get(priority, 0))
+
+    def acquire(self, priority: str = INTERACTIVE, timeout: Optional[float] = None) -> bool:
+        """
+        priority 클래스 차례가 되어 토큰을 얻을 때까지 대기합니다.
+
+        Returns:
+            True (호출 가능) 또는 False (timeout 초과)
+        """
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"알 수 없는 우선순위 클래스입니다: {priority}")
+
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        ticket = object()
+
+        with self._cond:
+            queue = self._waiting[priority]
+            if not queue:
+                # 쉬고 있던 클래스가 밀린 몫을 한꺼번에 가져가지 않도록 현재 순번에서 시작
+                self._pass[priority] = max(self._pass[priority], self._vtime)
+            queue.append(ticket)
+            LLM_QUEUE_DEPTH.set(len(queue), priority=priority)
+
+            while True:
+                wait = None
+                if queue[0] is ticket and self._may_try(priority):
+                    wait = self.try_acquire(priority)
+                    if wait > 0 and not self._blocked[priority]:
+                        # 뒤 클래스가 reserve가 더 작으면 남겨둔 토큰으로 시도할 수 있도록 깨움
+                        self._blocked[priority] = True
+                        self._cond.notify_all()
+                    if wait <= 0:
+                        self._vtime = self._pass[priority]
+                        self._pass[priority] += 1.0 / self.weights[priority]
+                        self._leave(priority, ticket)
+                        LLM_QUEUE_WAIT_SECONDS.observe(time.monotonic() - started, priority=priority)
+                        LLM_SCHEDULED_TOTAL.inc(priority=priority, outcome="granted")
+                        return True
+
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._leave(priority, ticket)
+                        LLM_SCHEDULED_TOTAL.inc(priority=priority, outcome="timeout")
+                        logger.warning(f"LLM 호출 대기 시간 초과 ({priority}, {timeout}초)")
+                        return False
+                    wait = remaining if wait is None else min(wait, remaining)
+
+                # 차례가 오거나(다른 요청 완료/취소) 토큰이 생길 때까지 대기
+                self._cond.wait(wait)
+
+    def depths(self) -> Dict[str, int]:
+        """클래스별 대기 요청 수"""
+        with self._cond:
+            return {cls: len(queue) for cls, queue in self._waiting.items()}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """settings 값으로 LLM 스케줄러를 만듭니다. (프로세스당 1개)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                limiter=get_analysis_rate_limiter(),
+                weights=parse_class_map(getattr(settings, "LLM_PRIORITY_WEIGHTS", ""), DEFAULT_WEIGHTS),
+                reserve=parse_class_map(getattr(settings, "LLM_PRIORITY_RESERVE", ""), DEFAULT_RESERVE),
+            )
+        return _scheduler
+
+
+def try_llm_slot(priority: str = INTERACTIVE) -> bool:
+    """대기하지 않고 호출 차례를 받을 수 있으면 True (헤지 요청처럼 생략 가능한 추가 호출용)"""
+    return get_llm_scheduler().try_acquire(priority) <= 0
+
+
+def acquire_llm_slot(priority: str = INTERACTIVE) -> bool:
+    """
+    우선순위 클래스로 LLM 호출 차례를 기다립니다.
+    interactive 요청은 LLM_INTERACTIVE_TIMEOUT까지만 기다리고, 배치 클래스는 차례가 올 때까지 기다립니다.
+    """
+    timeout = None
+    if priority == INTERACTIVE:
+        timeout = getattr(settings, "LLM_INTERACTIVE_TIMEOUT", 0) or None
+    return get_llm_scheduler().acquire(priority, timeout=timeout)
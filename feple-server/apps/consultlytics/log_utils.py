@@ -0,0 +1,149 @@
+"""
+apps/consultlytics/log_utils.py
+
+배치 러너와 웹 앱에서 공용으로 쓰는 로깅 유틸리티입니다.
+settings.LOGGING(dictConfig)에서 클래스 경로로 참조되므로 Django 모델을 import하지 않습니다.
+
+- QueueListenerHandler : 레코드를 큐에 넣기만 하고, 실제 파일/콘솔 쓰기는 별도 스레드에서 처리
+- JsonFormatter        : call_id, stage_timings 등 extra 필드를 포함한 JSON 한 줄 로그
+- ProgressLogger       : 행 단위 진행률 로그 샘플링 (N건마다 또는 T초마다 1줄)
+
+<설정 안내>
+- settings.py (또는 .env)
+    LOG_FORMAT       = "json"       # 파일 로그 형식 (json | text)
+    LOG_ROTATION     = "size"       # size(용량 기준) | time(시간 기준)
+    LOG_MAX_BYTES    = 50MB         # size 회전 기준
+    LOG_ROTATE_WHEN  = "midnight"   # time 회전 기준
+    LOG_BACKUP_COUNT = 14           # 보관할 이전 로그 파일 수
+
+<사용 예시>
+  logger.info("분석 완료", extra={"call_id": call_id, "stage_timings": timings})
+
+  progress = ProgressLogger(logger, total=len(rows), every=500, interval=10)
+  for row in rows:
+      ...
+      progress.tick(ok=True)
+"""
+
+import json
+import time
+import queue
+import atexit
+import logging
+import datetime
+import threading
+from logging.config import ConvertingList
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# 로그 레코드 기본 속성 (이 외의 속성은 extra로 전달된 필드로 간주)
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """로그 레코드를 JSON 한 줄로 변환합니다."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def _resolve_handlers(handlers) -> list:
+    """dictConfig의 'cfg://handlers.<name>' 참조를 실제 핸들러 객체로 변환합니다."""
+    if isinstance(handlers, ConvertingList):
+        handlers = [handlers[i] for i in range(len(handlers))]
+    for handler in handlers:
+        if not isinstance(handler, logging.Handler):
+            raise ValueError(
+                f"대상 핸들러가 아직 설정되지 않았습니다: {handler} "
+                "(QueueListenerHandler는 이름순으로 대상 핸들러보다 뒤에 와야 합니다)"
+            )
+    return list(handlers)
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    로그 레코드를 큐에 넣고 즉시 반환하는 핸들러.
+    대상 핸들러(파일·콘솔)의 I/O와 락 경합은 QueueListener 스레드 하나가 전담합니다.
+    dictConfig에서는 'class'가 아닌 '()' 키로 지정해야 합니다. (Python 3.12+는 'class'로 지정된
+    QueueHandler의 handlers 키를 직접 처리하여 cfg:// 참조를 해석하지 못함)
+    """
+
+    def __init__(self, handlers, respect_handler_level: bool = True, queue_size: int = -1):
+        super().__init__(queue.Queue(queue_size))
+        self.listener = QueueListener(
+            self.queue, *_resolve_handlers(handlers), respect_handler_level=respect_handler_level
+        )
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        메시지만 확정하고 포맷은 리스너 스레드에 맡깁니다.
+        (기본 구현은 호출 스레드에서 전체 포맷을 수행함)
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def stop(self) -> None:
+        """남은 레코드를 모두 기록한 뒤 리스너를 멈춥니다."""
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+
+class ProgressLogger:
+    """
+    행 단위 진행률 로그를 샘플링합니다.
+    every 건마다, 또는 마지막 로그 이후 interval 초가 지나면, 그리고 마지막 행에서 한 줄을 남깁니다.
+    """
+
+    def __init__(self, logger: logging.Logger, total: int, every: int = 100,
+                 interval: float = 10.0, label: str = "진행률"):
+        self.logger = logger
+        self.total = total
+        self.every = max(1, every)
+        self.interval = interval
+        self.label = label
+        self.done = 0
+        self.failed = 0
+        self._started = time.monotonic()
+        self._last_logged = self._started
+        self._lock = threading.Lock()
+
+    def tick(self, ok: bool = True, call_id: Optional[str] = None) -> None:
+        """한 건 처리 완료를 기록합니다. (여러 스레드에서 호출 가능)"""
+        with self._lock:
+            self.done += 1
+            if not ok:
+                self.failed += 1
+            now = time.monotonic()
+            if not (self.done % self.every == 0 or self.done == self.total
+                    or now - self._last_logged >= self.interval):
+                return
+            self._last_logged = now
+            done, failed, elapsed = self.done, self.failed, now - self._started
+
+        percent = done / self.total * 100 if self.total else 100.0
+        self.logger.info(
+            f"{self.label}: {done}/{self.total} ({percent:.1f}%) 실패 {failed}건",
+            extra={
+                "progress_done": done,
+                "progress_total": self.total,
+                "progress_failed": failed,
+                "rows_per_sec": round(done / elapsed, 2) if elapsed > 0 else None,
+                "last_call_id": call_id,
+            },
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from apps.consultlytics.tasks import dispatch_analysis
+from apps.consultlytics.llm_scheduler import BACKFILL, REANALYSIS
+
+class Command(BaseCommand):
+    help = '상담 분석을 Celery 워커로 분산 실행합니다. (페이지 단위 chord 팬아웃)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=500, help='chord 하나에 담을 태스크 수 (기본값: 500)')
+        parser.add_argument('--only-unscored', action='store_true', help='점수가 없는(미분석) 상담만 분석')
+        parser.add_argument('--no-wait', action='store_true', help='태스크 전송 후 결과를 기다리지 않고 종료')
+        parser.add_argument('--timeout', type=float, help='페이지별 결과 대기 시간(초)')
+        parser.add_argument('--priority', choices=[REANALYSIS, BACKFILL], default=BACKFILL,
+                            help='LLM 호출 우선순위 클래스 (기본값: backfill)')
+
+    def handle(self, *args, **options):
+        summary = dispatch_analysis(
+            page_size=options['page_size'],
+            only_unscored=options['only_unscored'],
+            wait=not options['no_wait'],
+            timeout=options['timeout'],
+            priority=options['priority'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"전송: {summary['dispatched']}건 ({summary['pages']}개 페이지)"))
+
+        if options['no_wait']:
+            for chord_id in summary['chord_ids']:
+                self.stdout.write(f'chord id: {chord_id}')
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"성공: {summary['success']}건, 실패: {summary['failed']}건, 소요 시간: {summary['seconds']}초"
+        ))
+        for call_id in summary['failed_ids']:
+            self.stdout.write(self.style.WARNING(f'실패: {call_id}'))
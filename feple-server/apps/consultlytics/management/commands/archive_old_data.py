@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from apps.consultlytics.retention import RetentionPolicy, archive_consulting, archive_analysis_results
+
+class Command(BaseCommand):
+    help = '보존 기간이 지난 consulting / analysis_results 데이터를 일자별 압축 파일로 아카이브합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consulting-days', type=int, help='consulting 보관 일수 (기본값: CONSULTING_RETENTION_DAYS)')
+        parser.add_argument('--analysis-days', type=int, help='analysis_results 보관 일수 (기본값: ANALYSIS_RETENTION_DAYS)')
+        parser.add_argument('--archive-root', help='아카이브 파일 저장 경로 (기본값: ARCHIVE_ROOT)')
+        parser.add_argument('--batch-size', type=int, help='한 번에 옮길 행 수 (기본값: ARCHIVE_BATCH_SIZE)')
+        parser.add_argument('--skip-analysis', action='store_true', help='analysis_results 아카이브를 건너뜀')
+        parser.add_argument('--dry-run', action='store_true', help='대상 건수만 출력하고 데이터는 변경하지 않음')
+
+    def handle(self, *args, **options):
+        policy = RetentionPolicy.from_settings(
+            consulting_days=options['consulting_days'],
+            analysis_days=options['analysis_days'],
+            archive_root=options['archive_root'],
+            batch_size=options['batch_size'],
+        )
+        dry_run = options['dry_run']
+        prefix = '[dry-run] ' if dry_run else ''
+
+        count = archive_consulting(policy, dry_run=dry_run)
+        self.stdout.write(self.style.SUCCESS(f'{prefix}consulting 아카이브 대상: {count}건'))
+
+        if not options['skip_analysis']:
+            count = archive_analysis_results(policy, dry_run=dry_run)
+            self.stdout.write(self.style.SUCCESS(f'{prefix}analysis_results 아카이브 대상: {count}건'))
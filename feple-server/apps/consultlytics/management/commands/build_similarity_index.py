@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.consultlytics.similarity_store import build_index, index_dir
+
+class Command(BaseCommand):
+    help = 'Consulting·File 음성 특성으로 유사 통화 인덱스를 다시 빌드합니다 (추가분 delta 포함 재구성).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='인덱스 디렉토리 (기본값: SIMILARITY_INDEX_DIR)')
+        parser.add_argument('--ivf-min-rows', type=int, help='이 행 수 이상이면 ivf 인덱스로 빌드 (기본값: SIMILARITY_IVF_MIN_ROWS, 0이면 항상 ivf)')
+        parser.add_argument('--nlist', type=int, help='ivf 목록 수 (기본값: sqrt(행 수))')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='한 번에 읽을 행 수')
+
+    def handle(self, *args, **options):
+        try:
+            meta = build_index(
+                root=options['output'],
+                ivf_min_rows=options['ivf_min_rows'],
+                nlist=options['nlist'],
+                chunk_size=options['chunk_size'],
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        detail = f", 목록 {meta['nlist']}개" if 'nlist' in meta else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"유사 통화 인덱스 빌드 완료: {options['output'] or index_dir()} ({meta['kind']}, {meta['rows']}건{detail})"
+        ))
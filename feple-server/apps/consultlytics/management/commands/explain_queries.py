@@ -0,0 +1,43 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from apps.consultlytics.query_plans import collect_query_plans, find_plan_problems
+
+class Command(BaseCommand):
+    help = '러너와 뷰가 실행하는 쿼리의 EXPLAIN 결과를 기록하고 풀 스캔/파일 정렬 회귀를 검사합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='실행 계획 리포트를 저장할 JSON 파일 경로')
+        parser.add_argument('--baseline', help='비교 기준이 되는 이전 리포트 JSON 파일 경로')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='문제가 발견되면 0이 아닌 종료 코드로 종료 (CI용)')
+
+    def handle(self, *args, **options):
+        report = collect_query_plans()
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], 'r', encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                raise CommandError(f"기준 리포트를 읽을 수 없습니다: {str(e)}")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"실행 계획 리포트 저장: {options['output']}")
+
+        for name, entry in report['queries'].items():
+            flags = [flag for flag in ('full_scan', 'filesort') if entry.get(flag)]
+            status = ', '.join(flags) if flags else 'ok'
+            self.stdout.write(f"[{report['vendor']}] {name}: {status}")
+
+        problems = find_plan_problems(report, baseline)
+        if not problems:
+            self.stdout.write(self.style.SUCCESS('실행 계획 문제 없음'))
+            return
+
+        for problem in problems:
+            self.stdout.write(self.style.WARNING(problem))
+        if options['fail_on_regression']:
+            raise CommandError(f"실행 계획 문제 {len(problems)}건 발견")
@@ -0,0 +1,46 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from apps.consultlytics.columnar_export import export_columnar
+
+class Command(BaseCommand):
+    help = 'consulting과 분석 결과를 통화 일자·카테고리별 Parquet 파일로 내보냅니다 (오프라인 분석용).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='시작 일자 (YYYY-MM-DD, 포함)')
+        parser.add_argument('--end', help='종료 일자 (YYYY-MM-DD, 포함)')
+        parser.add_argument('--output-root', help='출력 루트 디렉토리 (기본값: EXPORT_ROOT)')
+        parser.add_argument('--chunk-size', type=int, help='한 번에 읽을 행 수 (기본값: EXPORT_CHUNK_SIZE)')
+        parser.add_argument('--workers', type=int, help='파티션 병렬 처리 프로세스 수 (기본값: EXPORT_WORKERS)')
+        parser.add_argument('--exclude', default='', help='내보내지 않을 consulting 필드 (쉼표 구분, 예: consulting_content,Content)')
+        parser.add_argument('--skip-analysis', action='store_true', help='analysis_results 열을 붙이지 않음')
+        parser.add_argument('--compression', help='Parquet 압축 방식 (기본값: EXPORT_COMPRESSION)')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as e:
+            raise CommandError(f"날짜 형식이 올바르지 않습니다: {str(e)}")
+
+        try:
+            results = export_columnar(
+                root=options['output_root'],
+                start=start,
+                end=end,
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                exclude=[name.strip() for name in options['exclude'].split(',') if name.strip()],
+                with_analysis=not options['skip_analysis'],
+                compression=options['compression'],
+            )
+        except (RuntimeError, ValueError) as e:
+            raise CommandError(str(e))
+
+        rows = sum(item.rows for item in results)
+        size_mb = sum(item.bytes for item in results) / 1024 / 1024
+        invalid = sum(item.invalid_features for item in results)
+        self.stdout.write(self.style.SUCCESS(
+            f'열 형식 내보내기 완료: 파티션 {len(results)}개, {rows}건, {size_mb:.1f}MB ({start or "처음"} ~ {end or "끝"})'
+        ))
+        if invalid:
+            self.stdout.write(self.style.WARNING(f'디코딩하지 못한 음성 특성 {invalid}개는 null로 기록되었습니다.'))
@@ -0,0 +1,20 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from apps.consultlytics.rollups import rebuild_rollups
+
+class Command(BaseCommand):
+    help = 'consulting 테이블에서 일자·카테고리별 점수 집계를 다시 계산합니다 (백필).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='시작 일자 (YYYY-MM-DD, 포함)')
+        parser.add_argument('--end', help='종료 일자 (YYYY-MM-DD, 포함)')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as e:
+            raise CommandError(f"날짜 형식이 올바르지 않습니다: {str(e)}")
+
+        count = rebuild_rollups(start, end)
+        self.stdout.write(self.style.SUCCESS(f'집계 재계산 완료: {count}개 행 ({start or "처음"} ~ {end or "끝"})'))
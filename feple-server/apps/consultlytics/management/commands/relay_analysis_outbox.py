@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.consultlytics.result_store import drain_outbox, outbox_backlog
+
+class Command(BaseCommand):
+    help = '분석 결과 outbox를 보조 저장소(feple_analysis.analysis_results)에 반영합니다 (ANALYSIS_PROJECTION=async).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='한 번에 반영할 outbox 행 수 (기본: ANALYSIS_OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--loop', action='store_true', help='종료하지 않고 주기적으로 반영')
+        parser.add_argument('--interval', type=float, default=1.0, help='--loop에서 outbox가 비었을 때 대기 시간(초)')
+
+    def handle(self, *args, **options):
+        projected = 0
+        while True:
+            count = drain_outbox(options['batch_size'])
+            projected += count
+            if count:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        backlog = outbox_backlog()
+        self.stdout.write(self.style.SUCCESS(
+            f'outbox 반영 완료: {projected}건 (대기 {backlog["pending"]}건, 재시도 한도 초과 {backlog["dead"]}건)'
+        ))
+        if backlog["dead"]:
+            self.stdout.write(self.style.WARNING('재시도 한도를 넘은 행은 last_error를 확인한 뒤 attempts를 0으로 되돌리면 다시 반영됩니다.'))
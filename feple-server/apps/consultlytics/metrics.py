@@ -0,0 +1,369 @@
+"""
+apps/consultlytics/metrics.py
+
+분석 파이프라인 계측용 경량 메트릭 모듈입니다. (외부 의존성 없음)
+카운터·게이지·히스토그램을 프로세스 내 레지스트리에 모아 두고,
+웹 앱에서는 Prometheus 텍스트 형식 엔드포인트(/api/consultlytics/metrics/)로,
+배치 러너에서는 주기적으로 파일에 덤프하여 노출합니다.
+
+메트릭은 프로세스 단위로 집계되므로 gunicorn 워커가 여러 개이면 워커별 값이 노출됩니다.
+
+<설정 안내>
+- settings.py (또는 .env)
+    METRICS_DUMP_PATH     = "logs/metrics.prom"   # 배치 러너 덤프 파일
+    METRICS_DUMP_INTERVAL = 30                    # 덤프 주기 (초)
+
+<사용 예시>
+  from apps.consultlytics.metrics import stage_timer, ANALYSIS_TOTAL
+  with stage_timer("llm"):
+      response = llm.invoke(prompt)
+  ANALYSIS_TOTAL.inc(status="success")
+"""
+
+import os
+import time
+import atexit
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 초 단위 지연 히스토그램 버킷
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 토큰 수 히스토그램 버킷
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+# 압축 후/전 비율 히스토그램 버킷
+RATIO_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """레이블별 값을 보관하는 메트릭 기본 클래스"""
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 메트릭의 레이블이 올바르지 않습니다: {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """단조 증가 카운터"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items
+        ]
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {",".join(key) or "_": value for key, value in self._values.items()}
+
+
+class Gauge(Counter):
+    """현재 값을 나타내는 게이지 (증감 가능)"""
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            state["counts"][index] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, dict(state, counts=list(state["counts"]))) for key, state in self._values.items())
+        lines = self.header()
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state["counts"]):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state['count']}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                ",".join(key) or "_": {"count": state["count"], "sum": round(state["sum"], 6)}
+                for key, state in self._values.items()
+            }
+
+
+class MetricsRegistry:
+    """프로세스 내 메트릭 레지스트리"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus 텍스트 노출 형식으로 렌더링합니다."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """로그/리포트용 요약 딕셔너리"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+REGISTRY = MetricsRegistry()
+
+ANALYSIS_STAGE_SECONDS = REGISTRY.histogram(
+    "consultlytics_analysis_stage_seconds", "analyze_consultation 단계별 소요 시간(초)", ["stage"]
+)
+ANALYSIS_TOTAL = REGISTRY.counter(
+    "consultlytics_analysis_total", "analyze_consultation 처리 결과 수", ["status"]
+)
+PARSE_FALLBACK_TOTAL = REGISTRY.counter(
+    "consultlytics_parse_fallback_total", "필수 항목이 빠져 기본값으로 채운 LLM 응답 수"
+)
+ANALYSIS_WRITES_TOTAL = REGISTRY.counter(
+    "consultlytics_analysis_writes_total", "분석 결과 저장 행 수 (written/unchanged/error)", ["mode", "outcome"]
+)
+ANALYSIS_OUTBOX_TOTAL = REGISTRY.counter(
+    "consultlytics_analysis_outbox_total", "보조 저장소 outbox 행 수 (enqueued/projected/failed)", ["outcome"]
+)
+DB_POOL_CONNECTIONS = REGISTRY.gauge(
+    "consultlytics_db_pool_connections", "DB 연결 풀 연결 수 (checked_out/idle/overflow)", ["alias", "state"]
+)
+DB_POOL_EVENTS_TOTAL = REGISTRY.counter(
+    "consultlytics_db_pool_events_total", "DB 연결 생성·대여·무효화 횟수", ["alias", "event"]
+)
+SIMILARITY_QUERY_SECONDS = REGISTRY.histogram(
+    "consultlytics_similarity_query_seconds", "유사 통화 인덱스 검색 시간(초)", ["kind"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+SIMILARITY_APPENDS_TOTAL = REGISTRY.counter(
+    "consultlytics_similarity_appends_total", "유사 통화 인덱스 추가 결과 수 (appended/skipped/error)", ["outcome"]
+)
+PROMPT_TOKENS = REGISTRY.histogram(
+    "consultlytics_prompt_tokens", "LLM 프롬프트 추정 토큰 수", buckets=TOKEN_BUCKETS
+)
+RESPONSE_TOKENS = REGISTRY.histogram(
+    "consultlytics_response_tokens", "LLM 응답 추정 토큰 수", buckets=TOKEN_BUCKETS
+)
+TRANSCRIPT_COMPRESSION_RATIO = REGISTRY.histogram(
+    "consultlytics_transcript_compression_ratio", "상담 대화 압축 후/전 추정 토큰 비율", buckets=RATIO_BUCKETS
+)
+TRANSCRIPT_TOKENS_SAVED = REGISTRY.counter(
+    "consultlytics_transcript_tokens_saved_total", "대화 압축으로 줄인 추정 토큰 수"
+)
+LLM_QUEUE_DEPTH = REGISTRY.gauge(
+    "consultlytics_llm_queue_depth", "LLM 호출 순서를 기다리는 요청 수", ["priority"]
+)
+LLM_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "consultlytics_llm_queue_wait_seconds", "LLM 호출 순서를 기다린 시간(초)", ["priority"]
+)
+LLM_SCHEDULED_TOTAL = REGISTRY.counter(
+    "consultlytics_llm_scheduled_total", "LLM 스케줄러 처리 결과 수", ["priority", "outcome"]
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "consultlytics_llm_call_seconds", "모델별 LLM 호출 지연(초)", ["model", "kind"]
+)
+LLM_LATENCY_QUANTILE = REGISTRY.gauge(
+    "consultlytics_llm_latency_seconds", "모델별 최근 LLM 호출 지연 분위수(초)", ["model", "quantile"]
+)
+LLM_HEDGE_TOTAL = REGISTRY.counter(
+    "consultlytics_llm_hedge_total", "헤지 요청 처리 결과 수 (sent/won/over_budget/not_admitted)", ["model", "outcome"]
+)
+LLM_DEADLINE_EXCEEDED_TOTAL = REGISTRY.counter(
+    "consultlytics_llm_deadline_exceeded_total", "마감 시간을 넘긴 LLM 호출 수", ["model"]
+)
+LLM_TIER_CALLS_TOTAL = REGISTRY.counter(
+    "consultlytics_llm_tier_calls_total", "모델 등급별 LLM 호출 수", ["tier", "outcome"]
+)
+LLM_TIER_SECONDS = REGISTRY.histogram(
+    "consultlytics_llm_tier_seconds", "모델 등급별 LLM 호출 지연(초)", ["tier"]
+)
+LLM_TIER_COST_USD = REGISTRY.counter(
+    "consultlytics_llm_tier_cost_usd_total", "모델 등급별 추정 LLM 비용(USD)", ["tier"]
+)
+LLM_ESCALATION_TOTAL = REGISTRY.counter(
+    "consultlytics_llm_escalation_total", "fast 등급 응답 검증 실패로 pro 등급에 재요청한 수"
+)
+CONTEXT_CACHE_TOTAL = REGISTRY.counter(
+    "consultlytics_context_cache_total",
+    "컨텍스트 캐시 처리 결과 수 (hit/fallback/created/extended/expired/create_error)", ["model", "outcome"]
+)
+CONTEXT_CACHE_TOKENS = REGISTRY.counter(
+    "consultlytics_context_cache_tokens_total", "컨텍스트 캐시로 대신 보낸 고정 프롬프트 추정 토큰 수", ["model"]
+)
+
+
+@contextmanager
+def stage_timer(stage: str, timings: Optional[Dict[str, float]] = None,
+                histogram: Histogram = ANALYSIS_STAGE_SECONDS):
+    """
+    with 블록의 소요 시간을 단계(stage) 레이블로 기록합니다.
+    timings 딕셔너리를 넘기면 해당 단계의 소요 시간(ms)도 함께 저장합니다. (로그용)
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        histogram.observe(elapsed, stage=stage)
+        if timings is not None:
+            timings[stage] = round(elapsed * 1000, 2)
+
+
+def record_compression(stats: Dict[str, Any]) -> None:
+    """대화 압축 결과(CompressedTranscript.stats())를 메트릭에 기록합니다."""
+    if not stats.get("original_tokens"):
+        return
+    TRANSCRIPT_COMPRESSION_RATIO.observe(stats["ratio"])
+    TRANSCRIPT_TOKENS_SAVED.inc(stats["original_tokens"] - stats["compressed_tokens"])
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    토크나이저 없이 토큰 수를 추정합니다.
+    한글 위주 텍스트는 대략 2자당 1토큰, 그 외 문자는 4자당 1토큰으로 계산합니다.
+    """
+    if not text:
+        return 0
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+    return hangul // 2 + (len(text) - hangul) // 4 + 1
+
+
+def dump_metrics(path: str, registry: MetricsRegistry = REGISTRY) -> None:
+    """메트릭을 Prometheus 텍스트 형식으로 파일에 원자적으로 기록합니다."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(tmp_path, path)
+
+
+class PeriodicMetricsDumper:
+    """배치 러너용 주기적 메트릭 덤프 스레드"""
+
+    def __init__(self, path: str, interval: float = 30.0, registry: MetricsRegistry = REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-dumper", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._dump()
+
+    def _dump(self) -> None:
+        try:
+            dump_metrics(self.path, self.registry)
+        except OSError as e:
+            logger.warning(f"메트릭 덤프 중 오류: {str(e)}")
+
+    def start(self) -> "PeriodicMetricsDumper":
+        self._thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self) -> None:
+        """스레드를 멈추고 마지막 값을 기록합니다."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._dump()
+
+
+def start_periodic_dump(path: Optional[str] = None, interval: Optional[float] = None) -> PeriodicMetricsDumper:
+    """settings 값(METRICS_DUMP_PATH, METRICS_DUMP_INTERVAL)으로 주기적 덤프를 시작합니다."""
+    from django.conf import settings
+
+    path = path or getattr(settings, "METRICS_DUMP_PATH", "logs/metrics.prom")
+    interval = interval or getattr(settings, "METRICS_DUMP_INTERVAL", 30)
+    return PeriodicMetricsDumper(path, interval).start()
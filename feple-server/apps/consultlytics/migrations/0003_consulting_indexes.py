@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultlytics', '0002_consultingdetail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consulting',
+            index=models.Index(fields=['created_at'], name='consulting_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consulting',
+            index=models.Index(fields=['updated_at'], name='consulting_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consulting',
+            index=models.Index(fields=['call_date'], name='consulting_call_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consulting',
+            index=models.Index(fields=['mid_category', 'content_category', 'call_date'], name='consulting_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consultingdetail',
+            index=models.Index(fields=['consulting', 'timestamp'], name='consulting_detail_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultlytics', '0003_consulting_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyScoreRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='통화 일자')),
+                ('mid_category', models.CharField(blank=True, default='', max_length=100, verbose_name='메인 카테고리')),
+                ('content_category', models.CharField(blank=True, default='', max_length=100, verbose_name='서브 카테고리')),
+                ('call_count', models.IntegerField(default=0, verbose_name='분석 상담 수')),
+                ('final_score_sum', models.FloatField(default=0.0, verbose_name='최종 점수 합계')),
+                ('efficiency_score_sum', models.FloatField(default=0.0, verbose_name='효율성 점수 합계')),
+                ('manual_compliance_ratio_sum', models.FloatField(default=0.0, verbose_name='매뉴얼 준수율 합계')),
+                ('score_sum', models.FloatField(default=0.0, verbose_name='분석 점수 합계')),
+                ('csr_emotion_score_sum', models.FloatField(default=0.0, verbose_name='상담사 감정 점수 합계')),
+                ('customer_emotion_score_sum', models.FloatField(default=0.0, verbose_name='고객 감정 점수 합계')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'consulting_daily_rollup',
+                'unique_together': {('day', 'mid_category', 'content_category')},
+                'indexes': [models.Index(fields=['mid_category', 'content_category', 'day'], name='rollup_category_day_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultlytics', '0004_dailyscorerollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('call_id', models.CharField(max_length=100, verbose_name='상담 ID')),
+                ('payload', models.JSONField(verbose_name='analysis_results 행')),
+                ('attempts', models.IntegerField(default=0, verbose_name='반영 실패 횟수')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='마지막 반영 오류')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'consulting_analysis_outbox',
+                'indexes': [models.Index(fields=['attempts', 'id'], name='outbox_attempts_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 19:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultlytics', '0005_analysisoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisoutbox',
+            name='available_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='반영 가능 시각'),
+        ),
+        migrations.AddIndex(
+            model_name='analysisoutbox',
+            index=models.Index(fields=['available_at', 'id'], name='outbox_available_id_idx'),
+        ),
+    ]
@@ -0,0 +1,111 @@
+"""
+apps/consultlytics/model_router.py
+
+로컬에서 계산한 점수로 상담마다 LLM 모델 등급(tier)을 고릅니다.
+갈등·비속어가 없고 최종 점수와 매뉴얼 준수율이 높은 일상적인 상담은 빠르고 저렴한 fast 등급
+(flash 계열)으로, 나머지는 pro 등급으로 보냅니다.
+fast 등급 응답이 검증을 통과하지 못하면(필수 항목 누락, 점수 범위 오류) pro 등급으로 다시 요청합니다.
+
+등급별 호출 수·지연·추정 비용은 consultlytics_llm_tier_* 메트릭으로 기록됩니다.
+(비용은 estimate_tokens 추정 토큰 수 × LLM_TIER_PRICES 단가)
+
+<설정 안내>
+- settings.py (또는 .env)
+    LLM_MODEL_PRO           = "gemini-1.5-pro"
+    LLM_MODEL_FAST          = "gemini-1.5-flash"   # 비워두면 모든 상담을 pro로 분석
+    LLM_ROUTING_ENABLED     = True
+    LLM_ROUTING_MIN_SCORE   = 80      # fast 등급 최소 final_score
+    LLM_ROUTING_MIN_MANUAL  = 0.8     # fast 등급 최소 매뉴얼 준수율
+    LLM_ROUTING_BLOCK_FLAGS = "Conflict,Profane,conflict_flag"   # 하나라도 참이면 pro
+    LLM_ESCALATE_ON_INVALID = True    # fast 응답 검증 실패 시 pro로 재요청
+    LLM_TIER_PRICES         = "fast=0.075:0.30,pro=1.25:5.00"   # 100만 토큰당 USD (입력:출력)
+
+<사용 예시>
+  tier = route_tier(row_dict, scores)            # "fast" | "pro"
+  if tier != PRO and needs_escalation(result, missing_keys):
+      ...  # pro 등급으로 재요청
+"""
+
+import logging
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from django.conf import settings
+
+from .metrics import (
+    LLM_TIER_CALLS_TOTAL, LLM_TIER_COST_USD, LLM_TIER_SECONDS, LLM_ESCALATION_TOTAL, estimate_tokens
+)
+
+logger = logging.getLogger(__name__)
+
+FAST = "fast"
+PRO = "pro"
+TIERS = (FAST, PRO)
+
+DEFAULT_PRICES = {FAST: (0.075, 0.30), PRO: (1.25, 5.00)}
+
+
+def _flag(row: Any, name: str) -> bool:
+    # model_to_dict 결과와 모델 인스턴스 모두 지원
+    value = row.get(name) if isinstance(row, Mapping) else getattr(row, name, None)
+    return bool(value)
+
+
+def _block_flags() -> List[str]:
+    value = getattr(settings, "LLM_ROUTING_BLOCK_FLAGS", "Conflict,Profane,conflict_flag")
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def parse_prices(value: str) -> Dict[str, Tuple[float, float]]:
+    """"fast=0.075:0.30,pro=1.25:5.00" 형식 설정을 등급별 (입력, 출력) 단가로 변환합니다."""
+    prices = dict(DEFAULT_PRICES)
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        tier, _, pair = item.partition("=")
+        prompt_price, _, response_price = pair.partition(":")
+        prices[tier.strip()] = (float(prompt_price), float(response_price or prompt_price))
+    return prices
+
+
+def fast_tier_available() -> bool:
+    return bool(getattr(settings, "LLM_ROUTING_ENABLED", False) and getattr(settings, "LLM_MODEL_FAST", ""))
+
+
+def route_tier(row: Any, scores: Mapping[str, Any]) -> str:
+    """
+    상담 행(딕셔너리 또는 모델)과 compute_scores 결과로 모델 등급을 고릅니다.
+    모든 fast 조건을 만족하는 일상적인 상담만 fast, 나머지는 pro입니다.
+    """
+    if not fast_tier_available():
+        return PRO
+    if any(_flag(row, name) for name in _block_flags()):
+        return PRO
+    if scores["final_score"] < getattr(settings, "LLM_ROUTING_MIN_SCORE", 80):
+        return PRO
+    if scores["manual_compliance"] < getattr(settings, "LLM_ROUTING_MIN_MANUAL", 0.8):
+        return PRO
+    return FAST
+
+
+def needs_escalation(result: Optional[Dict[str, Any]], missing_keys: List[str]) -> bool:
+    """fast 등급 응답을 pro로 다시 요청해야 하는지 검증합니다."""
+    if not getattr(settings, "LLM_ESCALATE_ON_INVALID", True):
+        return False
+    if not result or missing_keys:
+        return True
+    score = result.get("평가점수")
+    return not isinstance(score, int) or not 0 < score <= 100
+
+
+def record_tier_call(tier: str, prompt: str, content: Optional[str], seconds: float, outcome: str = "ok") -> None:
+    """등급별 호출 수·지연·추정 비용을 기록합니다."""
+    prompt_price, response_price = parse_prices(getattr(settings, "LLM_TIER_PRICES", "")).get(tier, (0.0, 0.0))
+    cost = (estimate_tokens(prompt) * prompt_price + estimate_tokens(content) * response_price) / 1_000_000
+    LLM_TIER_CALLS_TOTAL.inc(tier=tier, outcome=outcome)
+    LLM_TIER_SECONDS.observe(seconds, tier=tier)
+    LLM_TIER_COST_USD.inc(cost, tier=tier)
+
+
+def record_escalation(call_id: str) -> None:
+    LLM_ESCALATION_TOTAL.inc()
+    logger.info(f"fast 등급 응답 검증 실패, pro 등급으로 재요청: {call_id}", extra={"call_id": call_id})
@@ -19,6 +19,7 @@ apps/consultlytics/models.py
 """
 
 from django.db import models
+from django.utils import timezone
 
 
 class Session(models.Model):
@@ -236,6 +237,16 @@ class Consulting(models.Model):
     class Meta:
         db_table = 'consulting'
         ordering = ['-created_at']
+        indexes = [
+            # 기본 정렬(-created_at) 및 latest('created_at') 조회
+            models.Index(fields=['created_at'], name='consulting_created_at_idx'),
+            # updated_at 기반 증분 처리 (InnoDB 보조 인덱스는 PK(call_id)를 포함하므로 call_id 조회까지 커버)
+            models.Index(fields=['updated_at'], name='consulting_updated_at_idx'),
+            # 통화 일자 범위 조회
+            models.Index(fields=['call_date'], name='consulting_call_date_idx'),
+            # 카테고리별 집계 및 카테고리 + 기간 조회
+            models.Index(fields=['mid_category', 'content_category', 'call_date'], name='consulting_category_idx'),
+        ]
 
 
 class ConsultingDetail(models.Model):
@@ -247,6 +258,73 @@ class ConsultingDetail(models.Model):
     class Meta:
         db_table = 'consulting_detail'
         ordering = ['timestamp']
+        indexes = [
+            # 상담별 발화를 timestamp 순으로 조회 (filesort 방지)
+            models.Index(fields=['consulting', 'timestamp'], name='consulting_detail_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.speaker} - {self.timestamp}"
+
+
+class DailyScoreRollup(models.Model):
+    """
+    일자·카테고리별 분석 점수 집계 (대시보드용 사전 집계 테이블)
+      - day               : 통화 일자 (call_date 기준)
+      - mid_category      : 메인 카테고리 (없으면 빈 문자열)
+      - content_category  : 서브 카테고리 (없으면 빈 문자열)
+      - call_count        : 분석 완료된 상담 수
+      - *_sum             : 각 점수의 합계 (평균 = 합계 / call_count)
+    analyze_consultation이 점수를 저장할 때 증분 갱신되며,
+    rebuild_rollups 관리 명령으로 consulting 테이블에서 다시 계산할 수 있습니다.
+    """
+    day                         = models.DateField(verbose_name="통화 일자")
+    mid_category                = models.CharField(max_length=100, blank=True, default="", verbose_name="메인 카테고리")
+    content_category            = models.CharField(max_length=100, blank=True, default="", verbose_name="서브 카테고리")
+    call_count                  = models.IntegerField(default=0, verbose_name="분석 상담 수")
+    final_score_sum             = models.FloatField(default=0.0, verbose_name="최종 점수 합계")
+    efficiency_score_sum        = models.FloatField(default=0.0, verbose_name="효율성 점수 합계")
+    manual_compliance_ratio_sum = models.FloatField(default=0.0, verbose_name="매뉴얼 준수율 합계")
+    score_sum                   = models.FloatField(default=0.0, verbose_name="분석 점수 합계")
+    csr_emotion_score_sum       = models.FloatField(default=0.0, verbose_name="상담사 감정 점수 합계")
+    customer_emotion_score_sum  = models.FloatField(default=0.0, verbose_name="고객 감정 점수 합계")
+    updated_at                  = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'consulting_daily_rollup'
+        unique_together = ("day", "mid_category", "content_category")
+        indexes = [
+            models.Index(fields=['mid_category', 'content_category', 'day'], name='rollup_category_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"Rollup {self.day} {self.mid_category}/{self.content_category}"
+
+
+class AnalysisOutbox(models.Model):
+    """
+    보조 저장소(feple_analysis.analysis_results) 반영 대기열 (transactional outbox)
+      - call_id    : 상담 ID
+      - payload    : analysis_results 행 (bulk_ingest.ANALYSIS_COLUMNS 키)
+      - attempts     : 반영 실패 횟수
+      - last_error   : 마지막 반영 오류
+      - available_at : 이 시각 이후에 반영 대상 (반영 중인 행의 임대 만료, 실패한 행의 재시도 시각)
+    consulting 분석 결과와 같은 트랜잭션에서 추가되고, 보조 저장소에 반영되면 삭제됩니다.
+    (result_store.drain_outbox, relay_analysis_outbox 관리 명령)
+    """
+    call_id    = models.CharField(max_length=100, verbose_name="상담 ID")
+    payload    = models.JSONField(verbose_name="analysis_results 행")
+    attempts   = models.IntegerField(default=0, verbose_name="반영 실패 횟수")
+    last_error = models.TextField(blank=True, default="", verbose_name="마지막 반영 오류")
+    available_at = models.DateTimeField(default=timezone.now, verbose_name="반영 가능 시각")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'consulting_analysis_outbox'
+        indexes = [
+            models.Index(fields=['attempts', 'id'], name='outbox_attempts_id_idx'),
+            models.Index(fields=['available_at', 'id'], name='outbox_available_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Outbox {self.call_id} (시도 {self.attempts})"
@@ -0,0 +1,363 @@
+"""
+apps/consultlytics/pipeline.py
+
+상담 분석을 단계별(staged) 파이프라인으로 실행합니다.
+I/O 단계(DB 조회, LLM 호출, 저장)는 스레드로, CPU 단계(직렬화·프롬프트 생성, 응답 파싱)는
+프로세스 풀로 실행하고, 단계 사이를 크기 제한이 있는 큐로 연결합니다.
+
+  call_id ─▶ [fetch: 스레드] ─▶ [prepare: 프로세스] ─▶ [llm: 스레드] ─▶ [parse: 프로세스]
+          ─▶ [escalate: 스레드] ─▶ [save: 스레드] ─▶ 결과
+
+- 단계별 폭(worker 수)을 따로 지정할 수 있습니다. (예: LLM 8, CPU 4, DB 2)
+- 다음 단계 큐가 가득 차면 앞 단계가 대기하므로(backpressure) 메모리에 쌓이는 행 수는
+  (단계 수 × queue_size + 진행 중인 작업 수)를 넘지 않습니다.
+- 한 단계에서 실패한 행은 이후 단계를 건너뛰고 error / failed_stage 정보와 함께 결과로 나옵니다.
+- save_batch_size를 주면 save 단계 결과를 모아 bulk_update 한 번으로 저장합니다. (BatchSaver)
+- 소비자가 결과를 끝까지 읽지 않고 멈추면(break, close) 남은 행을 버리고 단계 스레드를 종료한 뒤
+  프로세스 풀과 on_close 자원을 정리합니다. (진행 중인 단계 호출은 끝날 때까지 기다림)
+
+프로세스 단계의 함수는 analysis_core처럼 Django에 의존하지 않는 모듈에 있어야 합니다.
+워커 프로세스는 로깅 락 교착을 피하기 위해 fork 대신 forkserver(Windows는 spawn)로 시작합니다.
+
+<사용 예시>
+  pipeline = build_analysis_pipeline(fetch_workers=4, cpu_workers=4, llm_workers=8, save_workers=2)
+  for ctx in pipeline.run(call_ids):
+      print(ctx["call_id"], ctx.get("error"))
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+from functools import partial
+from dataclasses import dataclass, field
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import connection
+
+from . import services
+from .analysis_core import prepare_prompt, parse_response
+from .workers import process_pool_context
+from .llm_scheduler import BACKFILL
+from .metrics import ANALYSIS_STAGE_SECONDS, record_compression
+from .models import Consulting
+from .result_store import save_analysis, save_analysis_batch
+
+logger = logging.getLogger(__name__)
+
+_SENTINEL = object()
+
+
+@dataclass
+class Stage:
+    """
+    파이프라인 단계 정의
+      - name    : 단계 이름 (메트릭 stage 레이블, 결과의 timings 키)
+      - fn      : thread 단계는 fn(ctx) → 갱신할 딕셔너리,
+                  process 단계는 fn(**inputs) → output 키에 저장할 값(output 미지정 시 딕셔너리)
+      - workers : 단계 폭 (process 단계는 프로세스 수)
+      - kind    : "thread" | "process"
+      - inputs  : process 단계에 넘길 {인자 이름: ctx 키} (성공 후 ctx에서 제거하여 메모리 절약)
+      - output  : process 단계 반환값을 저장할 ctx 키
+    """
+    name: str
+    fn: Callable
+    workers: int = 1
+    kind: str = "thread"
+    inputs: Dict[str, str] = field(default_factory=dict)
+    output: Optional[str] = None
+
+
+class StagedPipeline:
+    """크기 제한 큐로 연결된 단계별 스레드/프로세스 파이프라인"""
+
+    def __init__(self, stages: List[Stage], queue_size: int = 32,
+                 on_close: Optional[List[Callable[[], None]]] = None):
+        for stage in stages:
+            if stage.kind not in ("thread", "process"):
+                raise ValueError(f"지원하지 않는 단계 종류입니다: {stage.kind}")
+            if stage.workers < 1:
+                raise ValueError(f"{stage.name} 단계의 worker 수는 1 이상이어야 합니다.")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.on_close = on_close or []  # run()이 끝날 때 호출 (단계가 공유하는 자원 정리)
+
+    def _run_stage(self, stage: Stage, ctx: Dict[str, Any], executor: Optional[ProcessPoolExecutor]) -> None:
+        started = time.perf_counter()
+        try:
+            if stage.kind == "process":
+                kwargs = {arg: ctx[key] for arg, key in stage.inputs.items()}
+                value = executor.submit(stage.fn, **kwargs).result()
+                for key in stage.inputs.values():
+                    ctx.pop(key, None)
+            else:
+                value = stage.fn(ctx)
+            if stage.output:
+                ctx[stage.output] = value
+            elif value:
+                ctx.update(value)
+        except Exception as e:
+            ctx["error"] = e
+            ctx["failed_stage"] = stage.name
+        finally:
+            elapsed = time.perf_counter() - started
+            ANALYSIS_STAGE_SECONDS.observe(elapsed, stage=stage.name)
+            ctx["timings"][stage.name] = round(elapsed * 1000, 2)
+
+    @staticmethod
+    def _put(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+        """큐에 넣습니다. 큐가 가득 찬 동안 파이프라인이 멈추면 넣지 않고 False를 반환합니다."""
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(q: queue.Queue, stop: threading.Event) -> Any:
+        """큐에서 꺼냅니다. 기다리는 동안 파이프라인이 멈추면 종료 신호를 반환합니다."""
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _SENTINEL
+
+    def _worker(self, stage: Stage, in_q: queue.Queue, out_q: queue.Queue,
+                executor: Optional[ProcessPoolExecutor], state: Dict[str, Any],
+                stop: threading.Event) -> None:
+        while True:
+            ctx = self._get(in_q, stop)
+            if ctx is _SENTINEL:
+                break
+            if "error" not in ctx:
+                self._run_stage(stage, ctx, executor)
+            # 다음 단계 큐가 가득 차면 여기서 대기 (backpressure)
+            if not self._put(out_q, ctx, stop):
+                return
+
+        # 이 단계의 마지막 워커가 다음 단계 워커 수만큼 종료 신호를 전달
+        with state["lock"]:
+            state["remaining"] -= 1
+            last = state["remaining"] == 0
+        if last:
+            for _ in range(state["next_workers"]):
+                self._put(out_q, _SENTINEL, stop)
+
+    def run(self, call_ids: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        call_id들을 파이프라인에 흘려보내고 완료되는 순서대로 ctx를 반환합니다.
+        입력은 첫 단계 큐가 빌 때마다 하나씩 읽으므로 제너레이터를 넘겨도 됩니다.
+        """
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        executors: List[ProcessPoolExecutor] = []
+        threads: List[threading.Thread] = []
+        stop = threading.Event()
+
+        def start(target: Callable, *args: Any, name: str) -> None:
+            thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        try:
+            for index, stage in enumerate(self.stages):
+                executor = None
+                if stage.kind == "process":
+                    executor = ProcessPoolExecutor(max_workers=stage.workers, mp_context=process_pool_context())
+                    executors.append(executor)
+                next_workers = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+                state = {"lock": threading.Lock(), "remaining": stage.workers, "next_workers": next_workers}
+                for n in range(stage.workers):
+                    start(self._worker, stage, queues[index], queues[index + 1], executor, state, stop,
+                          name=f"pipeline-{stage.name}-{n}")
+
+            def feed():
+                for call_id in call_ids:
+                    if not self._put(queues[0], {"call_id": call_id, "timings": {}}, stop):
+                        return
+                for _ in range(self.stages[0].workers):
+                    self._put(queues[0], _SENTINEL, stop)
+
+            start(feed, name="pipeline-feed")
+
+            sink = queues[-1]
+            while True:
+                ctx = sink.get()
+                if ctx is _SENTINEL:
+                    break
+                yield ctx
+        finally:
+            # 소비자가 중간에 멈춘 경우: 대기 중인 put/get을 풀어 단계 스레드를 끝냄
+            stop.set()
+            for executor in executors:
+                executor.shutdown(wait=False, cancel_futures=True)
+            for thread in threads:
+                thread.join()
+            for close in self.on_close:
+                close()
+
+
+# ---------------------------------------------------------------------------
+# 상담 분석 단계
+# ---------------------------------------------------------------------------
+
+# 단계 함수는 services의 분석 단계(analyze_consultation과 같은 코드)를 호출만 합니다.
+
+def _fetch(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    return services.fetch_consultation(ctx["call_id"])
+
+
+def _invoke_llm(ctx: Dict[str, Any], priority: str = BACKFILL) -> Dict[str, Any]:
+    # prompt는 escalate 단계에서 재요청할 수 있도록 유지
+    return services.request_analysis(ctx["row"], ctx["scores"], ctx["prompt"], priority, ctx["timings"])
+
+
+def _escalate(ctx: Dict[str, Any], priority: str = BACKFILL) -> Optional[Dict[str, Any]]:
+    return services.escalate_analysis(ctx["call_id"], ctx["tier"], ctx.pop("prompt"), ctx["parsed"], priority)
+
+
+class BatchSaver:
+    """
+    save 단계 워커들이 넘긴 결과를 모아 result_store.save_analysis_batch로 한 번에 저장합니다. (group commit)
+    batch_size건이 모이거나 첫 결과가 들어온 뒤 max_wait초가 지나면 저장하며,
+    저장은 전용 스레드 하나가 하므로 DB 연결도 하나만 사용합니다.
+    save()는 자기 행이 저장될 때까지 기다렸다가 그 행의 오류를 그대로 발생시킵니다.
+    """
+
+    def __init__(self, batch_size: int = 50, max_wait: float = 0.2, projection: Optional[str] = None):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.projection = projection  # 보조 저장소 반영 방식 (None이면 ANALYSIS_PROJECTION)
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def save(self, row: Consulting, result: Dict[str, Any], scores: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="pipeline-batch-saver", daemon=True)
+                self._thread.start()
+        future: Future = Future()
+        self._queue.put((row, result, scores, future))
+        future.result()
+
+    def _next_batch(self) -> List[Any]:
+        item = self._queue.get()
+        if item is _SENTINEL:
+            return []
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _SENTINEL:
+                self._queue.put(_SENTINEL)  # 남은 배치를 저장한 뒤 종료
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        try:
+            while True:
+                batch = self._next_batch()
+                if not batch:
+                    break
+                try:
+                    errors = save_analysis_batch([(row, result, scores) for row, result, scores, _ in batch],
+                                                 self.projection)
+                except Exception as e:
+                    errors = [e] * len(batch)
+                for (_, _, _, future), error in zip(batch, errors):
+                    if error is None:
+                        future.set_result(None)
+                    else:
+                        future.set_exception(error)
+        finally:
+            connection.close()
+
+    def close(self) -> None:
+        """대기 중인 결과를 모두 저장하고 저장 스레드를 종료합니다."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_SENTINEL)
+            thread.join()
+
+
+def _save(ctx: Dict[str, Any], saver: Optional[BatchSaver] = None, projection: Optional[str] = None) -> Dict[str, Any]:
+    result = services.accept_result(ctx.pop("parsed"))
+    save = saver.save if saver is not None else partial(save_analysis, projection=projection)
+    save_error = services.store_result(ctx["call_id"], ctx["row"], result, ctx["scores"], save=save)
+    return {"result": result, "save_error": save_error}
+
+
+def record_outcome(ctx: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    파이프라인 결과(ctx)의 처리 결과 메트릭을 기록하고,
+    analyze_consultation과 같은 형식의 결과(실패 시 None)를 반환합니다.
+    """
+    # 프로세스 워커의 메트릭은 부모 프로세스로 전달되지 않으므로 여기서 기록
+    if "compression" in ctx:
+        record_compression(ctx["compression"])
+
+    if ctx.get("error") is not None:
+        services.record_failure(ctx["call_id"], ctx["failed_stage"], ctx["error"], ctx["timings"])
+        return None
+    # 배치 실행은 진행률 로그(ProgressLogger)로 요약하므로 행별 완료 로그는 DEBUG
+    return services.record_success(ctx["call_id"], ctx["result"], ctx["scores"], ctx["tier"],
+                                   ctx["compression"], ctx["timings"], ctx.get("save_error"),
+                                   log_level=logging.DEBUG)
+
+
+def build_analysis_pipeline(fetch_workers: int = 4,
+                            cpu_workers: Optional[int] = None,
+                            llm_workers: int = 3,
+                            save_workers: int = 2,
+                            queue_size: int = 32,
+                            priority: str = BACKFILL,
+                            token_budget: Optional[int] = None,
+                            save_batch_size: int = 1,
+                            projection: Optional[str] = None) -> StagedPipeline:
+    """
+    상담 분석 파이프라인을 만듭니다.
+
+    Args:
+        fetch_workers: DB 조회 스레드 수
+        cpu_workers: 직렬화·프롬프트 생성 / 응답 파싱 단계 각각의 프로세스 수 (기본값: CPU 코어 수의 절반)
+        llm_workers: LLM 동시 호출 수 (pro 등급 재요청 단계도 같은 수)
+        save_workers: 결과 저장 스레드 수
+        queue_size: 단계 사이 큐 크기
+        priority: LLM 스케줄러 우선순위 클래스
+        token_budget: 프롬프트 토큰 예산 (기본값: PROMPT_TOKEN_BUDGET, 0이면 중복·상투 문구 제거만)
+        save_batch_size: 2 이상이면 결과를 이 크기로 모아 bulk_update로 저장
+                         (save 단계 워커 수는 배치를 채울 수 있도록 최소 save_batch_size로 늘어남)
+        projection: 보조 저장소 반영 방식 (sync | async | off, 기본값: ANALYSIS_PROJECTION)
+    """
+    cpu_workers = cpu_workers or max(1, (os.cpu_count() or 2) // 2)
+    if token_budget is None:
+        token_budget = getattr(settings, "PROMPT_TOKEN_BUDGET", 0)
+    saver = None
+    if save_batch_size > 1:
+        saver = BatchSaver(save_batch_size, max_wait=getattr(settings, "ANALYSIS_SAVE_BATCH_WAIT", 0.2),
+                           projection=projection)
+        # 저장을 기다리는 워커는 DB를 쓰지 않으므로 배치 크기만큼 늘려도 연결 수는 늘지 않음
+        save_workers = max(save_workers, save_batch_size)
+    return StagedPipeline([
+        Stage("fetch", _fetch, workers=fetch_workers),
+        Stage("prepare", partial(prepare_prompt, token_budget=token_budget), workers=cpu_workers, kind="process", inputs={"row": "row_dict"}),
+        Stage("llm", partial(_invoke_llm, priority=priority), workers=llm_workers),
+        Stage("parse", parse_response, workers=cpu_workers, kind="process",
+              inputs={"response_content": "response"}, output="parsed"),
+        Stage("escalate", partial(_escalate, priority=priority), workers=llm_workers),
+        Stage("save", partial(_save, saver=saver, projection=projection), workers=save_workers),
+    ], queue_size=queue_size, on_close=[saver.close] if saver else None)
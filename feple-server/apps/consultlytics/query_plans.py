@@ -0,0 +1,196 @@
+"""
+apps/consultlytics/query_plans.py
+
+배치 러너(run_analysis.py, LLM_automated.py)와 뷰가 실제로 실행하는 쿼리 목록과
+EXPLAIN 결과를 수집·비교하는 유틸리티입니다.
+인덱스 변경이나 쿼리 수정으로 풀 스캔/파일 정렬이 다시 생기면 CI에서 바로 드러나도록
+`explain_queries` 관리 명령에서 사용합니다.
+
+<사용 예시>
+  $ python manage.py explain_queries --output query_plans.json
+  $ python manage.py explain_queries --baseline query_plans.json --fail-on-regression
+
+  # 로컬 SQLite 대체 DB로 실행
+  $ DB_ENGINE=django.db.backends.sqlite3 DB_NAME=plans.sqlite3 python manage.py migrate
+  $ DB_ENGINE=django.db.backends.sqlite3 DB_NAME=plans.sqlite3 python manage.py explain_queries
+"""
+
+import re
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Dict, Any, List
+
+from django.db import connection
+from django.db.models import Avg, Count, QuerySet
+from django.utils import timezone
+
+from .models import Consulting, ConsultingDetail
+
+logger = logging.getLogger(__name__)
+
+# EXPLAIN 대상 쿼리에 사용할 대표 call_id (존재하지 않아도 실행 계획은 동일)
+SAMPLE_CALL_ID = "CALL_001"
+
+
+@dataclass
+class QuerySpec:
+    """
+    EXPLAIN 대상 쿼리 정의
+      - name             : 쿼리 이름 (리포트 키)
+      - source           : 쿼리를 실행하는 코드 위치
+      - build            : QuerySet을 생성하는 함수
+      - allow_full_scan  : 전체 데이터를 읽는 것이 의도된 쿼리인지 여부
+    """
+    name: str
+    source: str
+    build: Callable[[], QuerySet]
+    allow_full_scan: bool = False
+
+
+def get_query_catalog() -> List[QuerySpec]:
+    """러너와 뷰가 실행하는 대표 쿼리 목록을 반환합니다."""
+    since = timezone.now() - timedelta(days=1)
+    return [
+        QuerySpec(
+            name="all_consulting_by_call_id",
+            source="utils.get_all_consulting_data",
+            build=lambda: Consulting.objects.all().order_by('call_id'),
+            allow_full_scan=True,
+        ),
+        QuerySpec(
+            name="consulting_by_call_id",
+            source="services.analyze_consultation / views.analyze_consulting",
+            build=lambda: Consulting.objects.filter(call_id=SAMPLE_CALL_ID),
+        ),
+        QuerySpec(
+            name="latest_consulting",
+            source="utils.get_latest_consulting_data",
+            build=lambda: Consulting.objects.order_by('-created_at')[:1],
+        ),
+        QuerySpec(
+            name="recent_consulting_page",
+            source="Consulting.Meta.ordering",
+            build=lambda: Consulting.objects.all()[:50],
+        ),
+        QuerySpec(
+            name="updated_since",
+            source="증분 처리 (updated_at 기준)",
+            build=lambda: Consulting.objects.filter(updated_at__gte=since).values_list('call_id', flat=True),
+        ),
+        QuerySpec(
+            name="category_report_by_period",
+            source="카테고리별 점수 리포트",
+            build=lambda: (
+                Consulting.objects.filter(call_date__gte=since)
+                .values('mid_category', 'content_category')
+                .annotate(calls=Count('call_id'), avg_final_score=Avg('final_score'))
+                .order_by()
+            ),
+        ),
+        QuerySpec(
+            name="category_report_all",
+            source="카테고리별 점수 리포트 (전체 기간)",
+            build=lambda: (
+                Consulting.objects.values('mid_category', 'content_category')
+                .annotate(calls=Count('call_id'), avg_final_score=Avg('final_score'))
+                .order_by()
+            ),
+            allow_full_scan=True,
+        ),
+        QuerySpec(
+            name="consulting_details",
+            source="Consulting.details (ConsultingDetail.Meta.ordering)",
+            build=lambda: ConsultingDetail.objects.filter(consulting_id=SAMPLE_CALL_ID),
+        ),
+    ]
+
+
+# 벤더별 풀 스캔 / 파일 정렬 탐지 패턴
+FULL_SCAN_PATTERNS = {
+    "mysql": re.compile(r'"access_type":\s*"ALL"'),
+    "sqlite": re.compile(r'\bSCAN (?!.*\bUSING (?:COVERING )?INDEX\b)'),
+    "postgresql": re.compile(r'\bSeq Scan\b'),
+}
+FILESORT_PATTERNS = {
+    "mysql": re.compile(r'"using_filesort":\s*true'),
+    "sqlite": re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+    "postgresql": re.compile(r'^\s*(?:->\s*)?Sort\b', re.MULTILINE),
+}
+
+
+def explain_queryset(queryset: QuerySet) -> str:
+    """QuerySet의 실행 계획을 문자열로 반환합니다."""
+    if connection.vendor == "mysql":
+        return queryset.explain(format="JSON")
+    return queryset.explain()
+
+
+def analyze_plan(plan: str, vendor: str) -> Dict[str, bool]:
+    """실행 계획에서 풀 스캔과 파일 정렬 여부를 판별합니다."""
+    full_scan = FULL_SCAN_PATTERNS.get(vendor)
+    filesort = FILESORT_PATTERNS.get(vendor)
+    return {
+        "full_scan": bool(full_scan and full_scan.search(plan)),
+        "filesort": bool(filesort and filesort.search(plan)),
+    }
+
+
+def collect_query_plans() -> Dict[str, Any]:
+    """카탈로그의 모든 쿼리에 대해 EXPLAIN 결과를 수집합니다."""
+    vendor = connection.vendor
+    plans = {}
+    for spec in get_query_catalog():
+        queryset = spec.build()
+        try:
+            plan = explain_queryset(queryset)
+        except Exception as e:
+            logger.error(f"EXPLAIN 실행 중 오류 ({spec.name}): {str(e)}")
+            plans[spec.name] = {"source": spec.source, "error": str(e)}
+            continue
+
+        plans[spec.name] = {
+            "source": spec.source,
+            "sql": str(queryset.query),
+            "plan": plan,
+            "allow_full_scan": spec.allow_full_scan,
+            **analyze_plan(plan, vendor),
+        }
+
+    return {
+        "vendor": vendor,
+        "generated_at": timezone.now().isoformat(),
+        "queries": plans,
+    }
+
+
+def find_plan_problems(report: Dict[str, Any], baseline: Dict[str, Any] = None) -> List[str]:
+    """
+    수집된 실행 계획에서 문제를 찾습니다.
+
+    Args:
+        report: collect_query_plans() 결과
+        baseline: 이전에 저장한 리포트 (있으면 기준 대비 악화된 항목만 보고)
+
+    Returns:
+        문제 설명 문자열 리스트
+    """
+    problems = []
+    baseline_queries = (baseline or {}).get("queries", {})
+
+    for name, entry in report.get("queries", {}).items():
+        if "error" in entry:
+            problems.append(f"{name}: EXPLAIN 실패 ({entry['error']})")
+            continue
+
+        previous = baseline_queries.get(name, {})
+        for flag, label in (("full_scan", "풀 스캔"), ("filesort", "파일 정렬")):
+            if not entry.get(flag):
+                continue
+            if flag == "full_scan" and entry.get("allow_full_scan"):
+                continue
+            if baseline is not None and previous.get(flag):
+                continue
+            problems.append(f"{name}: {label} 발생 ({entry['source']})")
+
+    return problems
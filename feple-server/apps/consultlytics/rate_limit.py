@@ -0,0 +1,137 @@
+"""
+apps/consultlytics/rate_limit.py
+
+LLM 호출 속도 제한(토큰 버킷)입니다.
+Celery rate_limit 옵션은 워커 단위로만 적용되므로, 여러 노드의 워커가 같은 Gemini 할당량을
+나눠 쓰도록 Redis에 버킷을 두는 전역 제한기를 제공합니다.
+Redis 주소가 없으면(로컬 실행, eager 모드 테스트) 프로세스 내 버킷으로 동작합니다.
+
+<설정 안내>
+- settings.py (또는 .env)
+    ANALYSIS_RATE_LIMIT_PER_MIN = 60     # 분당 LLM 호출 수 (0이면 제한 없음)
+    ANALYSIS_RATE_LIMIT_BURST   = 10     # 순간적으로 허용할 최대 호출 수
+    RATE_LIMIT_REDIS_URL        = "redis://localhost:6379/1"   # 기본값: redis:// 형식의 CELERY_BROKER_URL
+
+<사용 예시>
+  limiter = get_analysis_rate_limiter()
+  if limiter:
+      limiter.acquire()            # 토큰을 얻을 때까지 대기
+      wait = limiter.try_acquire() # 대기하지 않고 필요한 대기 시간(초)만 반환 (0이면 획득)
+      limiter.try_acquire(reserve=3) # 버킷에 토큰 3개를 남겨둘 수 있을 때만 획득 (낮은 우선순위용)
+"""
+
+import time
+import logging
+import threading
+from typing import Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]=버킷 키, ARGV[1]=초당 토큰, ARGV[2]=버킷 크기, ARGV[3]=남겨둘 토큰 수
+# 노드 간 시계 차이를 피하기 위해 Redis 서버 시간(TIME)을 사용
+_REDIS_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local reserve = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= 1 + reserve then
+    tokens = tokens - 1
+else
+    wait = (1 + reserve - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class TokenBucket:
+    """프로세스 내 토큰 버킷 (스레드 안전)"""
+
+    def __init__(self, rate_per_sec: float, capacity: float):
+        self.rate = rate_per_sec
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, reserve: float) -> float:
+        # 남겨둘 토큰이 버킷 크기 이상이면 영영 획득할 수 없으므로 제한
+        return min(max(0.0, reserve), self.capacity - 1)
+
+    def try_acquire(self, reserve: float = 0) -> float:
+        """
+        토큰을 얻으면 0, 아니면 다음 토큰까지 기다려야 할 시간(초)을 반환합니다.
+        reserve를 주면 획득 후에도 버킷에 reserve개 이상 남을 때만 획득합니다.
+        """
+        reserve = self._reserve(reserve)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._ts) * self.rate)
+            self._ts = now
+            if self._tokens >= 1 + reserve:
+                self._tokens -= 1
+                return 0.0
+            return (1 + reserve - self._tokens) / self.rate
+
+    def acquire(self, timeout: Optional[float] = None, reserve: float = 0) -> bool:
+        """토큰을 얻을 때까지 대기합니다. timeout 안에 못 얻으면 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(reserve)
+            if wait <= 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class RedisTokenBucket(TokenBucket):
+    """Redis에 상태를 두어 모든 워커가 공유하는 토큰 버킷"""
+
+    def __init__(self, client, key: str, rate_per_sec: float, capacity: float):
+        super().__init__(rate_per_sec, capacity)
+        self.key = key
+        self._script = client.register_script(_REDIS_BUCKET_SCRIPT)
+
+    def try_acquire(self, reserve: float = 0) -> float:
+        args = [self.rate, self.capacity, self._reserve(reserve)]
+        return float(self._script(keys=[self.key], args=args))
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_analysis_rate_limiter() -> Optional[TokenBucket]:
+    """settings 값으로 LLM 호출 제한기를 만듭니다. (제한이 없으면 None, 프로세스당 1개)"""
+    global _limiter
+    per_min = getattr(settings, "ANALYSIS_RATE_LIMIT_PER_MIN", 0)
+    if not per_min:
+        return None
+
+    with _limiter_lock:
+        if _limiter is not None:
+            return _limiter
+
+        rate = per_min / 60.0
+        burst = getattr(settings, "ANALYSIS_RATE_LIMIT_BURST", 1)
+        redis_url = getattr(settings, "RATE_LIMIT_REDIS_URL", None)
+        if redis_url:
+            import redis
+
+            client = redis.Redis.from_url(redis_url)
+            _limiter = RedisTokenBucket(client, "feple:ratelimit:analysis", rate, burst)
+            logger.info(f"전역 LLM 호출 제한: 분당 {per_min}회 (Redis 공유)")
+        else:
+            _limiter = TokenBucket(rate, burst)
+            logger.info(f"LLM 호출 제한: 분당 {per_min}회 (프로세스 단위)")
+        return _limiter
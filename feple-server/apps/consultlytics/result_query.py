@@ -0,0 +1,260 @@
+"""
+apps/consultlytics/result_query.py
+
+feple_analysis.analysis_results를 조건별로 나누어 스트리밍 조회·내보내기합니다. (Django 비의존)
+전체 결과를 한 번에 SELECT하면 클라이언트가 결과 집합 전체를 메모리에 받아 두므로 다음과 같이 읽습니다.
+
+- keyset 페이지네이션: call_id(unique_call_id 인덱스) 순으로 page_size건씩 "call_id > 마지막 값" 조건으로 읽음
+  → OFFSET 없이 페이지마다 인덱스 범위만 읽고, 문장이 짧게 끝나 긴 트랜잭션·읽기 뷰를 잡지 않음
+- 서버 측 커서(stream_results): 한 페이지 안에서도 fetch_size건씩만 받아 옴
+- 필터: 점수 범위(evaluation_score), 생성 일시(created_at), call_id 접두어(인덱스 범위로 처리)
+- 출력: text(사람이 읽는 형식) / csv / jsonl(.gz/.zst) / parquet (parquet은 선택 패키지 pyarrow 필요)
+중단된 내보내기는 마지막으로 기록된 call_id를 after로 넘겨 이어서 받을 수 있습니다.
+
+<사용 예시>
+  python query_analysis_results.py --min-score 80 --since 2025-01-01 --format csv --output high.csv
+  python query_analysis_results.py --call-id-prefix 2025 --format parquet --output results.parquet
+
+  with get_engine(ANALYSIS).connect() as conn:
+      for batch in iter_result_batches(conn, ResultFilter(min_score=80), page_size=5000):
+          ...
+"""
+
+import csv
+import sys
+import logging
+import datetime
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from .result_stream import JsonlResultWriter, _compression_for
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # 선택 의존성
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+RESULT_COLUMNS = (
+    "call_id", "evaluation_score", "strengths", "weaknesses", "improvements", "coaching_message", "created_at",
+)
+OUTPUT_FORMATS = ("text", "csv", "jsonl", "parquet")
+
+
+def parse_datetime(value: Optional[str], end_of_day: bool = False) -> Optional[datetime.datetime]:
+    """"YYYY-MM-DD" 또는 ISO 일시를 datetime으로 변환합니다. (end_of_day이면 날짜만 준 경우 다음 날 0시)"""
+    if not value:
+        return None
+    if len(value) == 10:
+        day = datetime.datetime.combine(datetime.date.fromisoformat(value), datetime.time())
+        return day + datetime.timedelta(days=1) if end_of_day else day
+    return datetime.datetime.fromisoformat(value)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@dataclass
+class ResultFilter:
+    """조회 조건 (None이면 조건 없음, until은 포함하지 않는 상한)"""
+    min_score: Optional[int] = None
+    max_score: Optional[int] = None
+    since: Optional[datetime.datetime] = None
+    until: Optional[datetime.datetime] = None
+    call_id_prefix: Optional[str] = None
+
+    def clauses(self) -> Tuple[List[str], Dict[str, Any]]:
+        conditions, params = [], {}
+        if self.min_score is not None:
+            conditions.append("evaluation_score >= :min_score")
+            params["min_score"] = self.min_score
+        if self.max_score is not None:
+            conditions.append("evaluation_score <= :max_score")
+            params["max_score"] = self.max_score
+        if self.since is not None:
+            conditions.append("created_at >= :since")
+            params["since"] = self.since
+        if self.until is not None:
+            conditions.append("created_at < :until")
+            params["until"] = self.until
+        if self.call_id_prefix:
+            conditions.append("call_id LIKE :call_id_prefix")
+            params["call_id_prefix"] = _escape_like(self.call_id_prefix) + "%"
+        return conditions, params
+
+
+def build_page_query(filters: ResultFilter, after: Optional[str], page_size: int) -> Tuple[Any, Dict[str, Any]]:
+    """keyset 페이지 하나를 읽는 SELECT 문과 바인딩 값"""
+    conditions, params = filters.clauses()
+    if after is not None:
+        conditions.append("call_id > :after")
+        params["after"] = after
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    params["page_size"] = page_size
+    sql = text(f"""
+        SELECT {', '.join(RESULT_COLUMNS)}
+        FROM analysis_results
+        {where}
+        ORDER BY call_id
+        LIMIT :page_size
+    """)
+    return sql, params
+
+
+def iter_result_batches(conn: Connection, filters: Optional[ResultFilter] = None,
+                        page_size: int = 5000, fetch_size: int = 1000,
+                        after: Optional[str] = None, limit: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    조건에 맞는 결과를 call_id 순으로 최대 fetch_size건씩 묶어 반환합니다.
+
+    Args:
+        conn: feple_analysis 연결 (db.get_engine(ANALYSIS).connect())
+        filters: 조회 조건
+        page_size: 한 SELECT 문(keyset 페이지)에서 읽을 최대 행 수
+        fetch_size: 서버 측 커서에서 한 번에 받아 올 행 수 (= 반환 묶음 크기)
+        after: 이 call_id 다음부터 조회 (중단된 내보내기 이어 받기)
+        limit: 전체 최대 행 수
+    """
+    filters = filters or ResultFilter()
+    streaming = conn.execution_options(stream_results=True, max_row_buffer=fetch_size)
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        sql, params = build_page_query(filters, after, size)
+        result = streaming.execute(sql, params)
+        page_rows = 0
+        try:
+            for chunk in result.mappings().partitions(fetch_size):
+                batch = [dict(row) for row in chunk]
+                page_rows += len(batch)
+                after = batch[-1]["call_id"]
+                yield batch
+        finally:
+            result.close()
+        if remaining is not None:
+            remaining -= page_rows
+        if page_rows < size:
+            return
+
+
+class TextSink:
+    """사람이 읽는 형식 (기존 query_analysis_results.py 출력)"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def write_batch(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.stream.write(
+                f"\nCALL_ID: {row['call_id']}\n"
+                f"평가점수: {row['evaluation_score']}\n"
+                f"상담자 강점: {row['strengths']}\n"
+                f"상담자 단점: {row['weaknesses']}\n"
+                f"개선점: {row['improvements']}\n"
+                f"코칭 멘트: {row['coaching_message']}\n"
+                f"분석 시간: {row['created_at']}\n"
+                f"{'-' * 80}\n"
+            )
+
+    def close(self) -> None:
+        self.stream.flush()
+
+
+class CsvSink:
+    def __init__(self, path: str):
+        self._file = sys.stdout if path == "-" else open(path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=RESULT_COLUMNS)
+        self._writer.writeheader()
+
+    def write_batch(self, rows: List[Dict[str, Any]]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        if self._file is sys.stdout:
+            self._file.flush()
+        else:
+            self._file.close()
+
+
+class JsonlSink:
+    def __init__(self, path: str):
+        self._writer = JsonlResultWriter(path, compression=_compression_for(path))
+
+    def write_batch(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            self._writer.write(row)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def _result_schema():
+    return pyarrow.schema([
+        ("call_id", pyarrow.string()),
+        ("evaluation_score", pyarrow.int32()),
+        ("strengths", pyarrow.string()),
+        ("weaknesses", pyarrow.string()),
+        ("improvements", pyarrow.string()),
+        ("coaching_message", pyarrow.string()),
+        ("created_at", pyarrow.timestamp("s")),
+    ])
+
+
+class ParquetSink:
+    """묶음마다 row group 하나씩 추가하는 Parquet writer (파일 전체를 메모리에 두지 않음)"""
+
+    def __init__(self, path: str, compression: str = "zstd"):
+        if pyarrow is None:
+            raise RuntimeError("parquet 출력을 사용하려면 pyarrow 패키지를 설치하세요. (pip install pyarrow)")
+        self.schema = _result_schema()
+        self._writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression=compression)
+
+    def write_batch(self, rows: List[Dict[str, Any]]) -> None:
+        self._writer.write_table(pyarrow.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def open_sink(output_format: str, path: Optional[str] = None) -> Any:
+    """출력 형식에 맞는 sink (write_batch(rows), close())"""
+    if output_format == "text":
+        return TextSink()
+    if output_format == "csv":
+        return CsvSink(path or "-")
+    if output_format == "jsonl":
+        if not path or path == "-":
+            raise ValueError("jsonl 출력에는 --output 경로가 필요합니다.")
+        return JsonlSink(path)
+    if output_format == "parquet":
+        if not path or path == "-":
+            raise ValueError("parquet 출력에는 --output 경로가 필요합니다.")
+        return ParquetSink(path)
+    raise ValueError(f"지원하지 않는 출력 형식입니다: {output_format}")
+
+
+def export_results(conn: Connection, sink: Any, filters: Optional[ResultFilter] = None,
+                   page_size: int = 5000, fetch_size: int = 1000,
+                   after: Optional[str] = None, limit: Optional[int] = None) -> Tuple[int, Optional[str]]:
+    """
+    조건에 맞는 결과를 sink로 내보냅니다.
+
+    Returns:
+        (내보낸 행 수, 마지막 call_id) - 중단 시 마지막 call_id를 after로 넘겨 이어 받기
+    """
+    count, last = 0, after
+    try:
+        for batch in iter_result_batches(conn, filters, page_size, fetch_size, after, limit):
+            sink.write_batch(batch)
+            count += len(batch)
+            last = batch[-1]["call_id"]
+    finally:
+        sink.close()
+        logger.info(f"분석 결과 내보내기: {count}건 (마지막 call_id: {last})")
+    return count, last
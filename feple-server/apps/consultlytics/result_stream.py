@@ -0,0 +1,189 @@
+"""
+apps/consultlytics/result_stream.py
+
+분석 결과를 JSONL(한 줄에 JSON 하나)로 스트리밍 저장·조회합니다.
+결과 전체를 리스트로 들고 있다가 마지막에 한 번에 쓰는 대신, 결과가 나올 때마다
+한 줄씩 추가하고 flush하므로 실행 규모와 관계없이 메모리 사용량이 일정합니다.
+
+- JsonlResultWriter : 추가 전용 writer (gzip / zstd 압축, 용량 기준 파일 회전)
+- iter_results      : JSONL(.gz/.zst 포함) 또는 기존 JSON 배열 파일을 한 건씩 읽는 reader
+- iter_batches      : reader 결과를 고정 크기 배치로 묶음
+
+Django에 의존하지 않으므로 save_analysis_results.py 같은 단독 스크립트에서도 사용할 수 있습니다.
+zstd 압축은 선택 패키지(zstandard)가 설치된 경우에만 사용할 수 있습니다.
+
+<파일 이름 규칙>
+  analysis_results.jsonl            # 회전 없음, 압축 없음
+  analysis_results.0001.jsonl.gz    # max_bytes 지정 시 파트 번호가 붙음
+
+<사용 예시>
+  with JsonlResultWriter("analysis_results.jsonl", compression="gzip", max_bytes=256 * 1024 * 1024) as writer:
+      writer.write(result)
+
+  for batch in iter_batches(iter_results(["analysis_results.jsonl.gz"]), 500):
+      ...
+"""
+
+import io
+import os
+import glob
+import gzip
+import json
+import logging
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+try:
+    import zstandard
+except ImportError:  # 선택 의존성
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def _open_binary(path: str, mode: str, compression: Optional[str]) -> io.IOBase:
+    """압축 방식에 맞는 바이너리 파일 객체를 엽니다. (mode: "ab" 또는 "rb")"""
+    if compression == "gzip":
+        return gzip.open(path, mode)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd 압축을 사용하려면 zstandard 패키지를 설치하세요. (pip install zstandard)")
+        raw = open(path, mode)
+        if mode.startswith("r"):
+            return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+    return open(path, mode)
+
+
+def _compression_for(path: str) -> Optional[str]:
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return None
+
+
+class JsonlResultWriter:
+    """
+    분석 결과 추가 전용 JSONL writer. 여러 스레드에서 공유할 수 있습니다.
+
+    Args:
+        path: 기본 파일 경로 (예: analysis_results.jsonl, 압축 확장자는 자동으로 붙음)
+        compression: None | "gzip" | "zstd"
+        max_bytes: 파트 하나의 최대 크기(압축 전 바이트, 0이면 회전하지 않음)
+    """
+
+    def __init__(self, path: str, compression: Optional[str] = None, max_bytes: int = 0):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"지원하지 않는 압축 방식입니다: {compression}")
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.stem = path[:-len(".jsonl")] if path.endswith(".jsonl") else path
+        self.count = 0
+        self.paths: List[str] = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._part = 0
+        self._part_bytes = 0
+        directory = os.path.dirname(self.stem)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _next_path(self) -> str:
+        suffix = ".jsonl" + COMPRESSION_SUFFIXES[self.compression]
+        if not self.max_bytes:
+            return self.stem + suffix
+        # 이전 실행이 남긴 파트는 건드리지 않고 다음 번호부터 씀
+        while True:
+            self._part += 1
+            path = f"{self.stem}.{self._part:04d}{suffix}"
+            if not os.path.exists(path):
+                return path
+
+    def _open_part(self) -> None:
+        path = self._next_path()
+        self._file = _open_binary(path, "ab", self.compression)
+        self._part_bytes = 0
+        self.paths.append(path)
+
+    def write(self, result: Dict[str, Any]) -> None:
+        """결과 한 건을 한 줄로 기록하고 즉시 flush합니다."""
+        line = (json.dumps(result, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                self._open_part()
+            elif self.max_bytes and self._part_bytes + len(line) > self.max_bytes and self._part_bytes:
+                self._file.close()
+                self._open_part()
+            self._file.write(line)
+            self._file.flush()
+            self._part_bytes += len(line)
+            self.count += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "JsonlResultWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def expand_paths(patterns: Sequence[str]) -> List[str]:
+    """
+    glob 패턴을 실제 파일 목록으로 펼칩니다. (파트 번호 순으로 정렬)
+    와일드카드가 없는 경로는 파일이 없어도 그대로 남겨 읽을 때 오류가 나도록 합니다.
+    """
+    paths: List[str] = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern)))
+        else:
+            paths.append(pattern)
+    return paths
+
+
+def iter_results(paths: Sequence[str]) -> Iterator[Dict[str, Any]]:
+    """
+    결과 파일들을 한 건씩 읽습니다.
+    .jsonl / .jsonl.gz / .jsonl.zst 는 스트리밍으로 읽고,
+    기존 형식(.json, 결과 배열 하나)은 호환을 위해 통째로 읽습니다.
+    """
+    for path in expand_paths(paths):
+        if path.endswith(".json"):
+            with open(path, "r", encoding="utf-8") as f:
+                yield from json.load(f)
+            continue
+
+        with _open_binary(path, "rb", _compression_for(path)) as raw:
+            try:
+                for line in io.TextIOWrapper(raw, encoding="utf-8"):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # 기록 도중 중단되어 마지막 줄이 잘린 경우
+                        logger.warning(f"잘못된 JSONL 줄을 건너뜁니다: {path}")
+            except EOFError:
+                # 실행이 강제 종료되어 압축 스트림 끝이 잘린 경우: 마지막 flush까지의 결과는 유효함
+                logger.warning(f"압축 파일 끝이 잘려 있어 읽을 수 있는 부분까지만 사용합니다: {path}")
+
+
+def iter_batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """이터러블을 size개씩 묶어 반환합니다."""
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
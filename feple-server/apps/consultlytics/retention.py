@@ -0,0 +1,238 @@
+"""
+apps/consultlytics/retention.py
+
+보존 기간이 지난 상담 데이터(consulting, consulting_detail)와 분석 결과
+(feple_analysis.analysis_results)를 날짜별 gzip JSONL 파일로 옮기고 원본 테이블에서 삭제하는
+아카이브 작업을 정의합니다.
+
+consulting 테이블은 call_id가, analysis_results 테이블은 call_id 유니크 키가 있어
+MySQL RANGE 파티셔닝(파티션 키가 모든 유니크 키에 포함되어야 함)을 바로 적용할 수 없습니다.
+대신 call_date / created_at 기준 일자 파티션 단위로 파일을 나누어 보관하고,
+운영 테이블에는 보존 기간 내의 데이터만 남겨 인덱스와 백업 크기를 일정하게 유지합니다.
+
+<설정 안내>
+- settings.py (또는 .env)
+    CONSULTING_RETENTION_DAYS = 365   # 0이면 보관 기간 제한 없음
+    ANALYSIS_RETENTION_DAYS   = 365
+    ARCHIVE_ROOT              = "archive"
+    ARCHIVE_BATCH_SIZE        = 1000
+
+<아카이브 파일 구조>
+  {ARCHIVE_ROOT}/consulting/2024/06/consulting-2024-06-01.jsonl.gz
+  {ARCHIVE_ROOT}/analysis_results/2024/06/analysis_results-2024-06-01.jsonl.gz
+  - 한 줄에 한 행(JSON), consulting 행에는 details(발화 목록)가 함께 저장됩니다.
+  - 파일 기록 후 원본을 삭제하므로 중간에 중단되면 다음 실행에서 같은 행이 중복 기록될 수 있습니다.
+
+<사용 예시>
+  $ python manage.py archive_old_data --dry-run
+  $ python manage.py archive_old_data --consulting-days 180
+"""
+
+import os
+import gzip
+import json
+import logging
+import datetime
+from dataclasses import dataclass
+from typing import Dict, Any, List, Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from sqlalchemy import bindparam, text
+
+from .models import Consulting, ConsultingDetail
+from .db import ANALYSIS, get_engine
+from .utils import DateTimeEncoder
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    보존 정책
+      - consulting_days : consulting 보관 일수 (0이면 아카이브하지 않음)
+      - analysis_days   : analysis_results 보관 일수 (0이면 아카이브하지 않음)
+      - archive_root    : 아카이브 파일 저장 루트 디렉토리
+      - batch_size      : 한 번에 옮길 행 수
+    """
+    consulting_days: int = 0
+    analysis_days: int = 0
+    archive_root: str = "archive"
+    batch_size: int = 1000
+
+    @classmethod
+    def from_settings(cls, **overrides) -> "RetentionPolicy":
+        """settings 값으로 정책을 만들고, None이 아닌 overrides 값으로 덮어씁니다."""
+        policy = cls(
+            consulting_days=getattr(settings, "CONSULTING_RETENTION_DAYS", 0),
+            analysis_days=getattr(settings, "ANALYSIS_RETENTION_DAYS", 0),
+            archive_root=getattr(settings, "ARCHIVE_ROOT", "archive"),
+            batch_size=getattr(settings, "ARCHIVE_BATCH_SIZE", 1000),
+        )
+        for key, value in overrides.items():
+            if value is not None:
+                setattr(policy, key, value)
+        return policy
+
+    def cutoff(self, days: int) -> Optional[datetime.datetime]:
+        """보관 기준 시각 (이 시각 이전 데이터가 아카이브 대상)"""
+        if days <= 0:
+            return None
+        return timezone.now() - datetime.timedelta(days=days)
+
+
+def archive_path(archive_root: str, table: str, day: datetime.date) -> str:
+    """일자 파티션에 해당하는 아카이브 파일 경로를 반환합니다."""
+    return os.path.join(
+        archive_root, table, f"{day:%Y}", f"{day:%m}", f"{table}-{day:%Y-%m-%d}.jsonl.gz"
+    )
+
+
+def _append_partitioned(archive_root: str, table: str, rows: Iterable[Dict[str, Any]], date_key: str) -> int:
+    """행들을 일자 파티션별 gzip JSONL 파일에 추가하고 기록한 행 수를 반환합니다."""
+    partitions: Dict[datetime.date, List[Dict[str, Any]]] = {}
+    for row in rows:
+        value = row.get(date_key)
+        day = value.date() if isinstance(value, datetime.datetime) else datetime.date.min
+        partitions.setdefault(day, []).append(row)
+
+    written = 0
+    for day, day_rows in partitions.items():
+        path = archive_path(archive_root, table, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # gzip 멤버를 이어 붙이는 방식이므로 gzip.open으로 한 번에 읽을 수 있습니다.
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for row in day_rows:
+                f.write(json.dumps(row, ensure_ascii=False, cls=DateTimeEncoder))
+                f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        written += len(day_rows)
+    return written
+
+
+def _consulting_to_dict(row: Consulting, details: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """auto_now 필드까지 포함한 consulting 행 전체를 딕셔너리로 변환합니다."""
+    data = {field.attname: getattr(row, field.attname) for field in Consulting._meta.concrete_fields}
+    data["details"] = details
+    return data
+
+
+def archive_consulting(policy: RetentionPolicy, dry_run: bool = False) -> int:
+    """
+    보존 기간이 지난 consulting / consulting_detail 행을 아카이브합니다.
+
+    Args:
+        policy: 보존 정책
+        dry_run: True이면 대상 건수만 계산
+
+    Returns:
+        아카이브(또는 대상) 행 수
+    """
+    cutoff = policy.cutoff(policy.consulting_days)
+    if cutoff is None:
+        logger.info("consulting 보존 기간이 설정되지 않아 아카이브를 건너뜁니다.")
+        return 0
+
+    queryset = Consulting.objects.filter(call_date__lt=cutoff)
+    if dry_run:
+        return queryset.count()
+
+    total = 0
+    while True:
+        rows = list(queryset.order_by('call_date', 'call_id')[:policy.batch_size])
+        if not rows:
+            break
+
+        call_ids = [row.call_id for row in rows]
+        details: Dict[str, List[Dict[str, Any]]] = {}
+        for detail in ConsultingDetail.objects.filter(consulting_id__in=call_ids).values(
+            'consulting_id', 'speaker', 'content', 'timestamp'
+        ):
+            details.setdefault(detail.pop('consulting_id'), []).append(detail)
+
+        _append_partitioned(
+            policy.archive_root,
+            Consulting._meta.db_table,
+            (_consulting_to_dict(row, details.get(row.call_id, [])) for row in rows),
+            date_key="call_date",
+        )
+
+        with transaction.atomic():
+            ConsultingDetail.objects.filter(consulting_id__in=call_ids).delete()
+            Consulting.objects.filter(call_id__in=call_ids).delete()
+
+        total += len(rows)
+        logger.info(f"consulting 아카이브 진행: {total}건")
+
+    logger.info(f"consulting 아카이브 완료: {total}건 (기준 시각 {cutoff.isoformat()})")
+    return total
+
+
+def _db_cutoff_sql(dialect: str) -> str:
+    """:days일 전 시각을 DB 세션 시각 기준으로 계산하는 SQL 식"""
+    if dialect == "sqlite":
+        # SQLite의 CURRENT_TIMESTAMP 기본값과 같은 UTC 문자열
+        return "datetime('now', '-' || :days || ' days')"
+    # MySQL: TIMESTAMP 컬럼과 NOW()는 모두 세션 타임존 값
+    return "NOW() - INTERVAL :days DAY"
+
+
+def archive_analysis_results(policy: RetentionPolicy, dry_run: bool = False) -> int:
+    """
+    보존 기간이 지난 feple_analysis.analysis_results 행을 아카이브합니다.
+
+    Args:
+        policy: 보존 정책
+        dry_run: True이면 대상 건수만 계산
+
+    Returns:
+        아카이브(또는 대상) 행 수
+    """
+    cutoff = policy.cutoff(policy.analysis_days)
+    if cutoff is None:
+        logger.info("analysis_results 보존 기간이 설정되지 않아 아카이브를 건너뜁니다.")
+        return 0
+
+    engine = get_engine(ANALYSIS)
+    # analysis_results.created_at(TIMESTAMP)은 세션 타임존 값으로 비교되므로 기준 시각도 DB에서 계산
+    params = {"days": policy.analysis_days}
+    expired = f"created_at < {_db_cutoff_sql(engine.dialect.name)}"
+
+    with engine.connect() as conn:
+        if dry_run:
+            return conn.execute(text(f"SELECT COUNT(*) FROM analysis_results WHERE {expired}"), params).scalar()
+
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            rows = [
+                dict(row._mapping)
+                for row in conn.execute(
+                    text(f"""
+                        SELECT * FROM analysis_results
+                        WHERE {expired}
+                        ORDER BY created_at, id
+                        LIMIT :limit
+                    """),
+                    {**params, "limit": policy.batch_size},
+                )
+            ]
+            if not rows:
+                break
+
+            _append_partitioned(policy.archive_root, "analysis_results", rows, date_key="created_at")
+            conn.execute(
+                text("DELETE FROM analysis_results WHERE id IN :ids").bindparams(
+                    bindparam("ids", expanding=True)
+                ),
+                {"ids": [row["id"] for row in rows]},
+            )
+
+        total += len(rows)
+        logger.info(f"analysis_results 아카이브 진행: {total}건")
+
+    logger.info(f"analysis_results 아카이브 완료: {total}건 (기준 시각 {cutoff.isoformat()})")
+    return total
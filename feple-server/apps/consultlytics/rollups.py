@@ -0,0 +1,239 @@
+"""
+apps/consultlytics/rollups.py
+
+일자·카테고리별 점수 사전 집계(DailyScoreRollup)를 관리합니다.
+리포트/대시보드가 consulting 전체를 매번 GROUP BY 하지 않고
+(일수 × 카테고리 수) 크기의 집계 테이블만 읽도록 하기 위한 모듈입니다.
+
+- record_analysis    : analyze_consultation이 점수를 저장할 때 호출되어 집계를 증분 갱신
+- rebuild_rollups    : consulting 테이블에서 기간 단위로 집계를 다시 계산 (백필)
+- get_daily_rollups  : 일자별 평균 조회
+- get_category_summary : 기간 전체의 카테고리별 평균 조회
+
+집계는 consulting에 남아 있는 행을 기준으로 다시 계산되므로, 보존 기간이 지나
+아카이브된 기간(retention.py)에는 rebuild_rollups를 실행하지 마세요.
+
+분석 저장과 동시에 실행해도 되도록
+- record_analysis는 consulting 저장과 같은 트랜잭션에서 집계 행을 잠그고(select_for_update) 갱신하고,
+- rebuild_rollups는 기간 내 집계 행을 먼저 잠그고 지운 뒤 같은 트랜잭션에서 다시 계산합니다.
+재계산 전에 커밋된 분석은 재계산 결과에, 재계산 중 잠금을 기다린 분석은 새 집계 행에 한 번만 반영됩니다.
+(MySQL InnoDB는 범위 잠금으로 기간 내 새 집계 행 추가도 막고, SQLite는 쓰기 트랜잭션이 하나뿐입니다)
+
+집계 일자는 증분 갱신과 재계산 모두 Python에서 현재 타임존(TIME_ZONE) 기준으로 계산합니다.
+(DB의 날짜 변환은 USE_TZ=True일 때 MySQL 타임존 테이블이 없으면 NULL을 반환)
+
+<사용 예시>
+  from apps.consultlytics.rollups import get_category_summary
+  summary = get_category_summary(datetime.date(2024, 6, 1), datetime.date(2024, 6, 30))
+"""
+
+import datetime
+import logging
+from typing import Dict, Any, List, Optional
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Consulting, DailyScoreRollup
+
+logger = logging.getLogger(__name__)
+
+# 집계 합계 필드 → consulting 원본 필드
+ROLLUP_METRICS = {
+    "final_score_sum": "final_score",
+    "efficiency_score_sum": "efficiency_score",
+    "manual_compliance_ratio_sum": "manual_compliance_ratio",
+    "score_sum": "score",
+    "csr_emotion_score_sum": "csr_emotion_score",
+    "customer_emotion_score_sum": "customer_emotion_score",
+}
+
+
+def _local_day(call_date: Optional[datetime.datetime]) -> datetime.date:
+    """상담 일시가 속하는 현재 타임존 기준 일자"""
+    call_date = call_date or timezone.now()
+    if timezone.is_aware(call_date):
+        return timezone.localdate(call_date)
+    return call_date.date()
+
+
+def rollup_key(row: Consulting) -> Dict[str, Any]:
+    """상담 데이터가 속하는 집계 행의 키를 반환합니다."""
+    return {
+        "day": _local_day(row.call_date),
+        "mid_category": row.mid_category or "",
+        "content_category": row.content_category or "",
+    }
+
+
+def _start_of_day(day: datetime.date) -> datetime.datetime:
+    """현재 타임존 기준 해당 일자 0시 시각"""
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def record_analysis(row: Consulting,
+                    previous_score: Optional[int] = None,
+                    previous_manual_ratio: Optional[float] = None) -> None:
+    """
+    분석 결과가 저장된 상담 데이터를 집계에 반영합니다.
+
+    consulting 저장과 같은 트랜잭션 안에서 호출해야 합니다.
+
+    Args:
+        row: 분석 점수(score, manual_compliance_ratio)가 기록된 상담 데이터
+        previous_score: 분석 전 score 값 (None이면 처음 분석된 상담)
+        previous_manual_ratio: 분석 전 manual_compliance_ratio 값
+    """
+    # 잠금 읽기: rebuild_rollups가 실행 중이면 끝날 때까지 기다렸다가 새로 만든 집계 행을 읽음
+    rollup, created = DailyScoreRollup.objects.select_for_update().get_or_create(**rollup_key(row))
+
+    if previous_score is None or created:
+        # 처음 분석된 상담, 또는 집계 행이 없어 이전 분석이 반영되지 않은 재분석: 건수와 모든 점수 합계를 더함
+        updates = {"call_count": F("call_count") + 1}
+        for sum_field, source_field in ROLLUP_METRICS.items():
+            updates[sum_field] = F(sum_field) + float(getattr(row, source_field) or 0)
+    else:
+        # 재분석: 분석으로 바뀐 값의 차이만 반영
+        updates = {
+            "score_sum": F("score_sum") + float((row.score or 0) - previous_score),
+            "manual_compliance_ratio_sum": F("manual_compliance_ratio_sum")
+            + float((row.manual_compliance_ratio or 0) - (previous_manual_ratio or 0)),
+        }
+
+    # 동시에 여러 워커가 갱신해도 값이 유실되지 않도록 DB에서 원자적으로 더함
+    DailyScoreRollup.objects.filter(pk=rollup.pk).update(updated_at=timezone.now(), **updates)
+
+
+def rebuild_rollups(start: Optional[datetime.date] = None,
+                    end: Optional[datetime.date] = None) -> int:
+    """
+    consulting 테이블에서 기간 내 집계를 다시 계산합니다.
+    기간 내 집계 행을 잠근 채 다시 계산하므로, 그동안 같은 기간의 분석 저장은 잠금을 기다립니다.
+
+    Args:
+        start: 시작 일자 (포함, None이면 처음부터)
+        end: 종료 일자 (포함, None이면 끝까지)
+
+    Returns:
+        생성된 집계 행 수
+    """
+    # call_date 인덱스를 쓰도록 DATE() 변환 대신 시각 범위로 조회
+    queryset = Consulting.objects.filter(score__isnull=False)
+    if start:
+        queryset = queryset.filter(call_date__gte=_start_of_day(start))
+    if end:
+        queryset = queryset.filter(call_date__lt=_start_of_day(end + datetime.timedelta(days=1)))
+
+    fields = ["call_date", "mid_category", "content_category", *ROLLUP_METRICS.values()]
+    rows = queryset.order_by().values_list(*fields)
+
+    existing = DailyScoreRollup.objects.all()
+    if start:
+        existing = existing.filter(day__gte=start)
+    if end:
+        existing = existing.filter(day__lte=end)
+
+    with transaction.atomic():
+        # 기간을 먼저 잠그고 지운 뒤 집계해야, 집계 이후 커밋된 분석의 증분이 지워지거나 두 번 더해지지 않음
+        list(existing.select_for_update().values_list("pk", flat=True))
+        existing.delete()
+
+        # 일자는 record_analysis와 같은 기준(_local_day)으로 계산, NULL 카테고리는 빈 문자열 키로 합침
+        merged: Dict[tuple, DailyScoreRollup] = {}
+        for call_date, mid_category, content_category, *values in rows.iterator(chunk_size=2000):
+            key = (_local_day(call_date), mid_category or "", content_category or "")
+            rollup = merged.get(key)
+            if rollup is None:
+                rollup = merged[key] = DailyScoreRollup(
+                    day=key[0], mid_category=key[1], content_category=key[2]
+                )
+            rollup.call_count += 1
+            for sum_field, value in zip(ROLLUP_METRICS, values):
+                setattr(rollup, sum_field, getattr(rollup, sum_field) + float(value or 0))
+
+        DailyScoreRollup.objects.bulk_create(merged.values(), batch_size=1000)
+
+    logger.info(f"집계 재계산 완료: {len(merged)}개 행 ({start} ~ {end})")
+    return len(merged)
+
+
+def _averages(call_count: int, totals: Dict[str, float]) -> Dict[str, Optional[float]]:
+    """합계를 평균으로 변환합니다."""
+    averages = {}
+    for sum_field in ROLLUP_METRICS:
+        name = "avg_" + sum_field[:-len("_sum")]
+        averages[name] = round(totals[sum_field] / call_count, 4) if call_count else None
+    return averages
+
+
+def get_daily_rollups(start: datetime.date,
+                      end: datetime.date,
+                      mid_category: Optional[str] = None,
+                      content_category: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    기간 내 일자·카테고리별 평균 점수를 조회합니다.
+
+    Args:
+        start: 시작 일자 (포함)
+        end: 종료 일자 (포함)
+        mid_category: 메인 카테고리 필터
+        content_category: 서브 카테고리 필터
+
+    Returns:
+        일자·카테고리별 건수와 평균 점수 리스트
+    """
+    queryset = DailyScoreRollup.objects.filter(day__gte=start, day__lte=end)
+    if mid_category is not None:
+        queryset = queryset.filter(mid_category=mid_category)
+    if content_category is not None:
+        queryset = queryset.filter(content_category=content_category)
+
+    results = []
+    for rollup in queryset.order_by("day", "mid_category", "content_category"):
+        totals = {sum_field: getattr(rollup, sum_field) for sum_field in ROLLUP_METRICS}
+        results.append({
+            "day": rollup.day.isoformat(),
+            "mid_category": rollup.mid_category,
+            "content_category": rollup.content_category,
+            "call_count": rollup.call_count,
+            **_averages(rollup.call_count, totals),
+        })
+    return results
+
+
+def get_category_summary(start: datetime.date,
+                         end: datetime.date,
+                         mid_category: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    기간 전체의 카테고리별 평균 점수를 조회합니다.
+
+    Args:
+        start: 시작 일자 (포함)
+        end: 종료 일자 (포함)
+        mid_category: 메인 카테고리 필터
+
+    Returns:
+        카테고리별 건수와 평균 점수 리스트
+    """
+    queryset = DailyScoreRollup.objects.filter(day__gte=start, day__lte=end)
+    if mid_category is not None:
+        queryset = queryset.filter(mid_category=mid_category)
+
+    # 모델 필드와 이름이 겹치지 않도록 total_ 접두사로 집계
+    aggregated = (
+        queryset.values("mid_category", "content_category")
+        .annotate(total_calls=Sum("call_count"), **{f"total_{f}": Sum(f) for f in ROLLUP_METRICS})
+        .order_by("mid_category", "content_category")
+    )
+
+    results = []
+    for entry in aggregated:
+        totals = {sum_field: entry[f"total_{sum_field}"] or 0.0 for sum_field in ROLLUP_METRICS}
+        results.append({
+            "mid_category": entry["mid_category"],
+            "content_category": entry["content_category"],
+            "call_count": entry["total_calls"],
+            **_averages(entry["total_calls"], totals),
+        })
+    return results
@@ -1,12 +1,9 @@
 import os
-import json
+import time
 import logging
-from typing import Dict, Any, Optional
+from functools import partial
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
-import google.generativeai as genai
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts import PromptTemplate
-import datetime
 import django
 from django.conf import settings
 from django.forms.models import model_to_dict
@@ -20,276 +17,273 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
 from apps.consultlytics.models import Consulting
-from .utils import validate_api_key, safe_get_attribute
+from .utils import validate_api_key
+# 결과 저장(consulting 갱신 + 보조 저장소 outbox)은 result_store의 단일 경로를 사용
+from .result_store import save_analysis
+from .llm_scheduler import INTERACTIVE, acquire_llm_slot, try_llm_slot
+from .llm_calls import LLMDeadlineExceeded, invoke_llm
+from .context_cache import with_context_cache
+from .llm_providers import GEMINI, get_provider, provider_name, with_recording
+from .model_router import (
+    PRO, fast_tier_available, route_tier, needs_escalation, record_tier_call, record_escalation
+)
+from .metrics import (
+    stage_timer, estimate_tokens, record_compression, ANALYSIS_TOTAL, PARSE_FALLBACK_TOTAL,
+    PROMPT_TOKENS, RESPONSE_TOKENS
+)
+# 점수 계산·프롬프트 생성·응답 파싱은 Django에 의존하지 않는 analysis_core에 있음
+# (pipeline.py의 프로세스 풀 워커에서도 같은 코드를 사용)
+from .analysis_core import ANALYSIS_PREFIX, prepare_prompt, parse_response
 
 # 로거 설정
 logger = logging.getLogger(__name__)
 
-# Google API 설정 및 유효성 검사
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-
-if not validate_api_key():
+# Google API 키 유효성 검사 (offline 제공자는 키가 필요 없음)
+if provider_name() == GEMINI and not validate_api_key():
     logger.error("Google API 키 설정에 문제가 있습니다.")
     raise ValueError("Google API 키가 올바르게 설정되지 않았습니다.")
 
-genai.configure(api_key=GOOGLE_API_KEY)
+def _build_llm(model: str) -> Any:
+    # LLM_PROVIDER(gemini/offline)에 맞는 모델별 공유 클라이언트
+    # CONTEXT_CACHE_ENABLED이면 고정 지시문은 제공자 측 캐시로 보냄
+    # LLM_RECORD_PATH가 있으면 전체 프롬프트 기준으로 호출을 기록 (캐시 호출 포함)
+    return with_recording(with_context_cache(get_provider(model), model, ANALYSIS_PREFIX, temperature=0.2))
 
-# Gemini 모델 초기화 (에러 처리 포함)
+# LLM 모델 초기화 (에러 처리 포함)
 try:
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-1.5-pro",
-        temperature=0.2,
-        google_api_key=GOOGLE_API_KEY,
-        convert_system_message_to_human=True
-    )
-    logger.info("Gemini 모델이 성공적으로 초기화되었습니다.")
+    llm = _build_llm(getattr(settings, "LLM_MODEL_PRO", "gemini-1.5-pro"))
+    logger.info(f"LLM 모델이 성공적으로 초기화되었습니다. ({provider_name()})")
 except Exception as e:
-    logger.error(f"Gemini 모델 초기화 실패: {str(e)}")
+    logger.error(f"LLM 모델 초기화 실패: {str(e)}")
     llm = None
 
-def score_emotion(star: int) -> int:
-    """Return 100/80/60/40/20 based on 5→1 star."""
-    return max(20, (6-star)*20)
-
-def score_efficiency(silence: int, csr: int, cust: int) -> int:
-    penalty = (silence/500) + abs(csr-cust)*2
-    return max(0, 100 - min(100, int(penalty)))
-
-def score_manual(alt: int, apology: float, pos: float, eupho: float, empathy: float) -> float:
-    criteria = [alt>0, apology>0, pos>0.1, eupho>0.05, empathy>0.1]
-    return sum(criteria)/len(criteria)
-
-ANALYSIS_PROMPT = PromptTemplate(
-    input_variables=["row", "agent_emotion_score", "customer_emotion_score",
-                    "efficiency_score", "manual_ratio", "final_score"],
-    template="""
-당신은 콜센터 전문 평가 AI입니다. 아래 상담 데이터(JSON)와 계산된 중간 점수를 참고하여 분석해주세요.
-
-[상담 데이터(JSON)]
-{row}
-
-[중간 스코어]
-- 상담사 감정 점수: {agent_emotion_score}
-- 고객 감정 점수: {customer_emotion_score}
-- 효율성 점수: {efficiency_score}
-- 매뉴얼 준수율: {manual_ratio}
-- 최종 점수: {final_score}
-
-다음 5가지 항목에 대해 분석해주세요:
-1. 평가점수 (100점 만점, 숫자만)
-2. 상담자 강점(상담사가 잘한 점을 근거와 함께 설명)
-3. 상담자 단점(상담사가 못한 점을 근거와 함께 설명)
-4. 개선점(상담 품질 향상을 위해 실질적으로 도움이 될 만한 개선점을 근거와 함께 설명)
-5. 코칭 멘트 (실제 상담자에게 전달할 수 있는 구체적이고 실질적인 코칭 메시지, 따뜻하면서도 실질적인 코칭 멘트)
-
-각 항목은 한 줄로 작성해주세요.
-"""
-)
+# pro 외 등급별 모델 (처음 사용할 때 생성, pro 등급은 항상 llm)
+llm_tiers: Dict[str, Any] = {}
+
 
-def analyze_consultation(call_id: str) -> Optional[Dict[str, Any]]:
+def llm_for_tier(tier: str):
+    """모델 등급에 해당하는 LLM 클라이언트를 반환합니다. (fast 모델을 쓸 수 없으면 pro 모델)"""
+    if tier == PRO or not fast_tier_available():
+        return llm
+    if tier not in llm_tiers:
+        try:
+            llm_tiers[tier] = _build_llm(settings.LLM_MODEL_FAST)
+        except Exception as e:
+            logger.error(f"{tier} 등급 모델 초기화 실패, pro 모델 사용: {str(e)}")
+            return llm
+    return llm_tiers[tier]
+
+
+def invoke_tier(tier: str, prompt: str, priority: str = INTERACTIVE):
     """
-    상담 분석을 수행하고 결과를 반환합니다.
-    
-    Args:
-        call_id: 분석할 상담의 고유 ID
-        
-    Returns:
-        분석 결과 딕셔너리 또는 None (오류 발생 시)
+    등급별 모델로 LLM을 호출하고 등급별 호출 수·지연·비용을 기록합니다.
+    마감 시간 초과 시 LLMDeadlineExceeded, 지연이 p95를 넘기면 헤지 요청 (priority 클래스로 호출 차례가 있을 때만)
+    """
+    started = time.perf_counter()
+    try:
+        response = invoke_llm(llm_for_tier(tier), prompt, admit_hedge=partial(try_llm_slot, priority))
+    except Exception:
+        record_tier_call(tier, prompt, None, time.perf_counter() - started, outcome="error")
+        raise
+    record_tier_call(tier, prompt, response.content, time.perf_counter() - started)
+    return response
+
+
+def _log_extra(call_id: str, timings: Dict[str, float]) -> Dict[str, Any]:
+    """
+    로그 레코드에 붙일 call_id와 단계별 소요 시간.
+    레코드는 리스너 스레드에서 나중에 포맷되므로 timings는 복사해서 넘깁니다.
+    """
+    return {"call_id": call_id, "stage_timings": dict(timings)}
+
+
+# ---------------------------------------------------------------------------
+# 분석 단계 (analyze_consultation과 pipeline.py의 단계별 실행이 함께 사용)
+# ---------------------------------------------------------------------------
+
+# 실패 단계 → ANALYSIS_TOTAL status 레이블
+STAGE_FAILURE_STATUS = {"fetch": "fetch_error", "prepare": "serialize_error", "llm": "llm_error",
+                        "parse": "parse_error", "escalate": "llm_error", "save": "save_error"}
+
+
+class AnalysisStageError(Exception):
+    """status 레이블이 정해진 분석 실패 (LLM 미초기화, 호출 대기 시간 초과, 파싱 실패 등)"""
+
+    def __init__(self, status: str, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def failure_status(stage: str, error: Exception) -> str:
+    """실패한 단계와 예외로 ANALYSIS_TOTAL status 레이블을 정합니다."""
+    if isinstance(error, AnalysisStageError):
+        return error.status
+    if isinstance(error, ObjectDoesNotExist):
+        return "not_found"
+    if isinstance(error, LLMDeadlineExceeded):
+        return "llm_timeout"
+    return STAGE_FAILURE_STATUS.get(stage, "unexpected_error")
+
+
+def fetch_consultation(call_id: str) -> Dict[str, Any]:
+    """상담 데이터를 조회합니다. → {"row": 모델, "row_dict": 딕셔너리} (없으면 ObjectDoesNotExist)"""
+    row = Consulting.objects.get(call_id=call_id)
+    try:
+        row_dict = model_to_dict(row)
+    except Exception as e:
+        raise AnalysisStageError("serialize_error", f"모델 데이터 변환 중 오류: {str(e)}")
+    return {"row": row, "row_dict": row_dict}
+
+
+def request_analysis(row: Any, scores: Dict[str, Any], prompt: str, priority: str,
+                     timings: Optional[Dict[str, float]] = None, admitted: bool = False) -> Dict[str, Any]:
+    """
+    등급을 골라 LLM에 분석을 요청합니다. → {"response": 응답 텍스트, "tier": 등급}
+    admitted가 True이면 첫 호출의 차례는 받지 않음 (호출한 쪽에서 이미 받은 경우)
     """
     if not llm:
-        logger.error("Gemini 모델이 초기화되지 않았습니다.")
+        raise AnalysisStageError("llm_unavailable", "Gemini 모델이 초기화되지 않았습니다.")
+
+    # 일상적인 상담은 fast 등급, 갈등·비속어·저점수 상담은 pro 등급
+    tier = route_tier(row, scores)
+    PROMPT_TOKENS.observe(estimate_tokens(prompt))
+    if not admitted:
+        with stage_timer("queue", timings):
+            admitted = acquire_llm_slot(priority)
+        if not admitted:
+            raise AnalysisStageError("queue_timeout", "LLM 호출 대기 시간 초과")
+
+    content = invoke_tier(tier, prompt, priority).content
+    RESPONSE_TOKENS.observe(estimate_tokens(content))
+    return {"response": content, "tier": tier}
+
+
+def escalate_analysis(call_id: str, tier: str, prompt: str, parsed: Tuple[Optional[Dict[str, Any]], List[str]],
+                      priority: str) -> Optional[Dict[str, Any]]:
+    """
+    fast 등급 응답이 검증을 통과하지 못하면 pro 등급으로 재요청합니다.
+    재요청도 별도의 LLM 호출이므로 항상 priority 클래스로 호출 차례를 받습니다.
+    → {"parsed": pro 파싱 결과, "tier": PRO}, 재요청하지 않았거나 실패하면 None (fast 결과 사용)
+    """
+    result, missing_keys = parsed
+    if tier == PRO or not needs_escalation(result, missing_keys):
         return None
-        
+
+    record_escalation(call_id)
     try:
-        # 상담 데이터 조회
-        try:
-            row = Consulting.objects.get(call_id=call_id)
-        except ObjectDoesNotExist:
-            logger.error(f"call_id '{call_id}'에 해당하는 상담 데이터를 찾을 수 없습니다.")
-            return None
-        except Exception as e:
-            logger.error(f"데이터베이스 조회 중 오류 발생: {str(e)}")
+        if not acquire_llm_slot(priority):
             return None
+        escalated = parse_response(invoke_tier(PRO, prompt, priority).content)
+    except Exception as e:
+        logger.warning(f"pro 등급 재요청 실패, fast 등급 결과 사용 ({call_id}): {str(e)}")
+        return None
+    if not escalated[0]:
+        return None
+    return {"parsed": escalated, "tier": PRO}
 
-        logger.info(f"상담 데이터 분석 시작: {call_id}")
-
-        # 감정 점수 계산 (안전한 속성 접근)
-        agent_star = 3  # 기본값
-        for s in range(1, 6):
-            if safe_get_attribute(row, f"emo_{s}_star_score", 0) > 0:
-                agent_star = s
-                break
-                
-        cust_star = 3  # 기본값
-        for s in range(1, 6):
-            if safe_get_attribute(row, f"고객_emo_{s}_star_score", 0) > 0:
-                cust_star = s
-                break
-
-        agent_emotion = score_emotion(agent_star)
-        cust_emotion = score_emotion(cust_star)
-
-        # 효율성 점수 (안전한 속성 접근)
-        silence = safe_get_attribute(row, "silence", 0)
-        csr_speech_count = safe_get_attribute(row, "csr_speech_count", 0)
-        customer_speech_count = safe_get_attribute(row, "customer_speech_count", 0)
-        eff = score_efficiency(silence, csr_speech_count, customer_speech_count)
-
-        # 메뉴얼 준수율 (안전한 속성 접근)
-        if cust_star <= 2:
-            manual_ratio = score_manual(
-                safe_get_attribute(row, "alternative_solution_count", 0),
-                safe_get_attribute(row, "apology_ratio", 0.0),
-                safe_get_attribute(row, "positive_word_ratio", 0.0),
-                safe_get_attribute(row, "euphonious_word_ratio", 0.0),
-                safe_get_attribute(row, "empathy_expression_ratio", 0.0)
-            )
-        else:
-            manual_ratio = 1.0
-
-        # 최종 점수 계산
-        profanity_penalty = -20 if safe_get_attribute(row, "Profane", False) else 0
-        final_score = int((agent_emotion + cust_emotion + eff + manual_ratio*100)/4 + profanity_penalty)
-        final_score = max(0, min(100, final_score))
-
-        # 모델 인스턴스를 딕셔너리로 변환 (안전한 변환)
-        try:
-            row_dict = model_to_dict(row)
-            for key, value in row_dict.items():
-                if isinstance(value, datetime.datetime):
-                    row_dict[key] = value.isoformat()
-        except Exception as e:
-            logger.error(f"모델 데이터 변환 중 오류: {str(e)}")
-            return None
 
-        # Gemini API를 통한 분석
-        try:
-            prompt_input = ANALYSIS_PROMPT.format(
-                row=json.dumps(row_dict, ensure_ascii=False),
-                agent_emotion_score=agent_emotion,
-                customer_emotion_score=cust_emotion,
-                efficiency_score=eff,
-                manual_ratio=round(manual_ratio, 2),
-                final_score=final_score
-            )
-            
-            response = llm.invoke(prompt_input)
-            logger.info(f"LLM 응답 수신: {call_id}")
-            
-        except Exception as e:
-            logger.error(f"LLM API 호출 중 오류 발생: {str(e)}")
-            return None
-        
-        # 응답 파싱
-        try:
-            result = _parse_llm_response(response.content)
-            if not result:
-                logger.error(f"LLM 응답 파싱 실패: {call_id}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"응답 파싱 중 오류: {str(e)}")
-            return None
-            
-        # 결과 업데이트
-        try:
-            row.strength = result.get("상담자 강점", "")
-            row.weakness = result.get("상담자 단점", "")
-            row.improvement = result.get("개선점", "")
-            row.manual_compliance_ratio = manual_ratio
-            row.score = final_score
-            row.save()
-            
-            logger.info(f"분석 결과 저장 완료: {call_id}")
-            
-        except Exception as e:
-            logger.error(f"분석 결과 저장 중 오류: {str(e)}")
-            # 저장 실패해도 분석 결과는 반환
-
-        return {
-            "call_id": call_id,
-            "analysis": result,
-            "scores": {
-                "agent_emotion": agent_emotion,
-                "customer_emotion": cust_emotion,
-                "efficiency": eff,
-                "manual_compliance": manual_ratio,
-                "final_score": final_score
-            }
-        }
-        
+def accept_result(parsed: Tuple[Optional[Dict[str, Any]], List[str]]) -> Dict[str, Any]:
+    """최종 파싱 결과를 확인합니다. (누락 항목을 기본값으로 채웠으면 parse_fallback 메트릭, 결과가 없으면 실패)"""
+    result, missing_keys = parsed
+    if missing_keys:
+        PARSE_FALLBACK_TOTAL.inc()
+    if not result:
+        raise AnalysisStageError("parse_error", "LLM 응답 파싱 실패")
+    return result
+
+
+def store_result(call_id: str, row: Consulting, result: Dict[str, Any], scores: Dict[str, Any],
+                 save: Callable[[Consulting, Dict[str, Any], Dict[str, Any]], None] = save_analysis
+                 ) -> Optional[Exception]:
+    """분석 결과를 저장합니다. 저장에 실패해도 분석 결과는 반환하므로 예외는 로그를 남기고 돌려줍니다."""
+    try:
+        save(row, result, scores)
     except Exception as e:
-        logger.error(f"상담 분석 중 예상치 못한 오류 발생 ({call_id}): {str(e)}")
-        return None
+        logger.error(f"분석 결과 저장 중 오류 ({call_id}): {str(e)}", extra={"call_id": call_id})
+        return e
+    return None
+
+
+def record_failure(call_id: str, stage: str, error: Exception, timings: Dict[str, float]) -> None:
+    """실패한 분석의 status 메트릭과 로그를 남깁니다."""
+    ANALYSIS_TOTAL.inc(status=failure_status(stage, error))
+    logger.error(f"상담 분석 실패 ({call_id}, {stage}): {str(error)}", extra=_log_extra(call_id, timings))
+
+
+def record_success(call_id: str, result: Dict[str, Any], scores: Dict[str, Any], tier: str,
+                   compression: Dict[str, Any], timings: Dict[str, float],
+                   save_error: Optional[Exception] = None, log_level: int = logging.INFO) -> Dict[str, Any]:
+    """완료된 분석의 status 메트릭과 로그를 남기고 결과 딕셔너리를 만듭니다."""
+    ANALYSIS_TOTAL.inc(status="save_error" if save_error is not None else "success")
+    if save_error is None:
+        logger.log(log_level, f"분석 결과 저장 완료: {call_id} (대화 압축률 {compression['ratio']})",
+                    extra={**_log_extra(call_id, timings), "compression": compression})
+    return {
+        "call_id": call_id,
+        "analysis": result,
+        "scores": scores,
+        "model_tier": tier,
+        "compression": compression
+    }
 
 
-def _parse_llm_response(response_content: str) -> Optional[Dict[str, Any]]:
+def analyze_consultation(call_id: str, priority: str = INTERACTIVE, admitted: bool = False,
+                         projection: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
-    LLM 응답을 파싱하여 구조화된 결과를 반환합니다.
+    상담 분석을 수행하고 결과를 반환합니다.
     
     Args:
-        response_content: LLM의 원본 응답 텍스트
+        call_id: 분석할 상담의 고유 ID
+        priority: LLM 스케줄러 우선순위 클래스 (interactive / reanalysis / backfill)
+        admitted: 호출한 쪽에서 첫 LLM 호출의 차례를 이미 받았으면 True
+                  (pro 등급 재요청·헤지는 이 경우에도 priority 클래스로 차례를 받음)
+        projection: 보조 저장소 반영 방식 (None이면 ANALYSIS_PROJECTION)
         
     Returns:
-        파싱된 결과 딕셔너리 또는 None
+        분석 결과 딕셔너리 또는 None (오류 발생 시)
     """
+    # 단계별 소요 시간(ms), 로그 레코드에 함께 기록
+    timings: Dict[str, float] = {}
+    stage = "fetch"
+
     try:
-        lines = response_content.strip().split('\n')
-        result = {}
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            if line.startswith('1.') or line.startswith('평가점수'):
-                # 점수 추출
-                score_text = line.split('.', 1)[1].strip() if '.' in line else line.split(':', 1)[1].strip()
-                try:
-                    result['평가점수'] = int(''.join(filter(str.isdigit, score_text)))
-                except (ValueError, IndexError):
-                    result['평가점수'] = 0
-                    
-            elif line.startswith('2.') or line.startswith('상담자 강점'):
-                result['상담자 강점'] = _extract_content(line)
-                
-            elif line.startswith('3.') or line.startswith('상담자 단점'):
-                result['상담자 단점'] = _extract_content(line)
-                
-            elif line.startswith('4.') or line.startswith('개선점'):
-                result['개선점'] = _extract_content(line)
-                
-            elif line.startswith('5.') or line.startswith('코칭 멘트'):
-                result['코칭 멘트'] = _extract_content(line)
-        
-        # 필수 키 확인
-        required_keys = ["상담자 강점", "상담자 단점", "개선점", "평가점수", "코칭 멘트"]
-        if not all(k in result for k in required_keys):
-            missing_keys = [k for k in required_keys if k not in result]
-            logger.warning(f"필수 키가 누락되었습니다: {missing_keys}")
-            
-            # 누락된 키에 대해 기본값 설정
-            for key in missing_keys:
-                if key == "평가점수":
-                    result[key] = 0
-                else:
-                    result[key] = "분석 결과 없음"
-            
-        return result
-        
+        if not llm:
+            raise AnalysisStageError("llm_unavailable", "Gemini 모델이 초기화되지 않았습니다.")
+
+        with stage_timer("fetch", timings):
+            fetched = fetch_consultation(call_id)
+        logger.debug(f"상담 데이터 분석 시작: {call_id}", extra=_log_extra(call_id, timings))
+
+        # 점수 계산 → 대화 압축(프롬프트 토큰 예산 적용) → 직렬화 → 프롬프트 생성
+        stage = "prepare"
+        with stage_timer("prepare", timings):
+            prepared = prepare_prompt(fetched["row_dict"], getattr(settings, "PROMPT_TOKEN_BUDGET", 0))
+        record_compression(prepared["compression"])
+
+        stage = "llm"
+        with stage_timer("llm", timings):
+            answered = request_analysis(fetched["row_dict"], prepared["scores"], prepared["prompt"], priority,
+                                        timings, admitted)
+        logger.debug(f"LLM 응답 수신: {call_id}", extra=_log_extra(call_id, timings))
+
+        stage = "parse"
+        with stage_timer("parse", timings):
+            parsed = parse_response(answered["response"])
+
+        stage = "escalate"
+        tier = answered["tier"]
+        with stage_timer("escalate", timings):
+            escalated = escalate_analysis(call_id, tier, prepared["prompt"], parsed, priority)
+        if escalated:
+            parsed, tier = escalated["parsed"], escalated["tier"]
+
+        stage = "parse"
+        result = accept_result(parsed)
     except Exception as e:
-        logger.error(f"LLM 응답 파싱 중 오류: {str(e)}")
+        record_failure(call_id, stage, e, timings)
         return None
 
-
-def _extract_content(line: str) -> str:
-    """라인에서 내용을 추출합니다."""
-    try:
-        if ':' in line:
-            return line.split(':', 1)[1].strip()
-        elif '.' in line:
-            return line.split('.', 1)[1].strip()
-        else:
-            return line.strip()
-    except (IndexError, AttributeError):
-        return "내용 추출 실패" 
\ No newline at end of file
+    with stage_timer("save", timings):
+        save_error = store_result(call_id, fetched["row"], result, prepared["scores"],
+                                  save=partial(save_analysis, projection=projection))
+    return record_success(call_id, result, prepared["scores"], tier, prepared["compression"], timings, save_error)
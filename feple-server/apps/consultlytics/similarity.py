@@ -0,0 +1,303 @@
+"""
+apps/consultlytics/similarity.py
+
+음성 특성(크로마·스펙트럴 대비·Tonnetz·MFCC, 39차원)으로 "이 통화와 비슷하게 들리는 통화"를 찾는
+프로세스 내 최근접 이웃 인덱스입니다. (Django 비의존, NumPy)
+
+- 벡터: features.decode_feature로 디코딩한 특성을 이어 붙이고, 빌드 시점의 차원별 평균·표준편차로
+  표준화한 뒤 L2 정규화합니다. (코사인 유사도 = 내적)
+- flat: 모든 벡터와 내적을 batch_size행씩 나누어 계산 (정확, 수십만 건 이하)
+- ivf : 구면 k-means 중심(nlist개)으로 벡터를 목록별로 나누어 연속 저장하고,
+        질의와 가까운 nprobe개 목록만 계산 (근사, 대용량)
+- 저장: 디렉토리 하나에 .npy 배열로 저장하고 np.load(mmap_mode="r")로 메모리 매핑하여 엽니다.
+  새 벡터는 고정 크기 레코드(key, vector)로 delta.bin에 추가되며, 검색 시 항상 전수 계산합니다.
+  레코드 하나를 한 번의 append 쓰기로 기록하므로 다른 프로세스(Celery 워커)가 추가한 벡터도
+  검색 프로세스가 파일 크기 변화로 감지해 읽습니다. delta가 커지면 인덱스를 다시 빌드합니다.
+
+<파일 구조>
+  {root}/meta.json      # kind, dim, rows, nprobe, built_at
+  {root}/mean.npy, scale.npy
+  {root}/vectors.npy    # float32 (rows × dim), ivf면 목록 순서로 정렬
+  {root}/keys.npy       # S128
+  {root}/centroids.npy, offsets.npy   # ivf만
+  {root}/delta.bin      # 추가된 (key, vector) 레코드
+
+<사용 예시>
+  vectors = np.stack([raw_vector(features) for features in rows])
+  build_index("indexes/audio_similarity", keys, vectors, ivf_min_rows=100000)
+  index = SimilarityIndex.load("indexes/audio_similarity")
+  index.search(raw_vector(features), k=10, exclude="consulting:CALL_001")   # [(key, score), ...]
+  index.append("file:42", raw_vector(file_features))
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from typing import Any, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .features import FEATURE_DIMS, decode_feature
+
+logger = logging.getLogger(__name__)
+
+FLAT = "flat"
+IVF = "ivf"
+KEY_BYTES = 128
+DIM = sum(FEATURE_DIMS.values())
+
+
+def raw_vector(features: Mapping[str, Any]) -> Optional[np.ndarray]:
+    """Consulting 필드 이름 → 특성 값 매핑을 표준화 전 벡터(float32, DIM)로 변환합니다. (하나라도 없으면 None)"""
+    parts = []
+    for name, dim in FEATURE_DIMS.items():
+        decoded = decode_feature(features.get(name), dim)
+        if decoded is None:
+            return None
+        parts.extend(decoded)
+    return np.asarray(parts, dtype=np.float32)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """점수 상위 k개의 위치 (내림차순)"""
+    if len(scores) > k:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def spherical_kmeans(vectors: np.ndarray, nlist: int, iterations: int = 10,
+                     sample_size: int = 100000, seed: int = 42) -> np.ndarray:
+    """정규화된 벡터의 구면 k-means 중심 (표본 sample_size개로 학습)"""
+    rng = np.random.default_rng(seed)
+    if len(vectors) > sample_size:
+        vectors = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    vectors = np.asarray(vectors, dtype=np.float32)
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        # 비어 있는 목록은 이전 중심을 유지
+        empty = np.bincount(assign, minlength=nlist) == 0
+        sums[empty] = centroids[empty]
+        centroids = _normalize_rows(sums)
+    return centroids
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, batch_size: int) -> np.ndarray:
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), batch_size):
+        assign[start:start + batch_size] = np.argmax(vectors[start:start + batch_size] @ centroids.T, axis=1)
+    return assign
+
+
+def build_index(root: str, keys: Sequence[str], raw_vectors: np.ndarray,
+                ivf_min_rows: int = 100000, nlist: Optional[int] = None,
+                nprobe: int = 8, batch_size: int = 65536) -> dict:
+    """
+    표준화 전 벡터로 인덱스를 만들어 root에 저장합니다. (임시 디렉토리에 쓴 뒤 교체)
+    행 수가 ivf_min_rows 이상이면 ivf, 아니면 flat으로 만듭니다.
+
+    Returns:
+        meta.json 내용
+    """
+    raw_vectors = np.asarray(raw_vectors, dtype=np.float32).reshape(-1, DIM)
+    rows = len(raw_vectors)
+    if rows != len(keys):
+        raise ValueError(f"키 수({len(keys)})와 벡터 수({rows})가 다릅니다.")
+
+    mean = raw_vectors.mean(axis=0) if rows else np.zeros(DIM, dtype=np.float32)
+    scale = raw_vectors.std(axis=0) if rows > 1 else np.ones(DIM, dtype=np.float32)
+    scale[scale == 0] = 1.0
+    vectors = _normalize_rows((raw_vectors - mean) / scale)
+    key_array = np.array([key.encode("utf-8")[:KEY_BYTES] for key in keys], dtype=f"S{KEY_BYTES}")
+
+    kind = IVF if rows >= ivf_min_rows and rows > 1 else FLAT
+    meta = {"kind": kind, "dim": DIM, "rows": rows, "nprobe": nprobe,
+            "features": list(FEATURE_DIMS), "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+    tmp_root = f"{root}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_root, ignore_errors=True)
+    os.makedirs(tmp_root)
+    if kind == IVF:
+        nlist = min(nlist or int(np.sqrt(rows)), rows)
+        centroids = spherical_kmeans(vectors, nlist)
+        assign = _assign(vectors, centroids, batch_size)
+        # 목록별로 연속 저장하여 목록 하나를 연속 구간으로 읽음
+        order = np.argsort(assign, kind="stable")
+        vectors, key_array = vectors[order], key_array[order]
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))]).astype(np.int64)
+        np.save(os.path.join(tmp_root, "centroids.npy"), centroids)
+        np.save(os.path.join(tmp_root, "offsets.npy"), offsets)
+        meta["nlist"] = nlist
+
+    np.save(os.path.join(tmp_root, "mean.npy"), mean.astype(np.float32))
+    np.save(os.path.join(tmp_root, "scale.npy"), scale.astype(np.float32))
+    np.save(os.path.join(tmp_root, "vectors.npy"), vectors)
+    np.save(os.path.join(tmp_root, "keys.npy"), key_array)
+    open(os.path.join(tmp_root, "delta.bin"), "wb").close()
+    with open(os.path.join(tmp_root, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    # 기존 인덱스를 연 프로세스는 메모리 매핑된 이전 파일을 계속 읽을 수 있음
+    old_root = f"{root}.old-{os.getpid()}"
+    if os.path.exists(root):
+        os.replace(root, old_root)
+    os.replace(tmp_root, root)
+    shutil.rmtree(old_root, ignore_errors=True)
+    logger.info(f"유사 통화 인덱스 빌드 완료: {root} ({kind}, {rows}건)")
+    return meta
+
+
+class SimilarityIndex:
+    """저장된 인덱스를 메모리 매핑으로 열어 검색하는 읽기 + 추가 전용 인덱스 (스레드 안전)"""
+
+    def __init__(self, root: str, batch_size: int = 65536):
+        self.root = root
+        self.batch_size = batch_size
+        with open(os.path.join(root, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta["dim"] != DIM:
+            raise ValueError(f"인덱스 차원({self.meta['dim']})이 현재 특성 차원({DIM})과 다릅니다. 다시 빌드하세요.")
+        self.kind = self.meta["kind"]
+        self.nprobe = self.meta.get("nprobe", 8)
+        self.mean = np.load(os.path.join(root, "mean.npy"))
+        self.scale = np.load(os.path.join(root, "scale.npy"))
+        self.vectors = np.load(os.path.join(root, "vectors.npy"), mmap_mode="r")
+        self.keys = np.load(os.path.join(root, "keys.npy"), mmap_mode="r")
+        if self.kind == IVF:
+            self.centroids = np.load(os.path.join(root, "centroids.npy"))
+            self.offsets = np.load(os.path.join(root, "offsets.npy"))
+
+        self.record_dtype = np.dtype([("key", f"S{KEY_BYTES}"), ("vector", "<f4", (DIM,))])
+        self._delta_path = os.path.join(root, "delta.bin")
+        self._delta_keys = np.empty(0, dtype=f"S{KEY_BYTES}")
+        self._delta_vectors = np.empty((0, DIM), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root: str, batch_size: int = 65536) -> "SimilarityIndex":
+        return cls(root, batch_size=batch_size)
+
+    def __len__(self) -> int:
+        return len(self.vectors) + len(self._delta_keys)
+
+    def normalize(self, raw: np.ndarray) -> np.ndarray:
+        """표준화 전 벡터를 인덱스 공간(표준화 + L2 정규화)으로 변환합니다."""
+        vector = (np.asarray(raw, dtype=np.float32) - self.mean) / self.scale
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).astype(np.float32)
+
+    def append(self, key: str, raw: np.ndarray) -> None:
+        """벡터 하나를 delta.bin에 추가합니다. (다른 프로세스의 검색에도 반영됨)"""
+        record = np.zeros(1, dtype=self.record_dtype)
+        record["key"] = key.encode("utf-8")[:KEY_BYTES]
+        record["vector"] = self.normalize(raw)
+        # O_APPEND 한 번의 쓰기: 레코드가 다른 프로세스의 추가와 섞이지 않음
+        fd = os.open(self._delta_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0))
+        try:
+            os.write(fd, record.tobytes())
+        finally:
+            os.close(fd)
+
+    def _refresh_delta(self) -> Tuple[np.ndarray, np.ndarray]:
+        """delta.bin에 새로 추가된 완전한 레코드만 읽어 붙입니다."""
+        with self._lock:
+            try:
+                size = os.path.getsize(self._delta_path)
+            except OSError:
+                size = 0
+            count = size // self.record_dtype.itemsize
+            known = len(self._delta_keys)
+            if count > known:
+                records = np.fromfile(self._delta_path, dtype=self.record_dtype, count=count - known,
+                                      offset=known * self.record_dtype.itemsize)
+                self._delta_keys = np.concatenate([self._delta_keys, records["key"]])
+                self._delta_vectors = np.concatenate([self._delta_vectors, records["vector"]])
+            return self._delta_keys, self._delta_vectors
+
+    def _scan(self, vectors: np.ndarray, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """vectors 구간을 batch_size행씩 내적하여 구간 내 상위 k개 (위치, 점수)를 반환합니다."""
+        best_rows, best_scores = [], []
+        for start in range(0, len(vectors), self.batch_size):
+            scores = np.asarray(vectors[start:start + self.batch_size]) @ query
+            top = _top_k(scores, k)
+            best_rows.append(top + start)
+            best_scores.append(scores[top])
+        if not best_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        rows, scores = np.concatenate(best_rows), np.concatenate(best_scores)
+        top = _top_k(scores, k)
+        return rows[top], scores[top]
+
+    def _search_base(self, query: np.ndarray, k: int, nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self.kind != IVF:
+            return self._scan(self.vectors, query, k)
+        probes = _top_k(self.centroids @ query, nprobe)
+        rows, scores = [], []
+        for probe in probes:
+            start, end = int(self.offsets[probe]), int(self.offsets[probe + 1])
+            if end > start:
+                list_rows, list_scores = self._scan(self.vectors[start:end], query, k)
+                rows.append(list_rows + start)
+                scores.append(list_scores)
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return np.concatenate(rows), np.concatenate(scores)
+
+    def search(self, raw: np.ndarray, k: int = 10, exclude: Optional[str] = None,
+               nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        코사인 유사도 상위 k개 (key, 점수)를 반환합니다.
+
+        Args:
+            raw: 표준화 전 질의 벡터 (raw_vector 결과)
+            k: 반환할 결과 수
+            exclude: 결과에서 뺄 키 (질의한 통화 자신)
+            nprobe: ivf에서 살펴볼 목록 수 (기본: 빌드 시 설정, 목록 수를 넘으면 목록 수, 클수록 정확하고 느림)
+
+        Raises:
+            ValueError: k 또는 nprobe가 1보다 작은 경우
+        """
+        if k < 1:
+            raise ValueError(f"k는 1 이상이어야 합니다: {k}")
+        if nprobe is None:
+            nprobe = self.nprobe
+        elif nprobe < 1:
+            raise ValueError(f"nprobe는 1 이상이어야 합니다: {nprobe}")
+        if self.kind == IVF:
+            nprobe = min(nprobe, len(self.centroids))
+
+        query = self.normalize(raw)
+        # 제외·중복 키를 빼고도 k개가 남도록 여유를 두고 후보를 뽑음
+        want = k + 1 + (1 if exclude else 0)
+        base_rows, base_scores = self._search_base(query, want, nprobe)
+        delta_keys, delta_vectors = self._refresh_delta()
+        delta_rows, delta_scores = self._scan(delta_vectors, query, want)
+
+        candidates = [(float(score), bytes(self.keys[row])) for row, score in zip(base_rows, base_scores)]
+        candidates += [(float(score), bytes(delta_keys[row])) for row, score in zip(delta_rows, delta_scores)]
+        candidates.sort(key=lambda item: -item[0])
+
+        results, seen = [], set()
+        for score, raw_key in candidates:
+            key = raw_key.rstrip(b"\0").decode("utf-8", errors="replace")
+            # 같은 키가 다시 추가된 경우 점수가 높은 쪽 하나만
+            if key == exclude or key in seen:
+                continue
+            seen.add(key)
+            results.append((key, round(score, 6)))
+            if len(results) >= k:
+                break
+        return results
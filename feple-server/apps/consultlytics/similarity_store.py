@@ -0,0 +1,219 @@
+"""
+apps/consultlytics/similarity_store.py
+
+Consulting·callytics File의 음성 특성으로 유사 통화 인덱스(similarity.py)를 빌드·조회합니다.
+
+- 키: "consulting:<call_id>", "file:<id>"
+  (callytics 앱이 INSTALLED_APPS에 있을 때만 File을 포함)
+- build_index: 두 테이블을 keyset 페이지로 읽어 벡터를 만들고 SIMILARITY_INDEX_DIR에 저장
+  (특성이 없거나 디코딩되지 않는 행은 건너뜀)
+- get_index: 프로세스마다 한 번 메모리 매핑으로 열고, 다시 빌드되면(meta.json 변경) 새로 엽니다.
+- 새 Consulting·File이 생성되면 커밋 후 인덱스 delta에 추가됩니다.
+  (post_save → add_consulting / add_file, 인덱스가 없으면 건너뜀. File은 callytics 앱이 설치된 경우만)
+  bulk_create(bulk_ingest, create_sample_data)는 post_save를 보내지 않으므로 대량 적재 후에는 인덱스를 다시 빌드하세요.
+- similar_calls: 키의 특성을 DB에서 읽어 자기 자신을 뺀 상위 k개를 반환
+
+<설정 안내>
+- settings.py (또는 .env)
+    SIMILARITY_INDEX_DIR    = "indexes/audio_similarity"
+    SIMILARITY_IVF_MIN_ROWS = 100000   # 이 행 수 이상이면 ivf(근사), 미만이면 flat(전수)
+    SIMILARITY_NPROBE       = 8        # ivf 검색 시 살펴볼 목록 수
+    SIMILARITY_QUERY_BATCH  = 65536    # 한 번에 내적할 벡터 행 수
+
+<사용 예시>
+  $ python manage.py build_similarity_index
+  GET /api/consultlytics/similar/consulting:CALL_001/?k=10
+
+  from apps.consultlytics.similarity_store import similar_calls
+  similar_calls("file:42", k=5)   # [{"key": "consulting:CALL_017", "score": 0.93}, ...]
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from django.apps import apps
+from django.conf import settings
+
+from .features import FEATURE_DIMS, FILE_FEATURE_FIELDS
+from .metrics import SIMILARITY_APPENDS_TOTAL, SIMILARITY_QUERY_SECONDS
+from .models import Consulting
+from .similarity import SimilarityIndex, build_index as build_vector_index, raw_vector
+
+logger = logging.getLogger(__name__)
+
+CONSULTING = "consulting"
+FILE = "file"
+CALLYTICS_APP = "apps.callytics"
+
+_index: Optional[SimilarityIndex] = None
+_index_mtime: Optional[float] = None
+_index_lock = threading.Lock()
+
+
+def index_dir() -> str:
+    return getattr(settings, "SIMILARITY_INDEX_DIR", os.path.join("indexes", "audio_similarity"))
+
+
+def _file_model():
+    return apps.get_model("callytics", "File") if apps.is_installed(CALLYTICS_APP) else None
+
+
+def _file_features(row: Tuple[Any, ...]) -> Dict[str, Any]:
+    """(chroma_stft, spec_contr, tonnetz, mfcc) 값을 Consulting 필드 이름 매핑으로 바꿉니다."""
+    return dict(zip(FILE_FEATURE_FIELDS.values(), row))
+
+
+def _iter_rows(queryset, pk_name: str, names: List[str], chunk_size: int) -> Iterator[Tuple[Any, ...]]:
+    """pk 순 keyset 페이지로 (pk, *names) 행을 chunk_size건씩 읽습니다."""
+    queryset = queryset.order_by(pk_name)
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(**{f"{pk_name}__gt": last_pk})
+        rows = list(page.values_list(pk_name, *names)[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1][0]
+
+
+def iter_vectors(chunk_size: int = 5000) -> Iterator[Tuple[str, np.ndarray]]:
+    """인덱스에 넣을 (키, 표준화 전 벡터)를 Consulting, File 순으로 생성합니다."""
+    names = list(FEATURE_DIMS)
+    for row in _iter_rows(Consulting.objects.all(), "call_id", names, chunk_size):
+        vector = raw_vector(dict(zip(names, row[1:])))
+        if vector is not None:
+            yield f"{CONSULTING}:{row[0]}", vector
+
+    file_model = _file_model()
+    if file_model is None:
+        return
+    for row in _iter_rows(file_model.objects.all(), "id", list(FILE_FEATURE_FIELDS), chunk_size):
+        vector = raw_vector(_file_features(row[1:]))
+        if vector is not None:
+            yield f"{FILE}:{row[0]}", vector
+
+
+def build_index(root: Optional[str] = None, ivf_min_rows: Optional[int] = None,
+                nlist: Optional[int] = None, chunk_size: int = 5000) -> Dict[str, Any]:
+    """DB 전체로 유사 통화 인덱스를 다시 빌드합니다. (기존 delta는 비워짐)"""
+    keys, vectors = [], []
+    for key, vector in iter_vectors(chunk_size):
+        keys.append(key)
+        vectors.append(vector)
+    matrix = np.stack(vectors) if vectors else np.empty((0, sum(FEATURE_DIMS.values())), dtype=np.float32)
+    return build_vector_index(
+        root or index_dir(),
+        keys,
+        matrix,
+        ivf_min_rows=ivf_min_rows if ivf_min_rows is not None else getattr(settings, "SIMILARITY_IVF_MIN_ROWS", 100000),
+        nlist=nlist,
+        nprobe=getattr(settings, "SIMILARITY_NPROBE", 8),
+        batch_size=getattr(settings, "SIMILARITY_QUERY_BATCH", 65536),
+    )
+
+
+def get_index() -> Optional[SimilarityIndex]:
+    """현재 인덱스 (없으면 None). 다시 빌드되어 meta.json이 바뀌면 새로 엽니다."""
+    global _index, _index_mtime
+    root = index_dir()
+    try:
+        mtime = os.path.getmtime(os.path.join(root, "meta.json"))
+    except OSError:
+        return None
+    with _index_lock:
+        if _index is None or mtime != _index_mtime:
+            _index = SimilarityIndex.load(root, batch_size=getattr(settings, "SIMILARITY_QUERY_BATCH", 65536))
+            _index_mtime = mtime
+        return _index
+
+
+def _append(key: str, vector: Optional[np.ndarray]) -> bool:
+    """벡터를 인덱스 delta에 추가합니다. (인덱스가 없거나 특성이 없으면 False)"""
+    index = get_index()
+    if index is None:
+        return False
+    if vector is None:
+        SIMILARITY_APPENDS_TOTAL.inc(outcome="skipped")
+        return False
+    index.append(key, vector)
+    SIMILARITY_APPENDS_TOTAL.inc(outcome="appended")
+    return True
+
+
+def add_consulting(consulting: Consulting) -> bool:
+    """새 Consulting의 벡터를 인덱스 delta에 추가합니다. (인덱스가 없거나 특성이 없으면 False)"""
+    vector = raw_vector({name: getattr(consulting, name) for name in FEATURE_DIMS})
+    return _append(f"{CONSULTING}:{consulting.pk}", vector)
+
+
+def add_file(file_obj) -> bool:
+    """새 File의 벡터를 인덱스 delta에 추가합니다. (인덱스가 없거나 특성이 없으면 False)"""
+    vector = raw_vector(_file_features([getattr(file_obj, name) for name in FILE_FEATURE_FIELDS]))
+    return _append(f"{FILE}:{file_obj.pk}", vector)
+
+
+def _append_on_commit(add, instance, key: str) -> None:
+    # 롤백된 행이 인덱스에 남지 않도록 커밋 후 추가 (실패해도 저장에는 영향 없음)
+    from django.db import transaction
+
+    def _run():
+        try:
+            add(instance)
+        except Exception as e:
+            SIMILARITY_APPENDS_TOTAL.inc(outcome="error")
+            logger.warning(f"유사 통화 인덱스 추가 실패 ({key}): {str(e)}")
+
+    transaction.on_commit(_run)
+
+
+def on_consulting_saved(sender, instance, created, **kwargs):
+    """Consulting post_save 수신기: 생성된 상담을 커밋 후 인덱스에 추가합니다. (분석 결과 저장은 제외)"""
+    if not created or kwargs.get("raw"):
+        return
+    _append_on_commit(add_consulting, instance, f"{CONSULTING}:{instance.pk}")
+
+
+def on_file_saved(sender, instance, created, **kwargs):
+    """callytics File post_save 수신기: 생성된 File을 커밋 후 인덱스에 추가합니다."""
+    if not created or kwargs.get("raw"):
+        return
+    _append_on_commit(add_file, instance, f"{FILE}:{instance.pk}")
+
+
+def features_for(key: str) -> Optional[np.ndarray]:
+    """키("consulting:<call_id>" / "file:<id>")의 표준화 전 벡터를 DB에서 읽습니다."""
+    kind, _, ident = key.partition(":")
+    if kind == CONSULTING:
+        names = list(FEATURE_DIMS)
+        row = Consulting.objects.filter(call_id=ident).values_list(*names).first()
+        return raw_vector(dict(zip(names, row))) if row else None
+    file_model = _file_model()
+    if kind == FILE and file_model is not None and ident.isdigit():
+        row = file_model.objects.filter(id=int(ident)).values_list(*FILE_FEATURE_FIELDS).first()
+        return raw_vector(_file_features(row)) if row else None
+    raise ValueError(f"알 수 없는 키 형식입니다: {key} (consulting:<call_id> 또는 file:<id>)")
+
+
+def similar_calls(key: str, k: int = 10, nprobe: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    key와 음성 특성이 가장 비슷한 통화 k개를 반환합니다. (자기 자신 제외)
+
+    Raises:
+        RuntimeError: 인덱스가 아직 빌드되지 않은 경우
+        ValueError: 키 형식이 잘못되었거나 특성이 없는 경우
+    """
+    index = get_index()
+    if index is None:
+        raise RuntimeError("유사 통화 인덱스가 없습니다. python manage.py build_similarity_index 를 먼저 실행하세요.")
+    vector = features_for(key)
+    if vector is None:
+        raise ValueError(f"{key}의 음성 특성을 찾을 수 없습니다.")
+
+    started = time.perf_counter()
+    results = index.search(vector, k=k, exclude=key, nprobe=nprobe)
+    SIMILARITY_QUERY_SECONDS.observe(time.perf_counter() - started, kind=index.kind)
+    return [{"key": match, "score": score} for match, score in results]
@@ -0,0 +1,308 @@
+"""
+apps/consultlytics/synthetic.py
+
+부하 테스트용 합성 상담 데이터(Consulting, ConsultingDetail) 생성기입니다.
+행마다 (seed, 순번)으로 고정된 난수 생성기를 사용하므로 워커 수나 배치 크기와 관계없이
+같은 seed에서는 항상 같은 데이터가 만들어집니다.
+
+- 점수/비율 필드는 실제 분포와 비슷하도록 정규·베타·로그정규 분포에서 추출하고,
+  갈등/비속어 여부가 고객 감정 점수와 연동되도록 생성합니다.
+- 음성 특성(Chroma_stft, SpectralContrast, Tonnetz, MFCC_0_13)과 top_nouns는
+  JSON 문자열이 아닌 숫자/문자열 리스트로 저장합니다.
+- 행은 batch 단위 bulk_create로 저장하며, workers > 1이면 프로세스별로 구간을 나누어 병렬 적재합니다.
+  call_date(auto_now_add)는 저장 직후 생성한 통화 일자로 다시 씁니다. (bulk_create_consulting)
+
+<사용 예시>
+  $ python manage.py create_sample_data --count 1000000 --workers 8 --batch-size 5000
+  $ python create_sample_data.py --count 100 --seed 7
+
+  from apps.consultlytics.synthetic import SyntheticConsultingGenerator
+  row = SyntheticConsultingGenerator(seed=42).make_row(1)
+"""
+
+import math
+import time
+import random
+import logging
+import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Consulting, ConsultingDetail
+from .workers import init_django_worker, process_pool_context
+
+logger = logging.getLogger(__name__)
+
+# 카테고리 (메인 카테고리 → 서브 카테고리 후보)
+CATEGORIES = {
+    "상품문의": ["정기예금", "적금", "펀드가입"],
+    "해지": ["정기예금", "적금", "보험가입"],
+    "대출": ["신용대출", "주택담보대출"],
+    "이자": ["정기예금", "신용대출"],
+    "펀드": ["펀드가입"],
+    "수수료": ["수수료문의"],
+    "보험": ["보험가입"],
+    "환불": ["환불요청"],
+    "카드": ["카드발급"],
+    "비밀번호": ["비밀번호변경"],
+}
+# 메인 카테고리별 발생 비중
+CATEGORY_WEIGHTS = [18, 8, 14, 6, 6, 8, 8, 10, 14, 8]
+
+SENT_LABELS = {"positive": "만족", "neutral": "보통", "negative": "불만족"}
+NOUNS = ["고객", "안내", "상담", "문의", "확인", "처리", "신청", "서류", "기간", "금리",
+         "조건", "이자", "수수료", "카드", "계좌", "대출", "상품", "해지", "환불", "비밀번호"]
+
+CSR_TURNS = [
+    "안녕하세요, 고객님. 상담사 {name}입니다. 무엇을 도와드릴까요?",
+    "네, {noun} 관련 문의 주셨군요. 확인해 드리겠습니다.",
+    "잠시만 기다려 주시겠어요?",
+    "기다려 주셔서 감사합니다. {noun}은 {noun2} 조건에 따라 달라집니다.",
+    "불편을 드려 죄송합니다. 바로 처리해 드리겠습니다.",
+    "다른 방법으로는 {noun2} 변경도 가능합니다.",
+    "네, 맞습니다.",
+    "더 궁금하신 점 있으신가요?",
+    "감사합니다. 좋은 하루 되세요.",
+]
+CUSTOMER_TURNS = [
+    "{noun} 때문에 전화했어요.",
+    "네.",
+    "아 네, 그렇군요.",
+    "{noun2}은 어떻게 되나요?",
+    "지난번에도 같은 문제로 연락했는데 해결이 안 됐어요.",
+    "그럼 {noun} 처리는 언제 되나요?",
+    "알겠습니다. 감사합니다.",
+]
+CSR_NAMES = ["김민지", "이서준", "박지우", "최하은", "정도윤"]
+
+
+def _clip(value: float, low: float, high: float) -> float:
+    return max(low, min(high, value))
+
+
+def bulk_create_consulting(rows: List[Consulting], batch_size: int = 2000) -> None:
+    """
+    상담 데이터를 bulk_create로 저장한 뒤 call_date를 생성한 통화 일자로 되돌립니다.
+    call_date는 auto_now_add라 bulk_create에서도 현재 시각으로 덮어써지므로, 필드 설정을 바꾸지 않고
+    저장 후 bulk_update로 다시 씁니다. (한 트랜잭션 안에서 호출)
+    """
+    call_dates = [row.call_date for row in rows]
+    Consulting.objects.bulk_create(rows, batch_size=batch_size)
+    for row, call_date in zip(rows, call_dates):
+        row.call_date = call_date
+    # CASE 식이 너무 길어지지 않도록 bulk_create보다 작은 배치로 갱신
+    Consulting.objects.bulk_update(rows, ["call_date"], batch_size=min(batch_size, 500))
+
+
+class SyntheticConsultingGenerator:
+    """
+    합성 상담 데이터 생성기
+      - seed      : 난수 시드
+      - days      : 통화 일자를 분포시킬 기간 (오늘 기준 과거 일수)
+      - prefix    : call_id 접두사
+      - width     : call_id 순번 자릿수
+      - now       : 통화 일자 기준 시각 (기본값: 현재 시각)
+    """
+
+    def __init__(self, seed: int = 42, days: int = 90, prefix: str = "CALL_", width: int = 3,
+                 now: Optional[datetime.datetime] = None):
+        self.seed = seed
+        self.days = days
+        self.prefix = prefix
+        self.width = width
+        self.now = now or timezone.now()
+
+    def rng_for(self, index: int) -> random.Random:
+        """순번별로 고정된 난수 생성기"""
+        return random.Random(f"{self.seed}:{index}")
+
+    def call_id(self, index: int) -> str:
+        return f"{self.prefix}{index:0{self.width}d}"
+
+    def make_turns(self, rng: random.Random, count: int, nouns: List[str]) -> List[Tuple[str, str, str]]:
+        """(speaker, content, timestamp) 발화 목록을 생성합니다."""
+        name = rng.choice(CSR_NAMES)
+        turns = []
+        elapsed = 0
+        for sequence in range(count):
+            speaker = "CSR" if sequence % 2 == 0 else "고객"
+            templates = CSR_TURNS if speaker == "CSR" else CUSTOMER_TURNS
+            template = templates[0] if sequence == 0 else rng.choice(templates)
+            content = template.format(name=name, noun=rng.choice(nouns), noun2=rng.choice(nouns))
+            # timestamp는 CharField 정렬을 위해 HH:MM:SS 0 채움 형식 사용
+            timestamp = f"{elapsed // 3600:02d}:{elapsed % 3600 // 60:02d}:{elapsed % 60:02d}"
+            turns.append((speaker, content, timestamp))
+            elapsed += rng.randint(2, 25)
+        return turns
+
+    def make_row(self, index: int, details_per_call: int = 0) -> Tuple[Consulting, List[ConsultingDetail]]:
+        """순번에 해당하는 상담 데이터와 발화 목록을 생성합니다."""
+        rng = self.rng_for(index)
+        call_id = self.call_id(index)
+
+        mid_category = rng.choices(list(CATEGORIES), weights=CATEGORY_WEIGHTS)[0]
+        content_category = rng.choice(CATEGORIES[mid_category])
+
+        # 통화 길이(초): 중앙값 약 7분의 로그정규 분포
+        call_duration = int(_clip(rng.lognormvariate(math.log(420), 0.5), 60, 3600))
+        silence = int(call_duration * rng.betavariate(2, 12))
+        csr_speech_count = max(4, int(rng.gauss(call_duration / 12, 4)))
+        customer_speech_count = max(3, int(csr_speech_count * rng.uniform(0.6, 1.1)))
+
+        conflict = rng.random() < 0.12
+        profane = conflict and rng.random() < 0.25
+        csr_star = int(_clip(round(rng.gauss(4.2, 0.7)), 1, 5))
+        customer_star = int(_clip(round(rng.gauss(2.6 if conflict else 3.8, 0.9)), 1, 5))
+        sentiment = "negative" if customer_star <= 2 else ("positive" if customer_star >= 4 else "neutral")
+
+        nouns = rng.sample(NOUNS, 10)
+        turn_count = details_per_call or rng.randint(6, 14)
+        turns = self.make_turns(rng, turn_count, nouns)
+        first_csr = turns[0]
+        last_turn = turns[-1]
+
+        row = Consulting(
+            call_id=call_id,
+            call_date=self.now - datetime.timedelta(seconds=rng.randint(0, max(1, self.days) * 86400)),
+            call_duration=call_duration,
+            silence=silence,
+            csr_speech_count=csr_speech_count,
+            customer_speech_count=customer_speech_count,
+            csr_emotion_score=round(_clip(rng.gauss(csr_star, 0.3), 1.0, 5.0), 2),
+            customer_emotion_score=round(_clip(rng.gauss(customer_star, 0.4), 1.0, 5.0), 2),
+            efficiency_score=int(_clip(rng.gauss(82, 9), 0, 100)),
+            final_score=int(_clip(rng.gauss(70 if conflict else 82, 10), 0, 100)),
+            alternative_solution_count=rng.choices([0, 1, 2, 3, 4], weights=[15, 35, 30, 15, 5])[0],
+            apology_ratio=round(rng.betavariate(2, 12 if not conflict else 5), 3),
+            positive_word_ratio=round(rng.betavariate(6, 3), 3),
+            euphonious_word_ratio=round(rng.betavariate(5, 4), 3),
+            empathy_expression_ratio=round(rng.betavariate(6, 3), 3),
+            consulting_content="\n".join(f"{speaker}: {content}" for speaker, content, _ in turns),
+            Extension="wav",
+            Path=f"/data/calls/{call_id.lower()}.wav",
+            Rate=16000,
+            BitDepth=16,
+            Channels=1,
+            Duration=call_duration * 16000 // 512,
+            MinFreq=rng.randint(40, 120),
+            MaxFreq=rng.randint(4000, 8000),
+            RMSLoudness=round(rng.uniform(0.4, 0.95), 3),
+            ZeroCrossingRate=round(rng.uniform(0.02, 0.15), 4),
+            SpectralCentroid=round(rng.gauss(2100, 250), 1),
+            SpectralBandwidth=round(rng.gauss(1600, 200), 1),
+            SpectralFlatness=round(rng.uniform(0.1, 0.5), 3),
+            RollOff=round(rng.gauss(4300, 400), 1),
+            Chroma_stft=[round(rng.uniform(0, 1), 4) for _ in range(12)],
+            SpectralContrast=[round(rng.gauss(20, 5), 4) for _ in range(7)],
+            Tonnetz=[round(rng.uniform(-1, 1), 4) for _ in range(6)],
+            MFCC_0_13=[round(rng.gauss(0, 40 if i == 0 else 15), 4) for i in range(14)],
+            Summary=f"{mid_category} - {content_category} 관련 상담",
+            Conflict=conflict,
+            Speaker=first_csr[0],
+            Sequence=turn_count,
+            StartTime=0,
+            EndTime=call_duration * 16000 // 512,
+            Content=last_turn[1],
+            Sentiment=sentiment,
+            Profane=profane,
+            top_nouns=nouns,
+            sent_score=round(_clip(rng.gauss((customer_star - 3) / 2, 0.2), -1.0, 1.0), 3),
+            sent_label=SENT_LABELS[sentiment],
+            mid_category=mid_category,
+            content_category=content_category,
+            script_phrase_ratio=round(rng.betavariate(7, 3), 3),
+            honorific_ratio=round(rng.betavariate(9, 2), 3),
+            confirmation_ratio=round(rng.betavariate(4, 5), 3),
+            request_ratio=round(rng.betavariate(3, 6), 3),
+            conflict_flag=conflict,
+        )
+        setattr(row, f"emo_{csr_star}_star_score", True)
+        setattr(row, f"고객_emo_{customer_star}_star_score", True)
+
+        details = [
+            ConsultingDetail(consulting_id=call_id, speaker=speaker, content=content, timestamp=timestamp)
+            for speaker, content, timestamp in turns
+        ]
+        return row, details
+
+
+def generate_range(start: int, count: int, seed: int, days: int, prefix: str, width: int,
+                   batch_size: int = 2000, details_per_call: int = 0, with_details: bool = True,
+                   now: Optional[datetime.datetime] = None) -> int:
+    """
+    [start, start + count) 구간의 합성 데이터를 batch 단위로 저장합니다.
+
+    Returns:
+        저장한 상담 데이터 수
+    """
+    generator = SyntheticConsultingGenerator(seed=seed, days=days, prefix=prefix, width=width, now=now)
+    created = 0
+    for batch_start in range(start, start + count, batch_size):
+        batch_end = min(batch_start + batch_size, start + count)
+        rows, details = [], []
+        for index in range(batch_start, batch_end):
+            row, row_details = generator.make_row(index, details_per_call)
+            rows.append(row)
+            if with_details:
+                details.extend(row_details)
+
+        with transaction.atomic():
+            bulk_create_consulting(rows, batch_size=batch_size)
+            if details:
+                ConsultingDetail.objects.bulk_create(details, batch_size=batch_size * 4)
+        created += len(rows)
+    return created
+
+
+def generate(count: int, seed: int = 42, workers: int = 1, batch_size: int = 2000,
+             days: int = 90, prefix: str = "CALL_", start_index: int = 1,
+             details_per_call: int = 0, with_details: bool = True) -> int:
+    """
+    합성 상담 데이터 count건을 생성해 저장합니다.
+
+    Args:
+        count: 생성할 상담 데이터 수
+        seed: 난수 시드
+        workers: 병렬 적재 프로세스 수 (1이면 현재 프로세스에서 처리)
+        batch_size: bulk_create 배치 크기
+        days: 통화 일자를 분포시킬 과거 일수
+        prefix: call_id 접두사
+        start_index: 첫 call_id 순번
+        details_per_call: 상담당 발화 수 (0이면 6~14 사이 무작위)
+        with_details: ConsultingDetail 생성 여부
+
+    Returns:
+        저장한 상담 데이터 수
+    """
+    width = max(3, len(str(start_index + count - 1)))
+    now = timezone.now()
+    started = time.perf_counter()
+
+    if workers <= 1:
+        created = generate_range(start_index, count, seed, days, prefix, width,
+                                 batch_size, details_per_call, with_details, now)
+    else:
+        # 작업 단위를 워커 수보다 잘게 나누어 부하를 고르게 분산
+        chunk_size = max(batch_size, math.ceil(count / (workers * 4)))
+        chunks = [(start, min(chunk_size, start_index + count - start))
+                  for start in range(start_index, start_index + count, chunk_size)]
+
+        # forkserver 워커: 부모의 DB 연결·로그 리스너 스레드를 물려받지 않고 워커에서 새로 설정
+        created = 0
+        with ProcessPoolExecutor(max_workers=workers, mp_context=process_pool_context(),
+                                 initializer=init_django_worker) as executor:
+            futures = [
+                executor.submit(generate_range, start, size, seed, days, prefix, width,
+                                batch_size, details_per_call, with_details, now)
+                for start, size in chunks
+            ]
+            for future in as_completed(futures):
+                created += future.result()
+                logger.info(f"합성 데이터 적재 진행: {created}/{count}")
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"합성 데이터 {created}건 생성 완료 ({elapsed:.1f}초, {created / elapsed if elapsed else 0:.0f}건/초)")
+    return created
@@ -0,0 +1,144 @@
+"""
+apps/consultlytics/tasks.py
+
+상담 분석을 Celery 워커로 분산 실행하는 태스크입니다.
+코디네이터(dispatch_analysis)가 call_id를 페이지 단위로 나누어 페이지마다
+chord(group(analyze_consultation_task ...), aggregate_results)로 팬아웃하고,
+페이지별 성공/실패 건수를 합산합니다.
+LLM 호출은 rate_limit.py의 토큰 버킷(Redis 공유)으로 모든 워커 합계가 제한되며,
+llm_scheduler.py의 우선순위 클래스별 reserve에 따라 대시보드 요청 몫을 남겨둡니다.
+
+<설정 안내>
+- config/celery.py에 Celery 앱이 설정되어 있어야 하며, chord 집계를 위해 CELERY_RESULT_BACKEND가 필요합니다.
+- 브로커 없이 테스트할 때는 CELERY_TASK_ALWAYS_EAGER=True 로 설정하세요. (태스크가 호출한 프로세스에서 바로 실행)
+
+<사용 예시>
+  celery -A config worker -l info --concurrency 8     # 노드마다 실행
+  python manage.py analyze_distributed --page-size 500 --only-unscored
+
+  from apps.consultlytics.tasks import dispatch_analysis
+  summary = dispatch_analysis(page_size=500)   # {"pages": .., "dispatched": .., "success": .., "failed": ..}
+  dispatch_analysis(priority="reanalysis")    # 이미 점수가 있는 상담 재분석
+"""
+
+import time
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+
+from celery import chord, group, shared_task
+
+from .models import Consulting
+from .llm_scheduler import BACKFILL, get_llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, acks_late=True)
+def analyze_consultation_task(self, call_id: str, priority: str = BACKFILL) -> Dict[str, Any]:
+    """
+    상담 한 건을 분석하여 저장합니다. (services.analyze_consultation 래퍼)
+    호출 한도를 넘으면 워커 슬롯을 점유하지 않도록 토큰이 생길 때까지 재예약합니다.
+    """
+    scheduler = get_llm_scheduler()
+    wait = scheduler.try_acquire(priority)
+    if wait > 0:
+        if not self.request.is_eager:
+            raise self.retry(countdown=wait, max_retries=None)
+        scheduler.acquire(priority)
+
+    # LLM 클라이언트 초기화는 워커에서만 수행
+    from .services import analyze_consultation
+
+    result = analyze_consultation(call_id, priority=priority, admitted=True)
+    return {"call_id": call_id, "status": "completed" if result else "failed"}
+
+
+@shared_task
+def aggregate_results(results: List[Dict[str, Any]], page: Optional[int] = None) -> Dict[str, Any]:
+    """chord 콜백: 한 페이지의 태스크 결과를 성공/실패 건수로 집계합니다."""
+    success = sum(1 for r in results if r and r.get("status") == "completed")
+    failed = [r["call_id"] for r in results if r and r.get("status") != "completed"]
+    logger.info(f"분산 분석 페이지 {page} 완료: 성공 {success}건, 실패 {len(failed)}건")
+    return {"page": page, "success": success, "failed": len(failed), "failed_ids": failed}
+
+
+def iter_call_id_pages(page_size: int = 500, only_unscored: bool = False) -> Iterator[List[str]]:
+    """call_id를 PK 순서로 page_size개씩 읽습니다. (keyset 페이지네이션)"""
+    queryset = Consulting.objects.order_by("call_id")
+    if only_unscored:
+        queryset = queryset.filter(score__isnull=True)
+
+    last_id = None
+    while True:
+        page = queryset if last_id is None else queryset.filter(call_id__gt=last_id)
+        call_ids = list(page.values_list("call_id", flat=True)[:page_size])
+        if not call_ids:
+            return
+        yield call_ids
+        last_id = call_ids[-1]
+
+
+def dispatch_analysis(page_size: int = 500, only_unscored: bool = False,
+                      wait: bool = True, timeout: Optional[float] = None,
+                      priority: str = BACKFILL) -> Dict[str, Any]:
+    """
+    분석 대상 call_id를 페이지 단위 chord로 팬아웃합니다.
+
+    Args:
+        page_size: chord 하나에 담을 태스크 수
+        only_unscored: score가 없는(미분석) 상담만 대상
+        wait: 모든 페이지 집계가 끝날 때까지 기다려 합계를 반환
+        timeout: 페이지별 결과 대기 시간(초)
+        priority: LLM 스케줄러 우선순위 클래스 (reanalysis / backfill)
+
+    Returns:
+        pages, dispatched, success, failed (wait=False면 success/failed 없이 chord id 목록)
+    """
+    started = time.perf_counter()
+    pending = []
+    dispatched = 0
+
+    for page_no, call_ids in enumerate(iter_call_id_pages(page_size, only_unscored), start=1):
+        header = group(analyze_consultation_task.s(call_id, priority) for call_id in call_ids)
+        pending.append(chord(header)(aggregate_results.s(page=page_no)))
+        dispatched += len(call_ids)
+        logger.info(f"분산 분석 페이지 {page_no} 전송: {len(call_ids)}건")
+
+    summary: Dict[str, Any] = {"pages": len(pending), "dispatched": dispatched}
+    if not wait:
+        summary["chord_ids"] = [r.id for r in pending]
+        return summary
+
+    success = failed = 0
+    failed_ids: List[str] = []
+    for async_result in pending:
+        page_summary = async_result.get(timeout=timeout)
+        success += page_summary["success"]
+        failed += page_summary["failed"]
+        failed_ids.extend(page_summary["failed_ids"])
+
+    summary.update({
+        "success": success,
+        "failed": failed,
+        "failed_ids": failed_ids,
+        "seconds": round(time.perf_counter() - started, 2),
+    })
+    logger.info(f"분산 분석 완료: {dispatched}건 중 성공 {success}건, 실패 {failed}건")
+    return summary
+
+
+@shared_task
+def project_analysis_outbox(limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    분석 결과 outbox를 보조 저장소(feple_analysis.analysis_results)에 반영합니다. (ANALYSIS_PROJECTION=async)
+    celery beat로 주기 실행하거나 relay_analysis_outbox 관리 명령을 대신 사용합니다.
+    """
+    from .result_store import drain_outbox, outbox_backlog
+
+    projected = 0
+    while True:
+        count = drain_outbox(limit)
+        projected += count
+        if not count:
+            break
+    return {"projected": projected, **outbox_backlog()}
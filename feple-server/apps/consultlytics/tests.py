@@ -1,3 +1,1105 @@
-from django.test import TestCase
+import datetime
+import gzip
+import importlib
+import logging
+import json
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
 
-# Create your tests here.
+import numpy as np
+from unittest import mock
+
+from concurrent.futures import ThreadPoolExecutor
+
+from config.celery import app as celery_app
+from django.utils import timezone
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from . import bulk_ingest, llm_calls, query_plans, retention, services, views
+from .checkpoint import DONE, FAILED, RunManifest
+from .context_cache import PrefixCachingLLM
+from .fake_llm import FakeContextCacheProvider, FakeLLM
+from .llm_calls import HedgeBudget, LatencyTracker, LLMDeadlineExceeded, invoke_llm
+from .llm_providers import OfflineProvider, RecordingProvider, RecordWriter, ReplayedLLMError
+from .log_utils import JsonFormatter, ProgressLogger, QueueListenerHandler
+from .llm_scheduler import BACKFILL, INTERACTIVE, REANALYSIS, LLMScheduler
+from .metrics import MetricsRegistry, start_periodic_dump
+from .model_router import FAST, PRO, needs_escalation, route_tier
+from .models import AnalysisOutbox, Consulting, ConsultingDetail, DailyScoreRollup
+from .pipeline import build_analysis_pipeline, record_outcome
+from .query_plans import collect_query_plans, find_plan_problems
+from .rate_limit import TokenBucket
+from .result_query import ResultFilter, iter_result_batches
+from . import result_store
+from .result_store import claim_outbox, drain_outbox, save_analysis, save_analysis_batch
+from .result_stream import JsonlResultWriter, iter_results
+from .retention import RetentionPolicy, archive_analysis_results, archive_consulting
+from .rollups import ROLLUP_METRICS, rebuild_rollups
+from .similarity import DIM, IVF, SimilarityIndex
+from .similarity import build_index as build_vector_index
+from .similarity_store import build_index, similar_calls
+from .synthetic import SyntheticConsultingGenerator, bulk_create_consulting, generate
+from .tasks import dispatch_analysis
+from .transcript import compress_transcript
+
+PREFIX = "고정 지시문입니다.\n"
+
+
+class PrefixCachingLLMTests(SimpleTestCase):
+    """가짜 캐시 제공자(FakeContextCacheProvider)로 캐시 적중·일반 호출 대체·만료 경로를 확인합니다."""
+
+    def setUp(self):
+        self.fake = FakeLLM(latency_ms=0, distribution="fixed", seed=1)
+
+    def _llm(self, **kwargs):
+        provider = FakeContextCacheProvider(self.fake, fail_create=kwargs.pop("fail_create", False))
+        return PrefixCachingLLM(self.fake, provider, PREFIX, model="fake-llm", **kwargs), provider
+
+    def test_hit_reuses_cache_and_matches_plain_response(self):
+        llm, provider = self._llm()
+        prompt = PREFIX + "상담 데이터 1"
+
+        first = llm.invoke(prompt).content
+        llm.invoke(PREFIX + "상담 데이터 2")
+
+        self.assertEqual(first, self.fake.invoke(prompt).content)
+        self.assertEqual((provider.created, provider.generated), (1, 2))
+
+    def test_identical_prefix_hits_and_changed_prefix_misses(self):
+        llm, provider = self._llm()
+        llm.invoke(PREFIX + "상담 데이터 1")
+        llm.invoke(PREFIX + "상담 데이터 2")
+        self.assertEqual((provider.created, provider.generated), (1, 2))
+
+        # 고정 지시문이 바뀐 프롬프트는 기존 캐시를 쓰지 않고 일반 호출
+        changed = "바뀐 지시문입니다.\n상담 데이터 1"
+        self.assertEqual(llm.invoke(changed).content, self.fake.invoke(changed).content)
+        self.assertEqual((provider.created, provider.generated), (1, 2))
+
+    def test_prompt_without_prefix_falls_back(self):
+        llm, provider = self._llm()
+        llm.invoke("다른 프롬프트")
+        self.assertEqual((provider.created, provider.generated), (0, 0))
+
+    def test_below_min_tokens_is_disabled(self):
+        llm, provider = self._llm(min_tokens=10000)
+        self.assertFalse(llm.enabled)
+        llm.invoke(PREFIX + "상담 데이터")
+        self.assertEqual(provider.created, 0)
+
+    def test_create_failure_falls_back_until_retry_after(self):
+        llm, provider = self._llm(fail_create=True, retry_after=600)
+        prompt = PREFIX + "상담 데이터"
+
+        self.assertEqual(llm.invoke(prompt).content, self.fake.invoke(prompt).content)
+        provider.fail_create = False
+        llm.invoke(prompt)
+
+        # 실패 후 retry_after 동안은 다시 만들지 않음
+        self.assertEqual((provider.created, provider.generated), (0, 0))
+
+    def test_expired_cache_falls_back_then_recreates(self):
+        llm, provider = self._llm()
+        prompt = PREFIX + "상담 데이터"
+        llm.invoke(prompt)
+
+        provider.evict()
+        self.assertEqual(llm.invoke(prompt).content, self.fake.invoke(prompt).content)
+        self.assertEqual(provider.generated, 1)
+
+        llm.invoke(prompt)
+        self.assertEqual((provider.created, provider.generated), (2, 2))
+
+
+class EscalationSlotTests(SimpleTestCase):
+    """pro 등급 재요청은 첫 호출 차례를 이미 받은 경우에도 같은 우선순위 클래스로 차례를 받습니다."""
+
+    def setUp(self):
+        patches = {
+            "needs_escalation": mock.patch.object(services, "needs_escalation", return_value=True),
+            "record_escalation": mock.patch.object(services, "record_escalation"),
+            "invoke_tier": mock.patch.object(services, "invoke_tier",
+                                             return_value=SimpleNamespace(content='{"summary": "ok"}')),
+            "parse_response": mock.patch.object(services, "parse_response", return_value=({"summary": "ok"}, [])),
+        }
+        self.mocks = {name: patcher.start() for name, patcher in patches.items()}
+        self.addCleanup(mock.patch.stopall)
+
+    def test_escalation_acquires_slot_with_task_priority(self):
+        with mock.patch.object(services, "acquire_llm_slot", return_value=True) as acquire:
+            escalated = services.escalate_analysis("CALL_1", FAST, "prompt", (None, ["summary"]), BACKFILL)
+
+        acquire.assert_called_once_with(BACKFILL)
+        self.mocks["invoke_tier"].assert_called_once_with(PRO, "prompt", BACKFILL)
+        self.assertEqual(escalated["tier"], PRO)
+
+    def test_escalation_without_slot_keeps_fast_result(self):
+        with mock.patch.object(services, "acquire_llm_slot", return_value=False):
+            escalated = services.escalate_analysis("CALL_1", FAST, "prompt", (None, ["summary"]), BACKFILL)
+
+        self.assertIsNone(escalated)
+        self.mocks["invoke_tier"].assert_not_called()
+
+
+@override_settings(LLM_ROUTING_ENABLED=True, LLM_MODEL_FAST="gemini-fast", LLM_ROUTING_MIN_SCORE=80,
+                   LLM_ROUTING_MIN_MANUAL=0.8, LLM_ESCALATE_ON_INVALID=True)
+class ModelRoutingTests(SimpleTestCase):
+    """일상적인 상담만 fast 등급으로 보내고, fast 응답이 검증을 통과하지 못하면 pro 등급으로 재요청합니다."""
+
+    def test_route_tier(self):
+        routine = {"final_score": 90, "manual_compliance": 0.9}
+        self.assertEqual(route_tier({}, routine), FAST)
+        self.assertEqual(route_tier({"conflict_flag": True}, routine), PRO)
+        self.assertEqual(route_tier({}, dict(routine, final_score=60)), PRO)
+
+    def test_needs_escalation_on_parse_failure_or_invalid_score(self):
+        self.assertFalse(needs_escalation({"평가점수": 85}, []))
+        self.assertTrue(needs_escalation(None, []))
+        self.assertTrue(needs_escalation({"평가점수": 85}, ["코칭 멘트"]))
+        self.assertTrue(needs_escalation({"평가점수": 0}, []))
+        self.assertTrue(needs_escalation({"평가점수": "높음"}, []))
+
+    def test_parse_failure_escalates_fast_to_pro(self):
+        pro_response = SimpleNamespace(
+            content="1. 평가점수: 85\n2. 상담자 강점: 친절함\n3. 상담자 단점: 없음\n4. 개선점: 없음\n5. 코칭 멘트: 좋습니다"
+        )
+        with mock.patch.object(services, "acquire_llm_slot", return_value=True), \
+                mock.patch.object(services, "record_escalation"), \
+                mock.patch.object(services, "invoke_tier", return_value=pro_response) as invoke_tier:
+            escalated = services.escalate_analysis("CALL_1", FAST, "prompt", (None, []), BACKFILL)
+            self.assertIsNone(services.escalate_analysis("CALL_2", FAST, "prompt", ({"평가점수": 85}, []), BACKFILL))
+
+        invoke_tier.assert_called_once_with(PRO, "prompt", BACKFILL)
+        self.assertEqual(escalated["tier"], PRO)
+        self.assertEqual(escalated["parsed"][0]["평가점수"], 85)
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, ANALYSIS_PROJECTION="off", LLM_ROUTING_ENABLED=False)
+class DispatchAnalysisEagerTests(TestCase):
+    """브로커 없이(CELERY_TASK_ALWAYS_EAGER) offline 제공자로 페이지별 chord 집계를 확인합니다."""
+
+    def setUp(self):
+        generator = SyntheticConsultingGenerator(seed=7, prefix="TASK_", width=3)
+        rows, details = [], []
+        for index in range(1, 6):
+            row, row_details = generator.make_row(index)
+            rows.append(row)
+            details.extend(row_details)
+        bulk_create_consulting(rows)
+        ConsultingDetail.objects.bulk_create(details)
+
+        # celery 앱 설정은 시작 시 한 번 읽으므로 eager 실행은 앱 설정에도 직접 적용
+        previous = {name: celery_app.conf[name] for name in ("task_always_eager", "task_eager_propagates")}
+        celery_app.conf.update(task_always_eager=True, task_eager_propagates=True)
+        self.addCleanup(celery_app.conf.update, previous)
+        llm = mock.patch.object(services, "llm", OfflineProvider())
+        llm.start()
+        self.addCleanup(llm.stop)
+
+    def test_aggregates_success_and_failure_counts(self):
+        fetch = services.fetch_consultation
+
+        def fetch_or_missing(call_id):
+            # 페이지를 읽은 뒤 삭제된 행처럼 not_found로 실패
+            if call_id == "TASK_003":
+                raise Consulting.DoesNotExist(call_id)
+            return fetch(call_id)
+
+        with mock.patch.object(services, "fetch_consultation", side_effect=fetch_or_missing):
+            summary = dispatch_analysis(page_size=2, priority=BACKFILL)
+
+        self.assertEqual((summary["pages"], summary["dispatched"]), (3, 5))
+        self.assertEqual((summary["success"], summary["failed"]), (4, 1))
+        self.assertEqual(summary["failed_ids"], ["TASK_003"])
+        self.assertEqual(Consulting.objects.filter(score__isnull=False).count(), 4)
+
+
+class SleepyLLM:
+    """호출마다 delays의 다음 값만큼 기다린 뒤 몇 번째 호출인지 응답하는 LLM"""
+
+    model = "sleepy"
+
+    def __init__(self, *delays: float):
+        self.delays = list(delays)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self._lock:
+            self.calls += 1
+            index = self.calls
+        time.sleep(self.delays[min(index, len(self.delays)) - 1])
+        return SimpleNamespace(content=f"call-{index}")
+
+
+class LLMCallTests(SimpleTestCase):
+    """invoke_llm의 마감 시간, 헤지 요청, 헤지 비율 상한을 확인합니다."""
+
+    def setUp(self):
+        for name, value in (("_tracker", LatencyTracker()), ("_budget", HedgeBudget())):
+            patcher = mock.patch.object(llm_calls, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _use_executor(self, workers: int) -> ThreadPoolExecutor:
+        executor = ThreadPoolExecutor(max_workers=workers)
+        self.addCleanup(executor.shutdown)
+        patcher = mock.patch.object(llm_calls, "_executor", executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return executor
+
+    def test_deadline_raises(self):
+        with self.assertRaises(LLMDeadlineExceeded):
+            invoke_llm(SleepyLLM(0.5), "prompt", timeout=0.05, hedge=False)
+
+    def test_deadline_starts_when_call_runs(self):
+        executor = self._use_executor(1)
+        executor.submit(time.sleep, 0.2)   # 풀이 차 있어 호출이 0.2초 대기열에 머묾
+
+        response = invoke_llm(SleepyLLM(0.05), "prompt", timeout=0.15, hedge=False)
+        self.assertEqual(response.content, "call-1")
+
+    @override_settings(LLM_HEDGE_MIN_SAMPLES=5, LLM_HEDGE_QUANTILE=0.95, LLM_HEDGE_BUDGET=1.0)
+    def test_hedge_fires_after_quantile_delay(self):
+        self._use_executor(4)
+        for _ in range(5):
+            llm_calls._tracker.observe("sleepy", 0.05)
+        llm = SleepyLLM(1.0, 0.0)
+
+        started = time.monotonic()
+        response = invoke_llm(llm, "prompt", timeout=5, hedge=True)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(response.content, "call-2")
+        self.assertGreaterEqual(elapsed, 0.05)
+        self.assertLess(elapsed, 0.9)
+
+    @override_settings(LLM_HEDGE_MIN_SAMPLES=1000)
+    def test_no_hedge_without_enough_samples(self):
+        llm = SleepyLLM(0.1, 0.0)
+        self.assertEqual(invoke_llm(llm, "prompt", timeout=5, hedge=True).content, "call-1")
+        self.assertEqual(llm.calls, 1)
+
+    def test_hedge_budget_refuses_above_ratio(self):
+        budget = HedgeBudget()
+        for _ in range(20):
+            budget.record_call()
+
+        self.assertEqual([budget.try_spend(0.1) for _ in range(3)], [True, True, False])
+        budget.record_call()
+        self.assertFalse(budget.try_spend(0.1))
+
+    def test_pool_size_leaves_room_for_hedges(self):
+        with self.settings(LLM_CONCURRENCY=10, LLM_CALL_THREADS=0):
+            self.assertEqual(llm_calls.call_pool_size(), 20)
+        with self.settings(LLM_CONCURRENCY=10, LLM_CALL_THREADS=64):
+            self.assertEqual(llm_calls.call_pool_size(), 64)
+
+
+class AnalyzeViewTests(TestCase):
+    """대시보드 분석 API(analyze_consulting)의 LLM 호출 경로를 확인합니다."""
+
+    def setUp(self):
+        row, _ = SyntheticConsultingGenerator(seed=5, prefix="VIEW_", width=3).make_row(1)
+        row.save()
+        self.call_id = row.call_id
+
+    def _get(self):
+        request = RequestFactory().get(f"/consultlytics/analyze/{self.call_id}/")
+        return views.analyze_consulting(request, self.call_id)
+
+    @override_settings(LLM_TIMEOUT=0.05, LLM_HEDGE_ENABLED=False)
+    def test_deadline_exceeded_returns_504(self):
+        with mock.patch.object(views, "llm_for_tier", return_value=SleepyLLM(0.5)):
+            response = self._get()
+
+        self.assertEqual(response.status_code, 504)
+
+    @override_settings(LLM_TIMEOUT=0.05, LLM_HEDGE_ENABLED=False)
+    def test_uses_shared_analysis_client(self):
+        self.assertIs(views.llm_for_tier(PRO), services.llm)
+
+        shared = SleepyLLM(0.5)
+        with mock.patch.object(services, "llm", shared):
+            response = self._get()
+
+        self.assertEqual(shared.calls, 1)
+        self.assertEqual(response.status_code, 504)
+
+
+@override_settings(ANALYSIS_PROJECTION="off", LLM_ROUTING_ENABLED=False)
+class StagedPipelineTests(TransactionTestCase):
+    """offline 제공자로 단계별 파이프라인의 결과 순서, 실패 전달, 중간 종료를 확인합니다."""
+
+    def setUp(self):
+        generator = SyntheticConsultingGenerator(seed=11, prefix="PIPE_", width=3)
+        bulk_create_consulting([generator.make_row(index)[0] for index in range(1, 7)])
+        self.call_ids = [f"PIPE_{index:03d}" for index in range(1, 7)]
+        llm = mock.patch.object(services, "llm", OfflineProvider())
+        llm.start()
+        self.addCleanup(llm.stop)
+
+    def _pipeline(self, **kwargs):
+        options = dict(fetch_workers=1, cpu_workers=1, llm_workers=1, save_workers=1, queue_size=1)
+        options.update(kwargs)
+        return build_analysis_pipeline(**options)
+
+    def _pipeline_threads(self):
+        return [thread for thread in threading.enumerate() if thread.name.startswith("pipeline-")]
+
+    def test_single_width_keeps_order_and_passes_failures_through(self):
+        call_ids = self.call_ids[:2] + ["PIPE_MISSING"] + self.call_ids[2:]
+
+        results = list(self._pipeline().run(call_ids))
+
+        self.assertEqual([ctx["call_id"] for ctx in results], call_ids)
+        self.assertEqual(results[2]["failed_stage"], "fetch")
+        outcomes = [record_outcome(ctx) for ctx in results]
+        self.assertIsNone(outcomes[2])
+        self.assertEqual(sum(outcome is not None for outcome in outcomes), 6)
+        self.assertEqual(Consulting.objects.filter(call_id__startswith="PIPE_", score__isnull=False).count(), 6)
+
+    def test_early_stop_shuts_down_stages(self):
+        on_close = mock.Mock()
+        pipeline = self._pipeline()
+        pipeline.on_close.append(on_close)
+        run = pipeline.run(self.call_ids * 5)
+
+        first = next(run)
+        run.close()
+
+        self.assertEqual(first["call_id"], "PIPE_001")
+        on_close.assert_called_once_with()
+        self.assertEqual(self._pipeline_threads(), [])
+
+
+class SyntheticDataTests(TestCase):
+    """같은 seed로 다시 생성하면 통화 일자를 포함해 같은 데이터가 저장됩니다."""
+
+    FIELDS = ("call_id", "call_date", "mid_category", "content_category", "final_score", "top_nouns", "Chroma_stft")
+
+    def _generate(self):
+        Consulting.objects.filter(call_id__startswith="SEED_").delete()
+        generate(5, seed=21, batch_size=2, days=10, prefix="SEED_")
+        rows = list(Consulting.objects.filter(call_id__startswith="SEED_").order_by("call_id").values_list(*self.FIELDS))
+        details = list(ConsultingDetail.objects.filter(consulting__call_id__startswith="SEED_")
+                       .order_by("consulting_id", "id").values_list("consulting_id", "speaker", "content"))
+        return rows, details
+
+    def test_same_seed_gives_same_rows(self):
+        now = timezone.now()
+        with mock.patch.object(timezone, "now", return_value=now):
+            first = self._generate()
+            second = self._generate()
+
+        self.assertEqual(len(first[0]), 5)
+        self.assertEqual(first, second)
+        # call_date는 auto_now_add로 덮어써지지 않고 생성기가 정한 값
+        expected = SyntheticConsultingGenerator(seed=21, days=10, prefix="SEED_", now=now).make_row(1)[0].call_date
+        self.assertEqual(first[0][0][1], expected)
+        self.assertTrue(Consulting._meta.get_field("call_date").auto_now_add)
+
+
+class QueryPlanTests(TestCase):
+    """마이그레이션된 SQLite 테스트 DB에서 카탈로그 쿼리의 실행 계획을 확인합니다."""
+
+    def test_catalog_has_no_plan_problems(self):
+        report = collect_query_plans()
+
+        self.assertEqual(report["vendor"], connection.vendor)
+        self.assertEqual(set(report["queries"]), {
+            "all_consulting_by_call_id", "consulting_by_call_id", "latest_consulting", "recent_consulting_page",
+            "updated_since", "category_report_by_period", "category_report_all", "consulting_details",
+        })
+        self.assertEqual(find_plan_problems(report), [])
+
+    def test_unindexed_query_is_reported_unless_in_baseline(self):
+        catalog = query_plans.get_query_catalog() + [
+            query_plans.QuerySpec(
+                name="top_final_score",
+                source="테스트",
+                build=lambda: Consulting.objects.order_by("-final_score")[:10],
+            ),
+        ]
+        with mock.patch.object(query_plans, "get_query_catalog", return_value=catalog):
+            report = collect_query_plans()
+
+        entry = report["queries"]["top_final_score"]
+        self.assertTrue(entry["full_scan"] and entry["filesort"])
+        self.assertEqual(find_plan_problems(report), [
+            "top_final_score: 풀 스캔 발생 (테스트)",
+            "top_final_score: 파일 정렬 발생 (테스트)",
+        ])
+        # 기준 리포트에도 있던 문제는 악화가 아니므로 보고하지 않음
+        self.assertEqual(find_plan_problems(report, report), [])
+
+
+class LLMSchedulerReserveTests(SimpleTestCase):
+    """차례인 클래스가 reserve 때문에만 막혀 있으면 reserve가 작은 다음 클래스가 토큰을 받습니다."""
+
+    def _scheduler(self, tokens: float) -> LLMScheduler:
+        # 거의 채워지지 않는 버킷 (테스트 중 토큰 수 고정)
+        bucket = TokenBucket(rate_per_sec=1e-6, capacity=3)
+        bucket._tokens = tokens
+        scheduler = LLMScheduler(limiter=bucket)
+        # backfill이 먼저 차례가 되도록 interactive 순번을 뒤로 미룸
+        scheduler._pass[INTERACTIVE] = 1.0
+        return scheduler
+
+    def _start_waiting(self, scheduler: LLMScheduler, priority: str, timeout: float) -> dict:
+        outcome = {}
+        thread = threading.Thread(target=lambda: outcome.update(granted=scheduler.acquire(priority, timeout)))
+        thread.start()
+        self.addCleanup(thread.join)
+        while not scheduler.depths()[priority]:
+            time.sleep(0.001)
+        return outcome
+
+    def test_next_class_takes_reserved_token(self):
+        scheduler = self._scheduler(tokens=1.5)   # backfill(reserve 2)는 못 얻고 interactive(reserve 0)는 얻을 수 있음
+        backfill = self._start_waiting(scheduler, BACKFILL, timeout=1)
+
+        started = time.monotonic()
+        self.assertTrue(scheduler.acquire(INTERACTIVE, timeout=1))
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(scheduler.depths()[BACKFILL], 1)
+        self.assertEqual(backfill, {})
+
+    def test_class_with_larger_reserve_still_waits_its_turn(self):
+        scheduler = self._scheduler(tokens=1.5)
+        scheduler._pass[REANALYSIS] = 1.0
+        self._start_waiting(scheduler, BACKFILL, timeout=0.2)
+
+        # reanalysis(reserve 1)도 1.5개로는 얻을 수 없으므로 토큰은 그대로
+        self.assertFalse(scheduler.acquire(REANALYSIS, timeout=0.1))
+        self.assertGreater(scheduler.limiter._tokens, 1.4)
+
+
+@override_settings(ANALYSIS_PROJECTION="off")
+class RollupConsistencyTests(TestCase):
+    """분석 저장의 증분 집계와 rebuild_rollups 재계산 결과가 같아야 합니다."""
+
+    RESULT = {"상담자 강점": "경청", "상담자 단점": "지연", "개선점": "요약"}
+
+    def setUp(self):
+        generator = SyntheticConsultingGenerator(seed=3, prefix="ROLL_", width=3, days=3)
+        bulk_create_consulting([generator.make_row(index)[0] for index in range(1, 9)])
+        self.rows = list(Consulting.objects.order_by("call_id"))
+
+    def _snapshot(self):
+        fields = ["day", "mid_category", "content_category", "call_count", *ROLLUP_METRICS]
+        return [
+            tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+            for row in DailyScoreRollup.objects.order_by("day", "mid_category", "content_category").values_list(*fields)
+        ]
+
+    def _scores(self, index: int):
+        return {"manual_compliance": 0.5 + index / 100, "final_score": 60 + index}
+
+    def test_incremental_rollups_match_rebuild(self):
+        for index, row in enumerate(self.rows[:4]):
+            save_analysis(row, self.RESULT, self._scores(index))
+        errors = save_analysis_batch([(row, self.RESULT, self._scores(index)) for index, row in enumerate(self.rows[4:])])
+        self.assertEqual(errors, [None] * 4)
+        incremental = self._snapshot()
+        self.assertEqual(sum(row[3] for row in incremental), 8)
+
+        rebuild_rollups()
+        self.assertEqual(self._snapshot(), incremental)
+
+        # 재계산 후 재분석은 새 집계 행에 차이만 반영
+        save_analysis(self.rows[0], self.RESULT, self._scores(50))
+        reanalyzed = self._snapshot()
+        rebuild_rollups()
+        self.assertEqual(self._snapshot(), reanalyzed)
+
+    def test_reanalysis_without_rollup_counts_as_first(self):
+        save_analysis(self.rows[0], self.RESULT, self._scores(0))
+        # 집계 도입 전에 분석되었거나 집계 행이 지워진 상담
+        DailyScoreRollup.objects.all().delete()
+
+        save_analysis(self.rows[0], self.RESULT, self._scores(1))
+        reanalyzed = self._snapshot()
+        self.assertEqual([row[3] for row in reanalyzed], [1])
+
+        rebuild_rollups()
+        self.assertEqual(self._snapshot(), reanalyzed)
+
+
+def read_archive(root: str, table: str) -> list:
+    """아카이브 루트 아래 table의 모든 gzip JSONL 행"""
+    rows = []
+    for directory, _, files in os.walk(os.path.join(root, table)):
+        for name in sorted(files):
+            with gzip.open(os.path.join(directory, name), "rt", encoding="utf-8") as f:
+                rows.extend(json.loads(line) for line in f)
+    return rows
+
+
+class RetentionTests(TestCase):
+    """보존 기간이 지난 행을 배치 단위로 파일에 옮기고, 파일 기록이 실패하면 지우지 않습니다."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.policy = RetentionPolicy(consulting_days=30, analysis_days=30, archive_root=directory.name, batch_size=2)
+
+        generator = SyntheticConsultingGenerator(seed=13, prefix="KEEP_", width=3)
+        rows, details = [], []
+        for index in range(1, 7):
+            row, row_details = generator.make_row(index, details_per_call=2)
+            rows.append(row)
+            details.extend(row_details)
+        Consulting.objects.bulk_create(rows)
+        ConsultingDetail.objects.bulk_create(details)
+        # 1~5번은 보존 기간이 지난 통화 (update는 auto_now_add를 거치지 않음)
+        old = [row.call_id for row in rows[:5]]
+        Consulting.objects.filter(call_id__in=old).update(call_date=timezone.now() - datetime.timedelta(days=40))
+        self.old = old
+
+        # 보조 저장소 analysis_results (SQLite, created_at은 CURRENT_TIMESTAMP 형식의 UTC 문자열)
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE analysis_results (id INTEGER PRIMARY KEY AUTOINCREMENT, call_id TEXT, "
+                "evaluation_score INT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+            ))
+            for index in range(1, 6):
+                conn.execute(text(
+                    "INSERT INTO analysis_results (call_id, evaluation_score, created_at) "
+                    "VALUES (:call_id, 80, datetime('now', :age))"
+                ), {"call_id": f"KEEP_{index:03d}", "age": "-40 days" if index <= 3 else "-29 days"})
+        self.engine = engine
+        patcher = mock.patch.object(retention, "get_engine", return_value=engine)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _analysis_ids(self):
+        with self.engine.connect() as conn:
+            return [row[0] for row in conn.execute(text("SELECT call_id FROM analysis_results ORDER BY id"))]
+
+    def test_consulting_archives_all_batches(self):
+        self.assertEqual(archive_consulting(self.policy), 5)
+
+        self.assertEqual(list(Consulting.objects.values_list("call_id", flat=True)), ["KEEP_006"])
+        self.assertEqual(ConsultingDetail.objects.count(), 2)
+        archived = read_archive(self.policy.archive_root, Consulting._meta.db_table)
+        self.assertEqual(sorted(row["call_id"] for row in archived), self.old)
+        self.assertTrue(all(len(row["details"]) == 2 for row in archived))
+
+    def test_dry_run_only_counts(self):
+        self.assertEqual(archive_consulting(self.policy, dry_run=True), 5)
+        self.assertEqual(archive_analysis_results(self.policy, dry_run=True), 3)
+
+        self.assertEqual(Consulting.objects.count(), 6)
+        self.assertEqual(len(self._analysis_ids()), 5)
+        self.assertEqual(os.listdir(self.policy.archive_root), [])
+
+    def test_archive_write_failure_keeps_rows(self):
+        with mock.patch.object(retention, "_append_partitioned", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                archive_consulting(self.policy)
+            with self.assertRaises(OSError):
+                archive_analysis_results(self.policy)
+
+        self.assertEqual(Consulting.objects.count(), 6)
+        self.assertEqual(ConsultingDetail.objects.count(), 12)
+        self.assertEqual(len(self._analysis_ids()), 5)
+
+    def test_analysis_results_use_db_time_across_batches(self):
+        self.assertEqual(archive_analysis_results(self.policy), 3)
+
+        self.assertEqual(self._analysis_ids(), ["KEEP_004", "KEEP_005"])
+        archived = read_archive(self.policy.archive_root, "analysis_results")
+        self.assertEqual(sorted(row["call_id"] for row in archived), ["KEEP_001", "KEEP_002", "KEEP_003"])
+
+
+@override_settings(ANALYSIS_OUTBOX_RETRY_BASE=5, ANALYSIS_OUTBOX_LEASE_SECONDS=300)
+class OutboxDrainTests(TestCase):
+    """outbox 반영은 행을 임대해 커밋한 뒤 트랜잭션 밖에서 upsert하고, 실패하면 백오프 후 다시 시도합니다."""
+
+    def setUp(self):
+        AnalysisOutbox.objects.bulk_create([
+            AnalysisOutbox(call_id=call_id, payload={"call_id": call_id, "evaluation_score": score})
+            for call_id, score in (("OUT_1", 70), ("OUT_2", 80), ("OUT_1", 90))
+        ])
+        for name in ("get_engine", "upsert_rows"):
+            patcher = mock.patch.object(result_store, name)
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def test_projects_latest_result_per_call_and_deletes(self):
+        self.assertEqual(drain_outbox(), 3)
+
+        rows = self.upsert_rows.call_args.args[1]
+        self.assertEqual(sorted((row["call_id"], row["evaluation_score"]) for row in rows),
+                         [("OUT_1", 90), ("OUT_2", 80)])
+        self.assertFalse(AnalysisOutbox.objects.exists())
+
+    def test_claimed_rows_are_leased(self):
+        self.assertEqual(len(claim_outbox(10)), 3)
+        self.assertEqual(claim_outbox(10), [])
+        self.assertEqual(drain_outbox(), 0)
+        self.upsert_rows.assert_not_called()
+
+    def test_failure_backs_off_before_retry(self):
+        self.upsert_rows.side_effect = RuntimeError("analysis DB down")
+        self.assertEqual(drain_outbox(), 0)
+
+        entries = list(AnalysisOutbox.objects.all())
+        self.assertEqual({entry.attempts for entry in entries}, {1})
+        self.assertEqual({entry.last_error for entry in entries}, {"analysis DB down"})
+        self.assertTrue(all(entry.available_at > timezone.now() for entry in entries))
+        self.assertEqual(drain_outbox(), 0)
+        self.assertEqual(self.upsert_rows.call_count, 1)
+
+        # 재시도 시각이 지나면 다시 반영
+        self.upsert_rows.side_effect = None
+        AnalysisOutbox.objects.update(available_at=timezone.now())
+        self.assertEqual(drain_outbox(), 3)
+        self.assertEqual(result_store.retry_delay(3), 20)
+
+
+class TranscriptCompressionTests(SimpleTestCase):
+    """대화 압축은 맞장구·상투 문구를 덜어내고, 예산이 작아도 빈 대화를 반환하지 않습니다."""
+
+    TEXT = "\n".join([
+        "CSR: 안녕하세요, 고객님. 상담사 김민지입니다. 무엇을 도와드릴까요?",
+        "고객: 대출 금리 때문에 전화했어요.",
+        "CSR: 네.",
+        "고객: 지난번에도 같은 문제로 연락했는데 해결이 안 됐어요.",
+        "CSR: 잠시만 기다려 주시겠어요?",
+        "CSR: 잠시만 기다려 주시겠어요?",
+        "CSR: 불편을 드려 죄송합니다. 금리 조건을 다시 확인해 드리겠습니다.",
+        "고객: 알겠습니다. 감사합니다.",
+    ])
+
+    def test_keeps_salient_turns_within_budget(self):
+        self.assertIn("잠시만 기다려 주시겠어요? (×2)", compress_transcript(self.TEXT).text)
+
+        compressed = compress_transcript(self.TEXT, top_nouns=["금리", "대출"], token_budget=60)
+
+        self.assertEqual(compressed.steps, ["backchannel", "repeat", "salience"])
+        self.assertNotIn("CSR: 네.", compressed.text)
+        self.assertIn("해결이 안", compressed.text)
+        self.assertIn("(… 발화 1개 생략 …)", compressed.text)
+        self.assertLessEqual(compressed.compressed_tokens, 60)
+
+    def test_oversized_turns_keep_truncated_top_turn(self):
+        text = "\n".join([f"고객: {'환불 요청 ' * 60}{n}" for n in range(3)])
+
+        compressed = compress_transcript(text, token_budget=10)
+
+        self.assertEqual(compressed.kept_turns, 1)
+        self.assertTrue(compressed.text.startswith("고객: 환불"))
+        self.assertLessEqual(compressed.compressed_tokens, 10)
+
+
+class RecordWriterFlushTests(SimpleTestCase):
+    """.gz 기록은 닫지 않아도 flush_every건마다 읽을 수 있어야 합니다. (atexit 없이 종료된 워커)"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "llm.jsonl.gz")
+
+    def test_gzip_records_are_readable_before_close(self):
+        writer = RecordWriter(self.path, flush_every=2)
+        self.addCleanup(writer.close)
+        for index in range(3):
+            writer.write({"key": f"k{index}", "content": "{}", "seconds": 0.1})
+
+        # 끝이 잘린 gzip 스트림: 마지막 flush(2건)까지 읽음
+        self.assertEqual(sorted(OfflineProvider.load(self.path)), ["k0", "k1"])
+
+        writer.close()
+        self.assertEqual(sorted(OfflineProvider.load(self.path)), ["k0", "k1", "k2"])
+
+
+class RecordReplayTests(SimpleTestCase):
+    """RecordingProvider로 기록한 호출은 OfflineProvider가 같은 프롬프트에 그대로 재생합니다."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "llm.jsonl")
+        self.fake = FakeLLM(latency_ms=0, distribution="fixed", seed=3)
+
+    def test_offline_provider_replays_recorded_responses(self):
+        writer = RecordWriter(self.path)
+        recording = RecordingProvider(self.fake, writer)
+        recorded = recording.invoke("상담 데이터 1").content
+
+        failing = mock.Mock(model="broken")
+        failing.invoke.side_effect = TimeoutError("deadline")
+        with self.assertRaises(TimeoutError):
+            RecordingProvider(failing, writer).invoke("상담 데이터 2")
+        writer.close()
+
+        offline = OfflineProvider(self.path, strict=True)
+        self.assertEqual(offline.invoke("상담 데이터 1").content, recorded)
+        with self.assertRaises(ReplayedLLMError):
+            offline.invoke("상담 데이터 2")
+        with self.assertRaises(KeyError):
+            offline.invoke("기록되지 않은 프롬프트")
+        self.assertEqual(offline.recorded, 2)
+
+
+class SimilarityAppendTests(TestCase):
+    """새 Consulting은 post_save(커밋 후)로 인덱스 delta에 추가되어 다시 빌드하지 않아도 검색됩니다."""
+
+    @staticmethod
+    def _features(seed: float) -> dict:
+        return {
+            "Chroma_stft": [seed + i for i in range(12)],
+            "SpectralContrast": [seed * 2 + i for i in range(7)],
+            "Tonnetz": [seed - i for i in range(6)],
+            "MFCC_0_13": [seed * i for i in range(14)],
+        }
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = override_settings(SIMILARITY_INDEX_DIR=directory.name)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+        Consulting.objects.create(call_id="SIM_001", **self._features(1.0))
+        Consulting.objects.create(call_id="SIM_002", **self._features(5.0))
+        build_index()
+
+    def test_created_consulting_is_searchable(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Consulting.objects.create(call_id="SIM_NEW", **self._features(5.0))
+
+        self.assertEqual(similar_calls("consulting:SIM_002", k=1)[0]["key"], "consulting:SIM_NEW")
+
+    def test_updated_consulting_is_not_appended_again(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            row = Consulting.objects.get(call_id="SIM_001")
+            row.score = 80
+            row.save(update_fields=["score"])
+
+        self.assertEqual(callbacks, [])
+
+    def test_view_rejects_non_positive_k_and_nprobe(self):
+        for query in ({"k": "0"}, {"nprobe": "0"}, {"k": "-3", "nprobe": "2"}):
+            request = RequestFactory().get("/consultlytics/similar/consulting:SIM_001/", query)
+            self.assertEqual(views.similar_calls(request, "consulting:SIM_001").status_code, 400, query)
+
+        request = RequestFactory().get("/consultlytics/similar/consulting:SIM_001/", {"k": "1", "nprobe": "1"})
+        self.assertEqual(views.similar_calls(request, "consulting:SIM_001").status_code, 200)
+
+
+class SimilarityIndexSearchTests(SimpleTestCase):
+    """ivf 검색 인자 검증과 nprobe 상한"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        vectors = np.random.default_rng(0).normal(size=(40, DIM)).astype(np.float32)
+        self.keys = [f"consulting:IVF_{n:02d}" for n in range(40)]
+        root = os.path.join(directory.name, "index")
+        build_vector_index(root, self.keys, vectors, ivf_min_rows=10, nlist=4, nprobe=2)
+        self.index = SimilarityIndex(root)
+        self.query = vectors[0]
+
+    def test_nprobe_above_list_count_scans_every_list(self):
+        self.assertEqual(self.index.kind, IVF)
+        results = self.index.search(self.query, k=39, exclude=self.keys[0], nprobe=1000)
+
+        self.assertEqual(len(results), 39)
+        self.assertNotIn(self.keys[0], [key for key, _ in results])
+
+    def test_rejects_non_positive_k_and_nprobe(self):
+        with self.assertRaises(ValueError):
+            self.index.search(self.query, k=0)
+        with self.assertRaises(ValueError):
+            self.index.search(self.query, k=5, nprobe=0)
+
+
+class RunManifestTests(SimpleTestCase):
+    """재실행 시 완료 행은 건너뛰고, 최대 시도 횟수를 넘은 실패 행은 다시 시도하지 않습니다."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "run.db")
+
+    def _open(self):
+        manifest = RunManifest(self.path)
+        self.addCleanup(manifest.close)
+        return manifest
+
+    def test_resume_skips_done_rows(self):
+        manifest = self._open()
+        manifest.register(["A", "B", "C"])
+        manifest.claim("A")
+        manifest.mark_done("A", {"call_id": "A", "status": "completed"})
+        manifest.claim("B")  # 처리 중 중단
+        manifest.close()
+
+        resumed = self._open()
+        self.assertEqual(resumed.register(["A", "B", "C", "D"]), 1)
+        self.assertEqual(resumed.pending_ids(max_attempts=3), ["B", "C", "D"])
+        self.assertEqual(resumed.summary()[DONE], 1)
+        self.assertEqual(resumed.summary()[FAILED], 1)
+        self.assertEqual([r["call_id"] for r in resumed.results()], ["A"])
+
+    def test_failures_past_max_attempts_are_not_retried(self):
+        manifest = self._open()
+        manifest.register(["A", "B"])
+        for _ in range(2):
+            manifest.claim("A")
+            manifest.mark_failed("A", "timeout")
+        manifest.claim("B")
+        manifest.mark_failed("B", "timeout")
+
+        self.assertEqual(manifest.pending_ids(max_attempts=2), ["B"])
+        self.assertEqual(manifest.pending_ids(max_attempts=3), ["A", "B"])
+
+    def test_fresh_reset_clears_state(self):
+        manifest = self._open()
+        manifest.register(["A"])
+        manifest.claim("A")
+        manifest.mark_done("A", {"call_id": "A"})
+        manifest.close()
+
+        RunManifest.reset(self.path)
+        fresh = self._open()
+        self.assertEqual(fresh.register(["A"]), 1)
+        self.assertEqual(fresh.pending_ids(), ["A"])
+        self.assertEqual(list(fresh.results()), [])
+
+
+def import_script(name):
+    """모듈 로드 시 feple_analysis 엔진을 만드는 루트 스크립트를 엔진 없이 가져옵니다."""
+    with mock.patch("apps.consultlytics.db.get_engine"):
+        return importlib.import_module(name)
+
+
+class BulkLoadTests(SimpleTestCase):
+    """multi는 배치마다 커밋하고, staging은 임시 테이블에 적재한 뒤 한 번만 병합합니다."""
+
+    def setUp(self):
+        self.engine = mock.MagicMock()
+        self.conn = self.engine.connect.return_value.__enter__.return_value
+        for name in ("upsert_rows", "merge_staging"):
+            patcher = mock.patch.object(bulk_ingest, name)
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+        self.upsert_rows.side_effect = lambda conn, rows, **kwargs: len(rows)
+        self.rows = [{"call_id": f"B{n}", "evaluation_score": n} for n in range(5)]
+
+    def test_multi_upserts_each_batch_in_its_own_transaction(self):
+        stats = bulk_ingest.bulk_load(self.engine, iter(self.rows), batch_size=2, mode="multi")
+
+        self.assertEqual((stats.rows, stats.batches), (5, 3))
+        self.assertEqual(self.engine.begin.call_count, 3)
+        self.assertEqual([len(call.args[1]) for call in self.upsert_rows.call_args_list], [2, 2, 1])
+        self.merge_staging.assert_not_called()
+
+    def test_staging_loads_batches_then_merges_once(self):
+        stats = bulk_ingest.bulk_load(self.engine, iter(self.rows), batch_size=2, mode="staging")
+
+        self.assertEqual((stats.rows, stats.batches), (5, 3))
+        self.assertEqual({call.kwargs["table"] for call in self.upsert_rows.call_args_list},
+                         {bulk_ingest.STAGING_TABLE})
+        self.merge_staging.assert_called_once_with(self.conn)
+        self.engine.begin.assert_not_called()
+
+    def test_rejects_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            bulk_ingest.bulk_load(self.engine, self.rows, mode="copy")
+
+    def test_multi_upsert_binds_one_parameter_per_cell(self):
+        sql = bulk_ingest.build_multi_upsert("analysis_results", ("call_id", "evaluation_score"), 2)
+        self.assertEqual(sorted(sql.compile().params), ["call_id_0", "call_id_1",
+                                                        "evaluation_score_0", "evaluation_score_1"])
+
+
+class ResultStreamTests(SimpleTestCase):
+    """JSONL 결과 파일 회전·압축과 적재용 변환"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.stem = os.path.join(directory.name, "analysis_results.jsonl")
+
+    def test_rotated_gzip_parts_read_back_in_order(self):
+        results = [{"call_id": f"R{n:03d}", "analysis": {"평가점수": n}} for n in range(30)]
+        with JsonlResultWriter(self.stem, compression="gzip", max_bytes=200) as writer:
+            for result in results:
+                writer.write(result)
+
+        self.assertGreater(len(writer.paths), 1)
+        self.assertTrue(all(path.endswith(".jsonl.gz") for path in writer.paths))
+        pattern = self.stem[:-len(".jsonl")] + ".*.jsonl.gz"
+        self.assertEqual(list(iter_results([pattern])), results)
+
+    def test_second_run_appends_new_parts(self):
+        for run in range(2):
+            with JsonlResultWriter(self.stem, compression="gzip", max_bytes=1000) as writer:
+                writer.write({"call_id": f"RUN{run}"})
+        self.assertTrue(writer.paths[0].endswith(".0002.jsonl.gz"))
+
+    def test_to_params_skips_rows_without_analysis(self):
+        script = import_script("save_analysis_results")
+        self.assertIsNone(script.to_params({"call_id": "E1", "analysis": {}}))
+        self.assertIsNone(script.to_params({"analysis": {"평가점수": 80}}))
+        self.assertEqual(script.to_params({"call_id": "E2", "analysis": {"평가점수": 80}})["evaluation_score"], 80)
+
+
+class ResultQueryTests(SimpleTestCase):
+    """keyset 페이지는 페이지 경계에서 행을 빠뜨리거나 중복하지 않습니다."""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+        self.addCleanup(self.engine.dispose)
+        with self.engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE analysis_results (
+                    id INTEGER PRIMARY KEY, call_id TEXT UNIQUE, evaluation_score INTEGER,
+                    strengths TEXT, weaknesses TEXT, improvements TEXT, coaching_message TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """))
+            conn.execute(
+                text("INSERT INTO analysis_results (call_id, evaluation_score) VALUES (:call_id, :score)"),
+                [{"call_id": f"Q{n:03d}", "score": n} for n in range(23)],
+            )
+
+    def _call_ids(self, **kwargs):
+        with self.engine.connect() as conn:
+            return [row["call_id"] for batch in iter_result_batches(conn, **kwargs) for row in batch]
+
+    def test_pages_cover_every_row_once(self):
+        self.assertEqual(self._call_ids(page_size=5, fetch_size=2), [f"Q{n:03d}" for n in range(23)])
+
+    def test_after_limit_and_filters(self):
+        self.assertEqual(self._call_ids(page_size=4, after="Q010", limit=6),
+                         [f"Q{n:03d}" for n in range(11, 17)])
+        self.assertEqual(self._call_ids(filters=ResultFilter(min_score=20), page_size=2),
+                         ["Q020", "Q021", "Q022"])
+
+    def test_sink_is_not_opened_when_connect_fails(self):
+        script = import_script("query_analysis_results")
+        with mock.patch.object(script, "engine") as engine, mock.patch.object(script, "open_sink") as open_sink:
+            engine.connect.side_effect = RuntimeError("analysis DB down")
+            script.query_analysis_results(output_format="csv", output="out.csv")
+        open_sink.assert_not_called()
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    """Prometheus 텍스트 노출 형식과 주기적 덤프"""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.requests = self.registry.counter("test_requests_total", "요청 수", ["status"])
+        self.latency = self.registry.histogram("test_latency_seconds", "지연", buckets=(0.1, 1.0))
+
+    def test_render_exposition_format(self):
+        self.requests.inc(status="ok")
+        self.requests.inc(2, status='say "hi"')
+        for value in (0.05, 0.5, 5.0):
+            self.latency.observe(value)
+
+        lines = self.registry.render().splitlines()
+        self.assertEqual(lines[:2], ["# HELP test_requests_total 요청 수", "# TYPE test_requests_total counter"])
+        self.assertIn('test_requests_total{status="ok"} 1', lines)
+        self.assertIn('test_requests_total{status="say \\"hi\\""} 2', lines)
+        self.assertIn("# TYPE test_latency_seconds histogram", lines)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('test_latency_seconds_bucket{le="1.0"} 2', lines)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 3', lines)
+        self.assertIn("test_latency_seconds_sum 5.55", lines)
+        self.assertIn("test_latency_seconds_count 3", lines)
+
+    def test_registering_same_name_returns_existing_metric(self):
+        self.assertIs(self.registry.counter("test_requests_total", "요청 수", ["status"]), self.requests)
+        with self.assertRaises(ValueError):
+            self.requests.inc(route="/")
+
+    def test_periodic_dump_writes_on_stop(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "metrics", "run.prom")
+
+        dumper = start_periodic_dump(path, interval=3600)
+        self.assertFalse(os.path.exists(path))
+        dumper.stop()
+        dumper._thread.join(timeout=1)
+
+        self.assertFalse(dumper._thread.is_alive())
+        with open(path, encoding="utf-8") as f:
+            self.assertIn("# TYPE consultlytics_analysis_total counter", f.read())
+        dumper.stop()  # 두 번 호출해도 안전 (atexit)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class LogUtilsTests(SimpleTestCase):
+    """JSON 로그 필드, 진행률 로그 샘플링, 큐 핸들러 종료"""
+
+    def test_json_formatter_includes_extra_fields(self):
+        logger = logging.getLogger("consultlytics.test")
+        record = logger.makeRecord(logger.name, logging.INFO, __file__, 1, "분석 완료 %s", ("A1",), None,
+                                   extra={"call_id": "A1", "stage_timings": {"llm": 12.5}})
+
+        payload = json.loads(JsonFormatter().format(record))
+        self.assertEqual(payload["message"], "분석 완료 A1")
+        self.assertEqual(payload["level"], "INFO")
+        self.assertEqual(payload["logger"], "consultlytics.test")
+        self.assertEqual(payload["call_id"], "A1")
+        self.assertEqual(payload["stage_timings"], {"llm": 12.5})
+        self.assertTrue(payload["ts"].endswith("+00:00"))
+        self.assertNotIn("args", payload)
+
+    def test_progress_logger_samples_every_n_and_last_row(self):
+        logger = mock.Mock()
+        progress = ProgressLogger(logger, total=7, every=3, interval=3600)
+        for n in range(7):
+            progress.tick(ok=n != 4, call_id=f"P{n}")
+
+        extras = [call.kwargs["extra"] for call in logger.info.call_args_list]
+        self.assertEqual([extra["progress_done"] for extra in extras], [3, 6, 7])
+        self.assertEqual(extras[-1]["progress_failed"], 1)
+        self.assertEqual(extras[-1]["last_call_id"], "P6")
+
+    def test_progress_logger_logs_when_interval_elapsed(self):
+        logger = mock.Mock()
+        progress = ProgressLogger(logger, total=100, every=1000, interval=0)
+        progress.tick()
+        progress.tick()
+        self.assertEqual(logger.info.call_count, 2)
+
+    def test_queue_handler_flushes_on_stop(self):
+        target = ListHandler()
+        handler = QueueListenerHandler([target])
+        logger = logging.getLogger("consultlytics.test.queue")
+        logger.addHandler(handler)
+        logger.propagate = False
+        self.addCleanup(setattr, logger, "propagate", True)
+        self.addCleanup(logger.removeHandler, handler)
+
+        for n in range(50):
+            logger.warning("행 %d", n)
+        handler.stop()
+
+        self.assertEqual([record.getMessage() for record in target.records], [f"행 {n}" for n in range(50)])
+        self.assertIsNone(handler.listener._thread)
+        handler.stop()  # 두 번 호출해도 안전 (atexit)
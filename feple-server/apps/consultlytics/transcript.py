@@ -0,0 +1,257 @@
+"""
+apps/consultlytics/transcript.py
+
+프롬프트에 넣기 전에 상담 대화(consulting_content)를 줄이는 전처리입니다. (Django 비의존)
+긴 통화일수록 대화 원문이 프롬프트 크기와 Gemini 지연을 좌우하므로 다음 순서로 압축합니다.
+
+1. 맞장구·추임새 발화("네", "아 네, 그렇군요" 등) 제거
+2. 같은 화자가 같은 말을 이어서 반복하면 한 번으로 합침
+3. 인사·대기 안내 같은 스크립트 상투 문구는 처음 한 번만 유지
+4. 그래도 토큰 예산을 넘으면 발화별 중요도(top_nouns 키워드, 갈등·사과 표현, 고객 발화, 통화 시작/끝)
+   순으로 남기고, 생략한 구간은 "(… 발화 N개 생략 …)"으로 표시 (원래 순서 유지)
+   발화 하나도 예산에 들어가지 않으면 가장 중요한 발화를 예산에 맞게 잘라 남깁니다. (빈 대화를 반환하지 않음)
+
+<사용 예시>
+  compressed = compress_transcript(row["consulting_content"], top_nouns=row["top_nouns"], token_budget=1500)
+  compressed.text, compressed.ratio   # 압축된 대화, 압축 후/전 토큰 비율
+"""
+
+import re
+import json
+from dataclasses import dataclass, field
+from typing import Any, Iterable, List, Optional
+
+from .metrics import estimate_tokens
+
+# 내용 없이 맞장구만 치는 발화 (공백·문장부호 제거 후 비교)
+BACKCHANNELS = {
+    "네", "네네", "네네네", "예", "예예", "아", "아네", "아예", "음", "어", "응", "그렇군요", "아네그렇군요",
+    "네그렇군요", "네맞습니다", "맞습니다", "네알겠습니다", "그래요", "아그래요", "네네알겠습니다",
+}
+
+# 스크립트 상투 문구: 통화마다 반복되므로 처음 한 번만 유지
+BOILERPLATE_PATTERNS = [
+    re.compile(p) for p in (
+        r"^안녕하(세요|십니까)", r"상담사 ?\S*입니다", r"무엇을 도와드릴까요",
+        r"잠시만 기다려 주", r"기다려 주셔서 감사합니다", r"더 궁금하신 (점|사항)",
+        r"좋은 하루 되(세요|십시오)", r"^감사합니다\.?$",
+    )
+]
+
+CONFLICT_MARKERS = ("화가", "짜증", "불만", "항의", "책임자", "어이가", "말이 됩니까", "해결이 안", "몇 번", "환불", "해지")
+APOLOGY_MARKERS = ("죄송", "불편을 드려", "사과", "양해")
+CUSTOMER_SPEAKERS = ("고객", "customer", "client")
+
+_SPEAKER_LINE = re.compile(r"^\s*([^:：]{1,20})\s*[:：]\s*(.*)$")
+_NORMALIZE = re.compile(r"[\s.,!?~…·\-]+")
+
+
+@dataclass
+class Turn:
+    """대화 한 줄 (speaker가 없는 줄은 빈 문자열)"""
+    speaker: str
+    content: str
+    index: int = 0
+    repeat: int = 1
+
+    def render(self) -> str:
+        text = f"{self.speaker}: {self.content}" if self.speaker else self.content
+        return f"{text} (×{self.repeat})" if self.repeat > 1 else text
+
+
+@dataclass
+class CompressedTranscript:
+    """압축 결과와 통계"""
+    text: str
+    original_tokens: int
+    compressed_tokens: int
+    original_turns: int
+    kept_turns: int
+    steps: List[str] = field(default_factory=list)
+
+    @property
+    def ratio(self) -> float:
+        """압축 후 / 압축 전 토큰 비율 (1.0이면 압축 없음)"""
+        return round(self.compressed_tokens / self.original_tokens, 3) if self.original_tokens else 1.0
+
+    def stats(self) -> dict:
+        return {
+            "original_tokens": self.original_tokens,
+            "compressed_tokens": self.compressed_tokens,
+            "original_turns": self.original_turns,
+            "kept_turns": self.kept_turns,
+            "ratio": self.ratio,
+        }
+
+
+def parse_turns(text: str) -> List[Turn]:
+    """"화자: 내용" 형식 줄 단위 대화를 발화 목록으로 변환합니다."""
+    turns = []
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = _SPEAKER_LINE.match(line)
+        speaker, content = (match.group(1).strip(), match.group(2).strip()) if match else ("", line)
+        turns.append(Turn(speaker, content, index=len(turns)))
+    return turns
+
+
+def normalize_keywords(top_nouns: Any) -> List[str]:
+    """top_nouns(JSON 문자열, 문자열 목록, [명사, 빈도] 목록, 딕셔너리 목록)를 키워드 목록으로 변환합니다."""
+    if isinstance(top_nouns, str):
+        try:
+            top_nouns = json.loads(top_nouns)
+        except ValueError:
+            return [w for w in re.split(r"[,\s]+", top_nouns) if w]
+    if isinstance(top_nouns, dict):
+        return [str(k) for k in top_nouns]
+    keywords = []
+    for item in top_nouns or []:
+        if isinstance(item, (list, tuple)) and item:
+            item = item[0]
+        elif isinstance(item, dict):
+            item = item.get("noun") or item.get("word") or next(iter(item.values()), "")
+        if item:
+            keywords.append(str(item))
+    return keywords
+
+
+def _is_backchannel(turn: Turn) -> bool:
+    return _NORMALIZE.sub("", turn.content) in BACKCHANNELS
+
+
+def _boilerplate_key(turn: Turn) -> Optional[int]:
+    for i, pattern in enumerate(BOILERPLATE_PATTERNS):
+        if pattern.search(turn.content):
+            return i
+    return None
+
+
+def _is_customer(turn: Turn) -> bool:
+    speaker = turn.speaker.lower()
+    return any(name in speaker for name in CUSTOMER_SPEAKERS)
+
+
+def salience(turn: Turn, keywords: Iterable[str], total_turns: int, edge_turns: int = 2) -> float:
+    """발화 중요도: 키워드·갈등·사과 표현, 고객 발화, 통화 시작/끝 구간일수록 높음"""
+    content = turn.content
+    score = min(3, sum(1 for word in keywords if word and word in content))
+    if any(marker in content for marker in CONFLICT_MARKERS):
+        score += 3
+    if any(marker in content for marker in APOLOGY_MARKERS):
+        score += 3
+    if _is_customer(turn):
+        score += 1
+    if turn.index < edge_turns or turn.index >= total_turns - edge_turns:
+        score += 2
+    # 정보가 많은 긴 발화를 약간 우대
+    return score + min(1.0, len(content) / 200)
+
+
+def _render(turns: List[Turn]) -> str:
+    lines = []
+    previous = None
+    for turn in turns:
+        if previous is not None and turn.index - previous > 1:
+            lines.append(f"(… 발화 {turn.index - previous - 1}개 생략 …)")
+        lines.append(turn.render())
+        previous = turn.index
+    return "\n".join(lines)
+
+
+def _truncate_turn(turn: Turn, token_budget: int) -> Turn:
+    """발화 내용 앞부분만 남겨 렌더링 결과가 token_budget 이하가 되도록 자릅니다. (최소 한 글자)"""
+    low, high = 1, len(turn.content)
+    while low < high:
+        middle = (low + high + 1) // 2
+        candidate = Turn(turn.speaker, turn.content[:middle] + " …", turn.index, turn.repeat)
+        if estimate_tokens(candidate.render()) <= token_budget:
+            low = middle
+        else:
+            high = middle - 1
+    return Turn(turn.speaker, turn.content[:low] + " …", turn.index, turn.repeat)
+
+
+def compress_transcript(text: Optional[str], top_nouns: Any = None, token_budget: int = 0) -> CompressedTranscript:
+    """
+    상담 대화를 압축합니다.
+
+    Args:
+        text: "화자: 내용" 줄 단위 대화 원문
+        top_nouns: 상위 명사 키워드 (중요도 계산용)
+        token_budget: 대화에 허용할 최대 추정 토큰 수 (0이면 중복·상투 문구 제거만 수행)
+    """
+    original_tokens = estimate_tokens(text)
+    turns = parse_turns(text)
+    original_turns = len(turns)
+    steps = []
+
+    # 1) 맞장구 제거 (대화가 전부 맞장구면 그대로 유지)
+    kept = [t for t in turns if not _is_backchannel(t)] or turns
+    if len(kept) < len(turns):
+        steps.append("backchannel")
+
+    # 2) 같은 화자의 연속 반복 발화 합치기
+    merged: List[Turn] = []
+    for turn in kept:
+        last = merged[-1] if merged else None
+        if last and last.speaker == turn.speaker and _NORMALIZE.sub("", last.content) == _NORMALIZE.sub("", turn.content):
+            last.repeat += 1
+            continue
+        merged.append(Turn(turn.speaker, turn.content, turn.index))
+    if len(merged) < len(kept):
+        steps.append("repeat")
+
+    # 3) 스크립트 상투 문구는 처음 한 번만
+    seen = set()
+    deduped = []
+    for turn in merged:
+        key = _boilerplate_key(turn)
+        if key is not None:
+            if key in seen:
+                continue
+            seen.add(key)
+        deduped.append(turn)
+    if len(deduped) < len(merged):
+        steps.append("boilerplate")
+
+    # 생략 표시는 4)단계에서 빠진 발화에만 붙도록 남은 발화 기준으로 다시 번호를 매김
+    for position, turn in enumerate(deduped):
+        turn.index = position
+
+    # 4) 토큰 예산 초과 시 중요도 순으로 남기기
+    result = deduped
+    if token_budget and estimate_tokens(_render(result)) > token_budget:
+        keywords = normalize_keywords(top_nouns)
+        ranked = sorted(deduped, key=lambda t: (-salience(t, keywords, len(deduped)), t.index))
+        chosen: List[Turn] = []
+        chosen_keys = set()
+        used = 0
+        for turn in ranked:
+            # 떨어져 있어도 같은 화자의 같은 발화는 한 번만 남김
+            key = (turn.speaker, _NORMALIZE.sub("", turn.content))
+            if key in chosen_keys:
+                continue
+            # 생략 표시 한 줄 비용까지 포함해 대략적으로 계산
+            cost = estimate_tokens(turn.render()) + 6
+            if used + cost > token_budget:
+                continue
+            chosen.append(turn)
+            chosen_keys.add(key)
+            used += cost
+        if not chosen and ranked:
+            # 모든 발화가 예산보다 길면 가장 중요한 발화를 잘라서라도 남김
+            chosen.append(_truncate_turn(ranked[0], token_budget))
+        result = sorted(chosen, key=lambda t: t.index)
+        steps.append("salience")
+
+    compressed_text = _render(result) if steps else (text or "")
+    return CompressedTranscript(
+        text=compressed_text,
+        original_tokens=original_tokens,
+        compressed_tokens=estimate_tokens(compressed_text),
+        original_turns=original_turns,
+        kept_turns=len(result),
+        steps=steps,
+    )
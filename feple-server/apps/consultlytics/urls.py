@@ -5,4 +5,7 @@ app_name = 'consultlytics'
 
 urlpatterns = [
     path('analyze/<str:call_id>/', views.analyze_consulting, name='analyze_consulting'),
+    path('rollups/', views.score_rollups, name='score_rollups'),
+    path('similar/<str:key>/', views.similar_calls, name='similar_calls'),
+    path('metrics/', views.metrics, name='metrics'),
 ] 
\ No newline at end of file
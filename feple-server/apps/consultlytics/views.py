@@ -1,10 +1,16 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
-from .services import analyze_consultation
+from .services import analyze_consultation, llm_for_tier
 from .models import Consulting
-import google.generativeai as genai
-import os
+from .rollups import get_daily_rollups, get_category_summary
+from .similarity_store import similar_calls as find_similar_calls
+from .utils import decode_json_field
+from .metrics import REGISTRY
+from .llm_scheduler import INTERACTIVE, acquire_llm_slot
+from .llm_calls import LLMDeadlineExceeded, invoke_llm
+from .model_router import PRO
+import datetime
 import json
 
 # Create your views here.
@@ -40,9 +46,10 @@ def analyze_consulting(request, call_id):
         manual_compliance_ratio = consulting.manual_compliance_ratio
         final_score = consulting.final_score
         
-        # Gemini API 설정
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-        model = genai.GenerativeModel('gemini-pro')
+        # 분석 서비스와 같은 공유 LLM 클라이언트 사용 (LLM_PROVIDER, LLM_MODEL_PRO)
+        model = llm_for_tier(PRO)
+        if model is None:
+            return JsonResponse({"error": "LLM 모델이 초기화되지 않았습니다."}, status=503)
         
         # 분석을 위한 데이터 준비
         analysis_data = {
@@ -83,7 +90,7 @@ def analyze_consulting(request, call_id):
             },
             "상담 내용": {
                 "상담 요약": consulting.Summary,
-                "주요 키워드": json.loads(consulting.top_nouns),
+                "주요 키워드": decode_json_field(consulting.top_nouns, []),
                 "갈등 여부": consulting.Conflict,
                 "논쟁 여부": consulting.conflict_flag,
                 "비속어 사용": consulting.Profane,
@@ -112,8 +119,10 @@ def analyze_consulting(request, call_id):
         특히 개선이 필요한 부분에 대해서는 실질적인 개선 방안을 제시해주세요.
         """
         
-        # Gemini API 호출
-        response = model.generate_content(prompt)
+        # Gemini API 호출 (배치 작업보다 먼저 호출 차례를 받음)
+        if not acquire_llm_slot(INTERACTIVE):
+            return JsonResponse({"error": "분석 요청이 많아 잠시 후 다시 시도해주세요."}, status=503)
+        response = invoke_llm(model, prompt)
         
         # 응답 파싱
         analysis_result = {
@@ -131,7 +140,7 @@ def analyze_consulting(request, call_id):
         }
         
         # Gemini API 응답을 파싱하여 결과 구조화
-        response_text = response.text
+        response_text = response.content
         sections = response_text.split("\n\n")
         
         for section in sections:
@@ -148,5 +157,73 @@ def analyze_consulting(request, call_id):
         
     except Consulting.DoesNotExist:
         return JsonResponse({"error": "상담 데이터를 찾을 수 없습니다."}, status=404)
+    except LLMDeadlineExceeded as e:
+        return JsonResponse({"error": str(e)}, status=504)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+def score_rollups(request):
+    """
+    일자·카테고리별 사전 집계 점수 조회
+      - start, end        : 조회 기간 (YYYY-MM-DD, 기본값 최근 30일)
+      - mid_category      : 메인 카테고리 필터
+      - content_category  : 서브 카테고리 필터 (group=daily에서만 사용)
+      - group             : daily(일자별, 기본값) 또는 category(기간 전체 카테고리별)
+    """
+    try:
+        today = datetime.date.today()
+        end = datetime.date.fromisoformat(request.GET["end"]) if "end" in request.GET else today
+        start = datetime.date.fromisoformat(request.GET["start"]) if "start" in request.GET else end - datetime.timedelta(days=30)
+    except ValueError as e:
+        return JsonResponse({"error": f"날짜 형식이 올바르지 않습니다: {str(e)}"}, status=400)
+
+    mid_category = request.GET.get("mid_category")
+    if request.GET.get("group") == "category":
+        data = get_category_summary(start, end, mid_category=mid_category)
+    else:
+        data = get_daily_rollups(start, end, mid_category=mid_category,
+                                 content_category=request.GET.get("content_category"))
+
+    return JsonResponse({
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "data": data
+    })
+
+
+@require_http_methods(["GET"])
+def similar_calls(request, key):
+    """
+    음성 특성이 비슷한 통화 조회
+      - key    : consulting:<call_id> 또는 file:<id>
+      - k      : 반환할 결과 수 (기본값 10, 1~100)
+      - nprobe : ivf 인덱스에서 살펴볼 목록 수 (1 이상, 목록 수보다 크면 목록 수, 클수록 정확하고 느림)
+    """
+    try:
+        k = int(request.GET.get("k", 10))
+        nprobe = int(request.GET["nprobe"]) if "nprobe" in request.GET else None
+    except ValueError:
+        return JsonResponse({"error": "k, nprobe는 정수여야 합니다."}, status=400)
+    if k < 1 or (nprobe is not None and nprobe < 1):
+        return JsonResponse({"error": "k, nprobe는 1 이상이어야 합니다."}, status=400)
+    k = min(k, 100)
+
+    try:
+        results = find_similar_calls(key, k=k, nprobe=nprobe)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=404)
+    except RuntimeError as e:
+        return JsonResponse({"error": str(e)}, status=503)
+
+    return JsonResponse({
+        "key": key,
+        "data": results
+    })
+
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """분석 파이프라인 메트릭 (Prometheus 텍스트 노출 형식)"""
+    return HttpResponse(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,35 @@
+"""
+apps/consultlytics/workers.py
+
+ProcessPoolExecutor 워커 프로세스 설정입니다. (Django 비의존)
+
+- process_pool_context : fork 대신 forkserver(없으면 spawn)로 워커를 시작
+  fork로 만든 자식은 QueueListenerHandler(log_utils.py)의 큐만 물려받고 리스너 스레드는 없어
+  워커 로그가 버려지며, 리스너가 큐 락을 잡은 순간에 fork되면 자식이 멈출 수 있습니다.
+  부모의 DB 연결도 물려받지 않습니다.
+- init_django_worker   : Django를 쓰는 작업의 initializer
+  forkserver/spawn 워커는 작업 함수를 unpickle할 때 모듈을 새로 import하므로,
+  initializer는 모델을 import하지 않는 이 모듈에 두고 django.setup()을 먼저 실행합니다.
+
+<사용 예시>
+  with ProcessPoolExecutor(max_workers=4, mp_context=process_pool_context(),
+                           initializer=init_django_worker) as executor:
+      executor.submit(export_partition, ...)
+"""
+
+import os
+import multiprocessing
+
+
+def process_pool_context():
+    """ProcessPoolExecutor용 multiprocessing 컨텍스트 (forkserver, 없으면 spawn)"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def init_django_worker():
+    """워커 프로세스 초기화: Django 설정 (로깅·DB 연결은 워커에서 새로 구성)"""
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
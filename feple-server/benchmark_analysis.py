@@ -0,0 +1,360 @@
+"""
+분석 파이프라인 벤치마크
+
+services.llm 을 로컬 가짜 LLM(FakeLLM)으로 교체한 뒤 합성 상담 데이터 N건을 생성하고,
+run_analysis.py / LLM_automated.py 의 처리 경로를 동시성 수준별로 실행하여
+처리량, 지연 백분위(p50/p95/p99), DB 시간, 최대 메모리를 JSON 리포트로 저장합니다.
+
+run_analysis 대상의 실행 방식(--mode)
+  staged  : run_analysis.py 기본 경로인 단계별 파이프라인(pipeline.build_analysis_pipeline) (기본값)
+            동시성 = LLM 동시 호출 수, 지연 = 행별 단계 소요 시간 합계 (단계 사이 큐 대기 제외)
+  threads : 기존 스레드 배치(analyze_consultations_batch), 지연 = 행별 analyze_consultation 호출 시간
+
+<사용 예시>
+  $ python benchmark_analysis.py --rows 200 --concurrency 1,3,8
+  $ python benchmark_analysis.py --latency-ms 1200 --error-rate 0.05 --output bench_new.json --compare bench_old.json
+  $ python benchmark_analysis.py --targets LLM_automated --skip-secondary-store
+  $ python benchmark_analysis.py --mode threads --output bench_threads.json   # 기존 스레드 배치 측정
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+import subprocess
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable
+
+# 벤치마크는 실제 Gemini를 호출하지 않으므로 API 키 검사를 통과할 더미 키를 사용
+os.environ.setdefault('GOOGLE_API_KEY', 'benchmark-dummy-api-key')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from apps.consultlytics import services
+from apps.consultlytics.models import AnalysisOutbox, Consulting, ConsultingDetail, DailyScoreRollup
+from apps.consultlytics.fake_llm import FakeLLM, FakeContextCacheProvider, DEFAULT_SHAPES
+from apps.consultlytics.context_cache import PrefixCachingLLM
+from apps.consultlytics.llm_providers import OfflineProvider
+from apps.consultlytics.analysis_core import ANALYSIS_PREFIX
+from apps.consultlytics.model_router import FAST
+from apps.consultlytics.pipeline import build_analysis_pipeline, record_outcome
+from apps.consultlytics.synthetic import SyntheticConsultingGenerator, bulk_create_consulting
+import run_analysis
+import LLM_automated
+
+# 벤치마크용 데이터 식별 접두사 (실행 후 정리 대상)
+BENCH_PREFIX = "BENCH_"
+TARGETS = ("run_analysis", "LLM_automated")
+MODES = ("staged", "threads")
+
+
+class RunStats:
+    """스레드 안전한 호출별 지연·DB 시간 수집기"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.failures = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        """한 행의 지연(초)과 성공 여부를 기록합니다."""
+        with self._lock:
+            self.latencies.append(latency)
+            if not ok:
+                self.failures += 1
+
+    def db_timed(self, func: Callable) -> Callable:
+        """해당 스레드에서 func가 실행한 DB 쿼리 시간·수를 기록하는 래퍼를 반환합니다."""
+        def wrapper(*args, **kwargs):
+            db = {"time": 0.0, "queries": 0}
+
+            def db_timer(execute, sql, params, many, context):
+                started = time.perf_counter()
+                try:
+                    return execute(sql, params, many, context)
+                finally:
+                    db["time"] += time.perf_counter() - started
+                    db["queries"] += 1
+
+            try:
+                with connection.execute_wrapper(db_timer):
+                    return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.db_time += db["time"]
+                    self.db_queries += db["queries"]
+        return wrapper
+
+    def timed(self, func: Callable) -> Callable:
+        """호출 지연과 해당 스레드의 DB 실행 시간을 기록하는 래퍼를 반환합니다."""
+        func = self.db_timed(func)
+
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                self.record(time.perf_counter() - started, ok=bool(result))
+        return wrapper
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """nearest-rank 방식 백분위 값"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def seed_rows(count: int, seed: int) -> List[Consulting]:
+    """합성 데이터 생성기로 벤치마크용 상담 데이터와 발화를 생성합니다."""
+    cleanup_rows()
+    generator = SyntheticConsultingGenerator(seed=seed, prefix=BENCH_PREFIX, width=6)
+    rows, details = [], []
+    for index in range(1, count + 1):
+        row, row_details = generator.make_row(index)
+        row.mid_category = f"{BENCH_PREFIX}{row.mid_category}"
+        rows.append(row)
+        details.extend(row_details)
+    with transaction.atomic():
+        bulk_create_consulting(rows, batch_size=500)
+        ConsultingDetail.objects.bulk_create(details, batch_size=2000)
+    return list(Consulting.objects.filter(call_id__startswith=BENCH_PREFIX).order_by('call_id'))
+
+
+def cleanup_rows() -> None:
+    """벤치마크용 상담 데이터와 집계 행을 삭제합니다."""
+    ConsultingDetail.objects.filter(consulting__call_id__startswith=BENCH_PREFIX).delete()
+    Consulting.objects.filter(call_id__startswith=BENCH_PREFIX).delete()
+    DailyScoreRollup.objects.filter(mid_category__startswith=BENCH_PREFIX).delete()
+    AnalysisOutbox.objects.filter(call_id__startswith=BENCH_PREFIX).delete()
+
+
+def reset_analysis(rows: List[Consulting]) -> None:
+    """매 실행이 같은 조건(최초 분석)에서 시작하도록 분석 결과를 비웁니다."""
+    Consulting.objects.filter(call_id__startswith=BENCH_PREFIX).update(
+        strength=None, weakness=None, improvement=None, manual_compliance_ratio=None, score=None
+    )
+    DailyScoreRollup.objects.filter(mid_category__startswith=BENCH_PREFIX).delete()
+
+
+def run_staged(rows: List[Consulting], concurrency: int, stats: RunStats, args) -> None:
+    """run_analysis.py 기본 경로와 같은 단계별 파이프라인으로 실행합니다. (동시성 = LLM 동시 호출 수)"""
+    pipeline = build_analysis_pipeline(
+        fetch_workers=args.fetch_workers,
+        cpu_workers=args.cpu_workers or None,
+        llm_workers=concurrency,
+        save_workers=args.save_workers,
+        save_batch_size=args.save_batch_size,
+    )
+    # DB를 쓰는 스레드 단계(fetch·save)의 쿼리 시간을 워커 스레드 연결에서 측정
+    for stage in pipeline.stages:
+        if stage.kind == "thread":
+            stage.fn = stats.db_timed(stage.fn)
+
+    for ctx in pipeline.run(row.call_id for row in rows):
+        outcome = record_outcome(ctx)
+        stats.record(sum(ctx["timings"].values()) / 1000, ok=bool(outcome))
+
+
+def run_target(target: str, mode: str, rows: List[Consulting], concurrency: int, args) -> Dict[str, Any]:
+    """대상 러너를 주어진 동시성으로 실행하고 측정값을 반환합니다."""
+    stats = RunStats()
+
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+
+    if target == "run_analysis" and mode == "staged":
+        run_staged(rows, concurrency, stats, args)
+    elif target == "run_analysis":
+        original = run_analysis.analyze_consultation
+        run_analysis.analyze_consultation = stats.timed(original)
+        try:
+            run_analysis.analyze_consultations_batch(rows, max_workers=concurrency, batch_size=args.batch_size)
+        finally:
+            run_analysis.analyze_consultation = original
+    else:
+        # LLM_automated.main 은 순차 처리이므로 같은 처리 함수를 스레드 풀로 실행 (동시성 1 = 기존 동작)
+        process = stats.timed(LLM_automated.process_single_consultation)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(process, rows))
+
+    wall = time.perf_counter() - started
+    peak_memory = None
+    if args.trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+
+    latencies_ms = [value * 1000 for value in stats.latencies]
+    return {
+        "target": target,
+        "mode": mode if target == "run_analysis" else "threads",  # LLM_automated는 항상 스레드 풀
+        "concurrency": concurrency,
+        "rows": len(rows),
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(rows) / wall, 3) if wall else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies_ms, 50), 2),
+            "p95": round(percentile(latencies_ms, 95), 2),
+            "p99": round(percentile(latencies_ms, 99), 2),
+            "mean": round(sum(latencies_ms) / len(latencies_ms), 2) if latencies_ms else 0.0,
+            "max": round(max(latencies_ms), 2) if latencies_ms else 0.0,
+        },
+        "db_time_ms": round(stats.db_time * 1000, 2),
+        "db_queries": stats.db_queries,
+        "failures": stats.failures,
+        "peak_memory_mb": round(peak_memory, 2) if peak_memory is not None else None,
+    }
+
+
+def git_commit() -> str:
+    """현재 커밋 해시 (git 저장소가 아니면 빈 문자열)"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """이전 리포트 대비 처리량과 p95 지연 변화를 출력합니다."""
+    # mode가 없는 이전 리포트는 스레드 배치(threads)로 측정한 것
+    previous = {(r["target"], r.get("mode", "threads"), r["concurrency"]): r for r in baseline.get("runs", [])}
+    print(f"\n=== 기준 리포트 대비 ({baseline.get('meta', {}).get('git_commit', '')[:10]}) ===")
+    for run in current["runs"]:
+        base = previous.get((run["target"], run["mode"], run["concurrency"]))
+        if not base:
+            continue
+        throughput_delta = (run["throughput_rps"] / base["throughput_rps"] - 1) * 100 if base["throughput_rps"] else 0.0
+        p95_delta = (run["latency_ms"]["p95"] / base["latency_ms"]["p95"] - 1) * 100 if base["latency_ms"]["p95"] else 0.0
+        print(f"{run_label(run):>22} x{run['concurrency']:<3} 처리량 {throughput_delta:+6.1f}%  p95 {p95_delta:+6.1f}%")
+
+
+def run_label(run: Dict[str, Any]) -> str:
+    """출력용 대상 이름 (run_analysis는 실행 방식 포함)"""
+    return f"{run['target']}/{run['mode']}" if run["target"] == "run_analysis" else run["target"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="가짜 LLM을 사용한 분석 파이프라인 벤치마크")
+    parser.add_argument("--rows", type=int, default=100, help="생성할 합성 상담 데이터 수")
+    parser.add_argument("--concurrency", default="1,3,8", help="동시성 수준 목록 (쉼표 구분)")
+    parser.add_argument("--targets", default=",".join(TARGETS), help="측정 대상 (run_analysis, LLM_automated)")
+    parser.add_argument("--mode", choices=MODES, default="staged",
+                        help="run_analysis 실행 방식 (staged: 단계별 파이프라인 / threads: 기존 스레드 배치)")
+    parser.add_argument("--batch-size", type=int, default=10, help="[threads] run_analysis 배치 크기")
+    parser.add_argument("--fetch-workers", type=int, default=4, help="[staged] DB 조회 스레드 수")
+    parser.add_argument("--cpu-workers", type=int, default=0,
+                        help="[staged] 직렬화·파싱 단계별 프로세스 수 (0이면 CPU 코어 수의 절반)")
+    parser.add_argument("--save-workers", type=int, default=2, help="[staged] 결과 저장 스레드 수")
+    parser.add_argument("--save-batch-size", type=int, default=1,
+                        help="[staged] 결과를 이 크기로 모아 bulk_update로 저장 (1이면 행별 저장)")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="가짜 LLM 지연 중앙값 (ms)")
+    parser.add_argument("--latency-sigma", type=float, default=0.4, help="지연 분포 폭 (lognormal sigma)")
+    parser.add_argument("--latency-distribution", default="lognormal", choices=["lognormal", "uniform", "fixed"])
+    parser.add_argument("--error-rate", type=float, default=0.0, help="가짜 LLM 호출 실패 비율")
+    parser.add_argument("--shapes", default="complete=1", help="응답 형태 가중치 (예: complete=8,missing_keys=1,verbose=1)")
+    parser.add_argument("--seed", type=int, default=42, help="난수 시드")
+    parser.add_argument("--replay", help="가짜 LLM 대신 LLM 호출 기록 파일(JSONL, glob 가능)의 응답·지연 분포로 재생")
+    parser.add_argument("--replay-latency-scale", type=float, default=1.0, help="--replay 지연 배율 (0이면 지연 없음)")
+    parser.add_argument("--context-cache", action="store_true",
+                        help="고정 지시문을 가짜 컨텍스트 캐시로 보냄 (캐시 호출 경로 측정)")
+    parser.add_argument("--cache-latency-scale", type=float, default=0.8,
+                        help="--context-cache 사용 시 캐시 호출 지연 배율")
+    parser.add_argument("--skip-secondary-store", action="store_true",
+                        help="analysis_results 반영(outbox)을 건너뜀 (분석 DB가 없을 때)")
+    parser.add_argument("--no-trace-memory", dest="trace_memory", action="store_false",
+                        help="tracemalloc 최대 메모리 측정을 끔 (측정 오버헤드 제거)")
+    parser.add_argument("--output", default="bench_report.json", help="리포트 저장 경로")
+    parser.add_argument("--compare", help="비교할 이전 리포트 경로")
+    parser.add_argument("--keep-data", action="store_true", help="벤치마크 데이터를 삭제하지 않음")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    concurrency_levels = [int(value) for value in args.concurrency.split(",") if value]
+    targets = [value for value in args.targets.split(",") if value]
+    for target in targets:
+        if target not in TARGETS:
+            print(f"알 수 없는 대상입니다: {target}")
+            sys.exit(1)
+
+    shapes = dict(DEFAULT_SHAPES, complete=0.0)
+    for item in args.shapes.split(","):
+        name, _, weight = item.partition("=")
+        shapes[name.strip()] = float(weight or 1)
+
+    services.llm = FakeLLM(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        distribution=args.latency_distribution,
+        error_rate=args.error_rate,
+        shapes=shapes,
+        seed=args.seed,
+    )
+    if args.replay:
+        # 합성 데이터의 프롬프트는 기록에 없으므로 응답은 합성, 지연은 기록된 분포에서 추출
+        services.llm = OfflineProvider(args.replay, model="replay", latency_scale=args.replay_latency_scale)
+    if args.context_cache:
+        services.llm = PrefixCachingLLM(
+            services.llm,
+            FakeContextCacheProvider(services.llm, prefix_discount=args.cache_latency_scale),
+            ANALYSIS_PREFIX,
+        )
+    services.llm_tiers[FAST] = services.llm  # fast 등급도 같은 가짜 LLM 사용
+    if args.skip_secondary_store:
+        settings.ANALYSIS_PROJECTION = "off"  # outbox·analysis_results 반영 없이 consulting만 저장
+
+    print(f"합성 상담 데이터 {args.rows}건 생성 중...")
+    rows = seed_rows(args.rows, args.seed)
+
+    report = {
+        "meta": {
+            "git_commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "db_vendor": connection.vendor,
+            "args": vars(args),
+        },
+        "runs": [],
+    }
+
+    try:
+        for target in targets:
+            for concurrency in concurrency_levels:
+                reset_analysis(rows)
+                run = run_target(target, args.mode, rows, concurrency, args)
+                report["runs"].append(run)
+                print(f"{run_label(run):>22} x{concurrency:<3} {run['throughput_rps']:8.2f} rows/s  "
+                      f"p50 {run['latency_ms']['p50']:8.1f}ms  p95 {run['latency_ms']['p95']:8.1f}ms  "
+                      f"p99 {run['latency_ms']['p99']:8.1f}ms  DB {run['db_time_ms']:8.1f}ms  실패 {run['failures']}")
+    finally:
+        if not args.keep_data:
+            cleanup_rows()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n벤치마크 리포트 저장: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare_reports(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""
+config/celery.py
+
+Celery 앱 설정입니다. settings.py의 CELERY_* 값을 읽고, 각 앱의 tasks.py를 자동 등록합니다.
+
+<사용 예시>
+  celery -A config worker -l info --concurrency 8
+  # 브로커 없이 테스트: CELERY_TASK_ALWAYS_EAGER=True 또는 CELERY_BROKER_URL=memory://
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+app = Celery("config")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
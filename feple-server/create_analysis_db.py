@@ -24,7 +24,9 @@ def create_analysis_db_and_table():
                     improvements TEXT NOT NULL,
                     coaching_message TEXT NOT NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE KEY unique_call_id (call_id)
+                    UNIQUE KEY unique_call_id (call_id),
+                    KEY idx_created_at (created_at),
+                    KEY idx_evaluation_score (evaluation_score)
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """))
         print("새로운 데이터베이스 feple_analysis와 analysis_results 테이블이 성공적으로 생성되었습니다.")
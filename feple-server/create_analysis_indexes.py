@@ -0,0 +1,32 @@
+from sqlalchemy import text, inspect
+from dotenv import load_dotenv
+
+from apps.consultlytics.db import ANALYSIS, get_engine
+
+load_dotenv()
+
+# feple_analysis DB에 접속
+engine = get_engine(ANALYSIS)
+
+# 기존 analysis_results 테이블에 추가할 인덱스 (create_table.py의 DDL과 동일)
+ANALYSIS_RESULTS_INDEXES = {
+    "idx_created_at": "created_at",
+    "idx_evaluation_score": "evaluation_score",
+}
+
+def create_analysis_results_indexes():
+    """이미 생성된 analysis_results 테이블에 누락된 인덱스를 추가합니다."""
+    try:
+        existing = {idx["name"] for idx in inspect(engine).get_indexes("analysis_results")}
+        with engine.begin() as conn:
+            for name, column in ANALYSIS_RESULTS_INDEXES.items():
+                if name in existing:
+                    print(f"{name} 인덱스가 이미 존재합니다.")
+                    continue
+                conn.execute(text(f"CREATE INDEX {name} ON analysis_results ({column})"))
+                print(f"{name} 인덱스가 생성되었습니다.")
+    except Exception as e:
+        print(f"오류 발생: {str(e)}")
+
+if __name__ == "__main__":
+    create_analysis_results_indexes()
@@ -1,7 +1,9 @@
 import os
 import json
 import logging
-from typing import List, Dict, Any, Optional
+import argparse
+import itertools
+from typing import List, Dict, Any, Iterable, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 import django
@@ -21,11 +23,17 @@ from apps.consultlytics.models import Consulting
 from apps.consultlytics.services import analyze_consultation
 from apps.consultlytics.utils import (
     get_all_consulting_data, 
-    save_analysis_results_to_file, 
     format_analysis_result,
     chunk_list,
     validate_api_key
 )
+from apps.consultlytics.metrics import start_periodic_dump
+from apps.consultlytics.log_utils import ProgressLogger
+from apps.consultlytics.checkpoint import RunManifest
+from apps.consultlytics.result_stream import JsonlResultWriter
+from apps.consultlytics.pipeline import StagedPipeline, build_analysis_pipeline, record_outcome
+from apps.consultlytics.llm_scheduler import BACKFILL, REANALYSIS
+from apps.consultlytics.result_store import PROJECTION_MODES
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
@@ -160,25 +168,46 @@ def serialize_for_llm(obj):
         return [serialize_for_llm(v) for v in obj]
     return obj
 
-def analyze_single_consultation(consulting_data: Consulting) -> Dict[str, Any]:
+def analyze_single_consultation(consulting_data: Consulting,
+                                manifest: Optional[RunManifest] = None,
+                                priority: str = BACKFILL,
+                                projection: Optional[str] = None) -> Dict[str, Any]:
     """
     단일 상담 데이터 분석
     
     Args:
         consulting_data: 상담 데이터 객체
+        manifest: 실행 매니페스트 (지정 시 행 상태를 건마다 기록)
+        priority: LLM 스케줄러 우선순위 클래스
+        projection: 보조 저장소 반영 방식 (None이면 ANALYSIS_PROJECTION)
         
     Returns:
         분석 결과 딕셔너리
     """
+    if manifest is None:
+        return _analyze_single_consultation(consulting_data, priority, projection)
+
+    manifest.claim(consulting_data.call_id)
+    result = _analyze_single_consultation(consulting_data, priority, projection)
+    if result.get("status") == "completed":
+        manifest.mark_done(consulting_data.call_id, result)
+    else:
+        manifest.mark_failed(consulting_data.call_id, "분석 실패", result)
+    return result
+
+
+def _analyze_single_consultation(consulting_data: Consulting, priority: str = BACKFILL,
+                                 projection: Optional[str] = None) -> Dict[str, Any]:
+    """analyze_consultation 호출 결과를 표준 결과 형식으로 변환합니다."""
     try:
-        logger.info(f"상담 분석 시작: {consulting_data.call_id}")
-        result = analyze_consultation(consulting_data.call_id)
+        logger.debug(f"상담 분석 시작: {consulting_data.call_id}", extra={"call_id": consulting_data.call_id})
+        result = analyze_consultation(consulting_data.call_id, priority=priority, projection=projection)
         
         if result:
-            logger.info(f"상담 분석 완료: {consulting_data.call_id}")
+            logger.debug(f"상담 분석 완료: {consulting_data.call_id}", extra={"call_id": consulting_data.call_id})
             return format_analysis_result(consulting_data.call_id, result.get("analysis", {}))
         else:
-            logger.error(f"상담 분석 실패: {consulting_data.call_id}")
+            logger.error(f"상담 분석 실패: {consulting_data.call_id}", extra={"call_id": consulting_data.call_id})
             return format_analysis_result(consulting_data.call_id, {})
             
     except Exception as e:
@@ -188,7 +217,11 @@ def analyze_single_consultation(consulting_data: Consulting) -> Dict[str, Any]:
 
 def analyze_consultations_batch(consulting_data_list: List[Consulting], 
                               max_workers: int = 3,
-                              batch_size: int = 10) -> List[Dict[str, Any]]:
+                              batch_size: int = 10,
+                              manifest: Optional[RunManifest] = None,
+                              writer: Optional[JsonlResultWriter] = None,
+                              priority: str = BACKFILL,
+                              projection: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     배치 단위로 상담 데이터를 분석 (병렬 처리)
     
@@ -196,23 +229,29 @@ def analyze_consultations_batch(consulting_data_list: List[Consulting],
         consulting_data_list: 분석할 상담 데이터 리스트
         max_workers: 최대 동시 실행 스레드 수
         batch_size: 배치 크기
+        manifest: 실행 매니페스트 (지정 시 행 상태를 건마다 기록)
+        writer: 결과 writer (지정 시 결과를 완료 즉시 파일에 기록하고 메모리에 모으지 않음)
+        priority: LLM 스케줄러 우선순위 클래스
+        projection: 보조 저장소 반영 방식 (None이면 ANALYSIS_PROJECTION)
         
     Returns:
-        분석 결과 리스트
+        분석 결과 리스트 (writer 지정 시 빈 리스트)
     """
     all_results = []
     total_count = len(consulting_data_list)
     
     logger.info(f"총 {total_count}개의 상담 데이터 분석 시작")
+    # 행마다 로그를 남기지 않고 100건 또는 10초마다 한 줄만 기록
+    progress = ProgressLogger(logger, total_count, every=100, interval=10.0)
     
     # 배치 단위로 처리
     for batch_num, batch in enumerate(chunk_list(consulting_data_list, batch_size), 1):
-        logger.info(f"배치 {batch_num} 처리 중 ({len(batch)}개 항목)")
+        logger.debug(f"배치 {batch_num} 처리 중 ({len(batch)}개 항목)")
         
         # 병렬 처리
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_consulting = {
-                executor.submit(analyze_single_consultation, consulting): consulting 
+                executor.submit(analyze_single_consultation, consulting, manifest, priority, projection): consulting 
                 for consulting in batch
             }
             
@@ -222,28 +261,81 @@ def analyze_consultations_batch(consulting_data_list: List[Consulting],
                 try:
                     result = future.result()
                     batch_results.append(result)
-                    
-                    # 진행 상황 출력
-                    completed = len(all_results) + len(batch_results)
-                    logger.info(f"진행률: {completed}/{total_count} ({completed/total_count*100:.1f}%)")
+                    if writer is not None:
+                        writer.write(result)
+                    progress.tick(ok=result.get("status") == "completed", call_id=consulting.call_id)
                     
                 except Exception as e:
-                    logger.error(f"배치 처리 중 오류 ({consulting.call_id}): {str(e)}")
+                    logger.error(f"배치 처리 중 오류 ({consulting.call_id}): {str(e)}", extra={"call_id": consulting.call_id})
                     batch_results.append(format_analysis_result(consulting.call_id, {}))
+                    if writer is not None:
+                        writer.write(batch_results[-1])
+                    progress.tick(ok=False, call_id=consulting.call_id)
         
-        all_results.extend(batch_results)
+        if writer is None:
+            all_results.extend(batch_results)
         
         # 배치 완료 로그
-        logger.info(f"배치 {batch_num} 완료")
+        logger.debug(f"배치 {batch_num} 완료")
     
-    logger.info(f"전체 분석 완료: {len(all_results)}개 결과")
+    logger.info(f"전체 분석 완료: {progress.done}개 결과")
+    return all_results
+
+
+def analyze_consultations_staged(consulting_data_list: List[Consulting],
+                                 pipeline: StagedPipeline,
+                                 manifest: Optional[RunManifest] = None,
+                                 writer: Optional[JsonlResultWriter] = None) -> List[Dict[str, Any]]:
+    """
+    단계별 파이프라인(DB·LLM I/O 스레드 + 직렬화·파싱 프로세스 풀)으로 상담 데이터를 분석
+    
+    Args:
+        consulting_data_list: 분석할 상담 데이터 리스트
+        pipeline: build_analysis_pipeline()으로 만든 파이프라인
+        manifest: 실행 매니페스트 (지정 시 행 상태를 건마다 기록)
+        writer: 결과 writer (지정 시 결과를 완료 즉시 파일에 기록하고 메모리에 모으지 않음)
+        
+    Returns:
+        분석 결과 리스트 (writer 지정 시 빈 리스트)
+    """
+    all_results = []
+    total_count = len(consulting_data_list)
+    progress = ProgressLogger(logger, total_count, every=100, interval=10.0)
+    logger.info(f"총 {total_count}개의 상담 데이터 분석 시작 (단계별 파이프라인)")
+
+    def call_ids():
+        # 파이프라인에 들어가는 시점에 in_flight로 표시
+        for consulting in consulting_data_list:
+            if manifest is not None:
+                manifest.claim(consulting.call_id)
+            yield consulting.call_id
+
+    for ctx in pipeline.run(call_ids()):
+        outcome = record_outcome(ctx)
+        result = format_analysis_result(ctx["call_id"], outcome.get("analysis", {}) if outcome else {})
+        if manifest is not None:
+            if result["status"] == "completed":
+                manifest.mark_done(ctx["call_id"], result)
+            else:
+                manifest.mark_failed(ctx["call_id"], str(ctx.get("error", "분석 실패")), result)
+        if writer is not None:
+            writer.write(result)
+        else:
+            all_results.append(result)
+        progress.tick(ok=result["status"] == "completed", call_id=ctx["call_id"])
+
+    logger.info(f"전체 분석 완료: {progress.done}개 결과")
     return all_results
 
 
-def print_analysis_summary(results: List[Dict[str, Any]]) -> None:
-    """분석 결과 요약 출력"""
-    total_count = len(results)
-    successful_count = sum(1 for r in results if r.get("status") == "completed")
+def print_analysis_summary(results: Iterable[Dict[str, Any]]) -> None:
+    """분석 결과 요약 출력 (이터러블을 한 번만 순회)"""
+    total_count = 0
+    successful_count = 0
+    for r in results:
+        total_count += 1
+        if r.get("status") == "completed":
+            successful_count += 1
     failed_count = total_count - successful_count
     
     print(f"\n{'='*60}")
@@ -256,8 +348,40 @@ def print_analysis_summary(results: List[Dict[str, Any]]) -> None:
     print(f"{'='*60}\n")
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="상담 데이터 일괄 분석 (중단 후 재실행 시 이어서 처리)")
+    parser.add_argument("--manifest", default=getattr(settings, "RUN_MANIFEST_PATH", "checkpoints/run_analysis.db"),
+                        help="행별 진행 상태를 기록할 매니페스트 파일")
+    parser.add_argument("--max-attempts", type=int, default=getattr(settings, "RUN_MAX_ATTEMPTS", 3),
+                        help="행별 최대 시도 횟수 (초과한 실패 행은 더 이상 재시도하지 않음)")
+    parser.add_argument("--fresh", action="store_true",
+                        help="기존 매니페스트를 지우고 처음부터 다시 실행")
+    parser.add_argument("--output", default=getattr(settings, "ANALYSIS_RESULTS_PATH", "analysis_results.jsonl"),
+                        help="결과 JSONL 파일 (결과가 나올 때마다 한 줄씩 추가)")
+    parser.add_argument("--compression", choices=["none", "gzip", "zstd"], default="none",
+                        help="결과 파일 압축 방식 (zstd는 zstandard 패키지 필요)")
+    parser.add_argument("--rotate-mb", type=int, default=0,
+                        help="결과 파일 파트 하나의 최대 크기(MB, 0이면 회전하지 않음)")
+    parser.add_argument("--mode", choices=["staged", "threads"], default="staged",
+                        help="staged: I/O 스레드와 CPU 프로세스 풀을 분리한 단계별 파이프라인 / threads: 기존 스레드 배치")
+    parser.add_argument("--fetch-workers", type=int, default=4, help="[staged] DB 조회 스레드 수")
+    parser.add_argument("--cpu-workers", type=int, default=0,
+                        help="[staged] 직렬화·파싱 단계별 프로세스 수 (0이면 CPU 코어 수의 절반)")
+    parser.add_argument("--llm-workers", type=int, default=3, help="[staged] LLM 동시 호출 수")
+    parser.add_argument("--save-workers", type=int, default=2, help="[staged] 결과 저장 스레드 수")
+    parser.add_argument("--queue-size", type=int, default=32, help="[staged] 단계 사이 큐 크기")
+    parser.add_argument("--save-batch-size", type=int, default=getattr(settings, "ANALYSIS_SAVE_BATCH_SIZE", 1),
+                        help="[staged] 결과를 이 크기로 모아 bulk_update로 저장 (1이면 행별 저장)")
+    parser.add_argument("--priority", choices=[REANALYSIS, BACKFILL], default=BACKFILL,
+                        help="LLM 호출 우선순위 클래스 (대시보드 요청이 항상 먼저 호출됨)")
+    parser.add_argument("--projection", choices=PROJECTION_MODES, default=getattr(settings, "ANALYSIS_PROJECTION", "async"),
+                        help="보조 저장소 반영 방식 (sync: 저장 직후 이 프로세스가 반영 / async: relay_analysis_outbox가 반영)")
+    return parser.parse_args()
+
+
 def main():
     """메인 함수"""
+    args = parse_args()
     try:
         # API 키 유효성 검사
         if not validate_api_key():
@@ -276,40 +400,87 @@ def main():
         
         logger.info(f"총 {len(consulting_data_list)}개의 상담 데이터 발견")
         
-        # 병렬 분석 실행
-        print(f"상담 데이터 분석을 시작합니다... (총 {len(consulting_data_list)}개)")
-        all_results = analyze_consultations_batch(
-            consulting_data_list, 
-            max_workers=3,  # API 제한을 고려하여 동시 요청 수 제한
-            batch_size=10
-        )
-        
-        # 결과 요약 출력
-        print_analysis_summary(all_results)
-        
-        # 개별 결과 출력 (처음 3개만)
-        for i, result in enumerate(all_results[:3]):
-            print(f"\n{'='*50}")
-            print(f"상담 데이터 분석 결과 {i+1} (CALL_ID: {result.get('call_id', 'Unknown')})")
-            print(f"{'='*50}")
-            print(json.dumps(result, ensure_ascii=False, indent=2))
-            print(f"{'='*50}\n")
+        # 실행 매니페스트: 이전 실행에서 완료된 행은 건너뛰고 실패 행만 재시도
+        if args.fresh:
+            RunManifest.reset(args.manifest)
+        manifest = RunManifest(args.manifest)
+        writer = None
+        try:
+            manifest.register(consulting.call_id for consulting in consulting_data_list)
+            todo_ids = set(manifest.pending_ids(args.max_attempts))
+            todo_list = [consulting for consulting in consulting_data_list if consulting.call_id in todo_ids]
+            
+            skipped = len(consulting_data_list) - len(todo_list)
+            if skipped:
+                print(f"매니페스트({args.manifest}) 기준 {skipped}개는 완료되었거나 최대 시도 횟수를 넘어 건너뜁니다.")
+            
+            # 병렬 분석 실행 (결과는 완료되는 즉시 JSONL 파일에 한 줄씩 기록)
+            # 보조 저장소 반영 방식(--projection)은 이 실행의 저장 경로에만 넘김 (웹 프로세스 설정과 별개)
+            print(f"상담 데이터 분석을 시작합니다... (총 {len(todo_list)}개)")
+            writer = JsonlResultWriter(
+                args.output,
+                compression=None if args.compression == "none" else args.compression,
+                max_bytes=args.rotate_mb * 1024 * 1024
+            )
+            if args.mode == "staged":
+                pipeline = build_analysis_pipeline(
+                    fetch_workers=args.fetch_workers,
+                    cpu_workers=args.cpu_workers or None,
+                    llm_workers=args.llm_workers,  # API 제한을 고려하여 동시 요청 수 제한
+                    save_workers=args.save_workers,
+                    queue_size=args.queue_size,
+                    priority=args.priority,
+                    save_batch_size=args.save_batch_size,
+                    projection=args.projection
+                )
+                analyze_consultations_staged(todo_list, pipeline, manifest=manifest, writer=writer)
+            else:
+                analyze_consultations_batch(
+                    todo_list, 
+                    max_workers=3,  # API 제한을 고려하여 동시 요청 수 제한
+                    batch_size=10,
+                    manifest=manifest,
+                    writer=writer,
+                    priority=args.priority,
+                    projection=args.projection
+                )
+            writer.close()
+            
+            # 결과 요약 출력 (이전 실행 결과까지 포함)
+            status_counts = manifest.summary()
+            logger.info(f"매니페스트 상태: {status_counts}")
+            print_analysis_summary(manifest.results())
+            
+            # 개별 결과 출력 (처음 3개만)
+            for i, result in enumerate(itertools.islice(manifest.results(), 3)):
+                print(f"\n{'='*50}")
+                print(f"상담 데이터 분석 결과 {i+1} (CALL_ID: {result.get('call_id', 'Unknown')})")
+                print(f"{'='*50}")
+                print(json.dumps(result, ensure_ascii=False, indent=2))
+                print(f"{'='*50}\n")
+        finally:
+            if writer is not None:
+                writer.close()
+            manifest.close()
         
-        if len(all_results) > 3:
-            print(f"... 외 {len(all_results) - 3}개 결과는 파일을 확인해주세요.")
+        stored_count = status_counts["done"] + status_counts["failed"]
+        if stored_count > 3:
+            print(f"... 외 {stored_count - 3}개 결과는 파일을 확인해주세요.")
         
-        # 결과 파일 저장
-        if save_analysis_results_to_file(all_results):
-            print("✅ 분석 결과가 analysis_results.json 파일에 저장되었습니다.")
-        else:
-            print("❌ 파일 저장 중 오류가 발생했습니다.")
+        if writer.paths:
+            print(f"✅ 이번 실행 결과 {writer.count}건이 {', '.join(writer.paths)} 파일에 기록되었습니다.")
             
     except Exception as e:
         logger.error(f"메인 함수 실행 중 오류: {str(e)}")
         print(f"프로그램 실행 중 오류가 발생했습니다: {str(e)}")
 
 if __name__ == "__main__":
-    main()
+    # 실행 중 단계별 소요 시간·성공/실패 메트릭을 METRICS_DUMP_PATH에 주기적으로 기록
+    metrics_dumper = start_periodic_dump()
+    try:
+        main()
+    finally:
+        metrics_dumper.stop()
 
 # (임시) 모델 리스트 출력 함수는 주석 처리 또는 삭제
 # def print_available_gemini_models():
@@ -59,7 +59,7 @@ python run_analysis.py
 echo.
 echo =============================================
 echo 분석이 완료되었습니다!
-echo 결과 파일: analysis_results.json
+echo 결과 파일: analysis_results.jsonl
 echo 로그 파일: logs/consultlytics.log
 echo =============================================
 pause 